@@ -13,6 +13,17 @@ print(f"Qdrant API Key loaded: {'Yes' if qdrant_api_key else 'No'}")
 S3_CONFIG = {
     "default_bucket": os.getenv("S3_BUCKET", "your-smart-recruit-bucket"),  # Set via environment variable
     "region": os.getenv("AWS_REGION", "ap-south-1"),  # Default region - can be overridden
+    # Connections shared by the thread-safe client across worker threads (botocore default is 10)
+    "max_pool_connections": int(os.getenv("S3_MAX_POOL_CONNECTIONS", "64")),
+    # Opt-in: the bucket must have Transfer Acceleration enabled
+    "use_accelerate_endpoint": os.getenv("S3_USE_ACCELERATE_ENDPOINT", "false").lower() == "true",
+}
+
+# CORS Configuration - comma-separated list of browser origins (e.g. the Streamlit URL)
+CORS_CONFIG = {
+    "allow_origins": [origin.strip() for origin in os.getenv("ALLOWED_ORIGINS", "*").split(",") if origin.strip()],
+    "allow_methods": ["GET", "POST"],
+    "allow_headers": ["Content-Type", "Authorization"],
 }
 
 # DeepInfra BGE Embedding API Configuration
@@ -27,16 +38,37 @@ EMBEDDING_CONFIG = {
 embedding_api_key = EMBEDDING_CONFIG["api_key"]
 print(f"Embedding API Key loaded: {'Yes' if embedding_api_key else 'No'}")
 
+# Qdrant chunk collection settings, applied when a collection is created
+QDRANT_COLLECTION_CONFIG = {
+    "hnsw_m": int(os.getenv("QDRANT_HNSW_M", "16")),
+    "hnsw_ef_construct": int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", "128")),
+    "default_segment_number": int(os.getenv("QDRANT_DEFAULT_SEGMENT_NUMBER", "2")),
+    "indexing_threshold": int(os.getenv("QDRANT_INDEXING_THRESHOLD", "20000")),  # KB of vectors before a segment is HNSW-indexed
+    "flush_interval_sec": int(os.getenv("QDRANT_FLUSH_INTERVAL_SEC", "30")),
+    # Payloads (chunk and document text) are read from disk instead of held in RAM
+    "on_disk_payload": os.getenv("QDRANT_ON_DISK_PAYLOAD", "true").lower() == "true",
+}
+
+# Single shared client for the whole process; set QDRANT_PREFER_GRPC=true to use gRPC instead of REST
 qdrant_client = AsyncQdrantClient(
     url="https://8889bc57-c76e-4707-aca1-dda9416115d6.eu-west-2-0.aws.cloud.qdrant.io",
     api_key=qdrant_api_key,
-    timeout=20
+    timeout=20,
+    prefer_grpc=os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true"
 )
 
 def get_s3_config() -> dict:
     """Get S3 configuration settings"""
     return S3_CONFIG.copy()
 
+def get_cors_config() -> dict:
+    """Get CORS middleware settings"""
+    return {key: list(value) for key, value in CORS_CONFIG.items()}
+
 def get_embedding_config() -> dict:
     """Get embedding API configuration settings"""
-    return EMBEDDING_CONFIG.copy()
\ No newline at end of file
+    return EMBEDDING_CONFIG.copy()
+
+def get_qdrant_collection_config() -> dict:
+    """Get Qdrant collection creation settings"""
+    return QDRANT_COLLECTION_CONFIG.copy()
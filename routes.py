@@ -1,9 +1,13 @@
 from fastapi import FastAPI, HTTPException, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi_mcp import FastApiMCP
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 import uvicorn
 import asyncio
+import orjson
+import anyio.to_thread
+from concurrent.futures import ThreadPoolExecutor
 import uuid
 import time
 from contextlib import asynccontextmanager
@@ -13,18 +17,26 @@ from src.vector_db.vectordb_client import (
     JD_COLLECTION_NAME, 
     CV_COLLECTION_NAME, 
     initialize_qdrant_collections,
+    close_vector_db_clients,
     get_full_document_text_from_db
 )
 from src.vector_db.jd_repository import add_jd_to_db
-from src.vector_db.cv_repository import add_cv_to_db
+from src.vector_db.cv_repository import add_cv_to_db, add_cvs_batch_to_db
+from src.llm.llmclient import close_llm_clients
+from src.llm.utils import preload_prompts
 from src.services.jd_service import parse_jd_with_llm
 from src.services.cv_service import parse_cv_with_llm as parse_cv_with_llm
 from src.services.ranking_service import calculate_cv_ranking
 from src.services.question_service import generate_candidate_questions as core_generate_questions
 from src.services.jd_keyword_service import generate_jd_keywords_by_id
 from src.utils.logging import get_logger
+from src.utils.cache import AsyncTTLCache
+from src.utils.ids import generate_uuid4_batch
+from src.utils.retry import backoff_delay, is_retryable_error
 from src.utils.s3_handler import s3_handler
-from src.utils.file_handler import process_uploaded_file_content
+from src.utils.url_handler import url_handler
+from src.utils.file_handler import ProcessedFile, process_uploaded_file_content
+from config import get_cors_config
 
 # Import the schema models from new location
 from src.schemas.api_schemas import (
@@ -48,30 +60,42 @@ from src.schemas.api_schemas import (
 # Setup logger
 logger = get_logger(__name__)
 
+# Results of LLM-backed endpoints, reused across repeated requests (e.g. UI reloads)
+ranking_cache = AsyncTTLCache("rank_cvs", maxsize=1024, ttl_seconds=3600)
+questions_cache = AsyncTTLCache("generate_questions", maxsize=1024, ttl_seconds=3600)
+
 # Lifespan context manager
 @asynccontextmanager
 async def lifespan(app_instance: FastAPI):
     # Startup event
+    # Blocking work (file extraction, S3 calls) runs in threads; size the pools for concurrent uploads
+    anyio.to_thread.current_default_thread_limiter().total_tokens = 64
+    default_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="smart-recruit")
+    asyncio.get_running_loop().set_default_executor(default_executor)
+
+    prompt_count = await asyncio.to_thread(preload_prompts)
+    logger.info(f"Preloaded {prompt_count} prompt template(s).")
+
     logger.info("Application startup: Initializing Qdrant collections...")
     await initialize_qdrant_collections()
     logger.info("Qdrant collections initialization complete.")
     yield
-    # Shutdown event (if any cleanup needed in the future)
+    # Shutdown event
+    await close_vector_db_clients()
+    await close_llm_clients()
+    await url_handler.close()
+    default_executor.shutdown(wait=False)
     logger.info("Application shutdown.")
 
 app = FastAPI(
     title="Smart Recruit API", 
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
-# Configure CORS to allow requests from your Streamlit app
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Set to your Streamlit URL in production
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Configure CORS to allow requests from your Streamlit app (set ALLOWED_ORIGINS in production)
+app.add_middleware(CORSMiddleware, **get_cors_config())
 
 @app.get("/")
 async def root():
@@ -93,38 +117,45 @@ async def s3_upload_jd(request: S3JDUploadRequest):
         # Get file from S3
         s3_file_data = await s3_handler.get_file_from_s3(request.s3_uri)
         
-        if s3_file_data.get("error"):
-            logger.error(f"S3 file processing error for JD {s3_file_data.get('filename')}: {s3_file_data.get('error')}")
-            raise HTTPException(status_code=400, detail=s3_file_data.get("error"))
-
-        filename = s3_file_data["filename"]
-        raw_text = s3_file_data["raw_text_content"]
-        base64_encoded = s3_file_data["base64_content"]
-        actual_content_type = s3_file_data["content_type"]
-        
-        jd_id = await add_jd_to_db(
-            jd_base64_content=base64_encoded,
-            jd_raw_text_content=raw_text,
-            content_type=actual_content_type,
-            jd_specific_metadata={
-                "original_filename": filename,
-                "source_s3_uri": request.s3_uri,
-                "source_bucket": s3_file_data["bucket"],
-                "source_key": s3_file_data["key"],
-                "file_size_mb": s3_file_data["file_size_mb"]
-            }
+        if s3_file_data.error:
+            logger.error(f"S3 file processing error for JD {s3_file_data.filename}: {s3_file_data.error}")
+            raise HTTPException(status_code=400, detail=s3_file_data.error)
+
+        filename = s3_file_data.filename
+        raw_text = s3_file_data.raw_text_content
+        base64_encoded = s3_file_data.base64_content
+        actual_content_type = s3_file_data.content_type
+        
+        # DB insert and LLM parse consume the same content independently, so run them together
+        logger.info(f"Adding JD to vector DB and parsing with LLM for structured data: {filename}")
+        jd_id, jd_data_from_llm = await asyncio.gather(
+            add_jd_to_db(
+                jd_base64_content=base64_encoded,
+                jd_raw_text_content=raw_text,
+                content_type=actual_content_type,
+                jd_specific_metadata={
+                    "original_filename": filename,
+                    "source_s3_uri": request.s3_uri,
+                    "source_bucket": s3_file_data.bucket,
+                    "source_key": s3_file_data.key,
+                    "file_size_mb": s3_file_data.file_size_mb
+                }
+            ),
+            parse_jd_with_llm(
+                jd_base64_content=base64_encoded,
+                jd_raw_text_content=raw_text,
+                content_type=actual_content_type
+            ),
+            return_exceptions=True
         )
-        
+
+        if isinstance(jd_id, Exception):
+            raise jd_id
         if not jd_id:
             logger.error(f"Failed to add JD to vector DB: {filename}")
             raise HTTPException(status_code=500, detail="Failed to add JD to vector DB")
-        
-        logger.info(f"Parsing JD with LLM for structured data: {filename}")
-        jd_data_from_llm = await parse_jd_with_llm(
-            jd_base64_content=base64_encoded,
-            jd_raw_text_content=raw_text,
-            content_type=actual_content_type
-        )
+        if isinstance(jd_data_from_llm, Exception):
+            raise jd_data_from_llm
 
         if "error" in jd_data_from_llm:
             logger.warning(f"LLM parsing for JD {filename} resulted in an error or no data: {jd_data_from_llm.get('error')}")
@@ -153,96 +184,27 @@ async def s3_upload_cv(request: S3CVUploadRequest):
         # Get file from S3
         s3_file_data = await s3_handler.get_file_from_s3(request.s3_uri)
         
-        if s3_file_data.get("error"):
-            logger.error(f"S3 file processing error for CV {s3_file_data.get('filename')}: {s3_file_data.get('error')}")
-            raise HTTPException(status_code=400, detail=s3_file_data.get("error"))
-
-        filename = s3_file_data["filename"]
-        raw_text = s3_file_data["raw_text_content"]
-        base64_encoded = s3_file_data["base64_content"]
-        actual_content_type = s3_file_data["content_type"]
-        
-        # Use the existing CV processing logic with retry mechanism
+        if s3_file_data.error:
+            logger.error(f"S3 file processing error for CV {s3_file_data.filename}: {s3_file_data.error}")
+            raise HTTPException(status_code=400, detail=s3_file_data.error)
+
+        filename = s3_file_data.filename
         cv_id_generated = str(uuid.uuid4())
-        max_attempts = 2
-        retry_delay_seconds = 3
-
-        last_error_for_response = "Processing failed after all attempts."
-        last_cv_data_for_response = {"error": last_error_for_response}
-        db_add_successful_last_attempt = False
-
-        for attempt in range(max_attempts):
-            logger.info(f"Processing CV from S3: {filename}, CV ID: {cv_id_generated}, Attempt: {attempt + 1}/{max_attempts}")
-            current_attempt_error = None
-            cv_data_from_llm_this_attempt = None
-            db_add_successful_this_attempt = False
-
-            try:
-                # Step 1: Add to DB
-                db_add_result_cv_id = await add_cv_to_db(
-                    cv_base64_content=base64_encoded,
-                    cv_raw_text_content=raw_text,
-                    content_type=actual_content_type,
-                    cv_metadata_with_links={
-                        "original_doc_id": cv_id_generated,
-                        "original_filename": filename,
-                        "source_s3_uri": request.s3_uri,
-                        "source_bucket": s3_file_data["bucket"],
-                        "source_key": s3_file_data["key"],
-                        "file_size_mb": s3_file_data["file_size_mb"]
-                    }
-                )
-                
-                if not db_add_result_cv_id:
-                    current_attempt_error = "Failed to add CV to vector DB."
-                    logger.error(f"{current_attempt_error} - Filename: {filename} (Attempt {attempt + 1})")
-                else:
-                    db_add_successful_this_attempt = True
-                    db_add_successful_last_attempt = True
-                    logger.info(f"CV added to DB successfully from S3: {filename}, CV ID: {cv_id_generated} (Attempt {attempt + 1})")
-
-                    # Step 2: Parse with LLM
-                    llm_parse_result_dict = await parse_cv_with_llm( 
-                        cv_base64_content=base64_encoded,
-                        cv_raw_text_content=raw_text,
-                        content_type=actual_content_type
-                    )
-                    cv_data_from_llm_this_attempt = llm_parse_result_dict.get("structured_data")
-
-                    if not cv_data_from_llm_this_attempt or (isinstance(cv_data_from_llm_this_attempt, dict) and "error" in cv_data_from_llm_this_attempt):
-                        llm_error_msg = cv_data_from_llm_this_attempt.get('error', 'Unknown LLM parsing error') if isinstance(cv_data_from_llm_this_attempt, dict) else "LLM parsing returned no data"
-                        current_attempt_error = f"LLM Parsing Error: {llm_error_msg}"
-                        logger.warning(f"{current_attempt_error} for {filename} (Attempt {attempt + 1})")
-                    else:
-                        logger.info(f"CV processing fully successful on attempt {attempt + 1} for {filename} from S3")
-                        return CVUploadResponse(cv_id=cv_id_generated, success=True, filename=filename,
-                                                cv_data=cv_data_from_llm_this_attempt, error=None)
-            except Exception as e:
-                current_attempt_error = f"Unexpected exception: {str(e)}"
-                logger.error(f"{current_attempt_error} during CV processing from S3: {filename} (Attempt {attempt + 1})", exc_info=True)
-                if not cv_data_from_llm_this_attempt: 
-                    cv_data_from_llm_this_attempt = {"error": current_attempt_error}
-
-            last_error_for_response = current_attempt_error or "Unknown error in attempt."
-            last_cv_data_for_response = cv_data_from_llm_this_attempt if cv_data_from_llm_this_attempt else {"error": last_error_for_response}
-            
-            if attempt < max_attempts - 1:
-                logger.info(f"Attempt {attempt + 1} failed for {filename} from S3. Error: {last_error_for_response}. Retrying in {retry_delay_seconds}s...")
-                await asyncio.sleep(retry_delay_seconds)
-            else:
-                logger.error(f"All {max_attempts} attempts failed for CV {filename} from S3. Last error: {last_error_for_response}")
-                if db_add_successful_last_attempt and "LLM Parsing Error" in last_error_for_response:
-                    return CVUploadResponse(cv_id=cv_id_generated, 
-                                           success=False, 
-                                           filename=filename,
-                                           cv_data=last_cv_data_for_response, 
-                                           error=last_error_for_response)
-                return CVUploadResponse(cv_id=cv_id_generated, success=False, filename=filename,
-                                       cv_data=last_cv_data_for_response, error=last_error_for_response)
-        
-        # Fallback
-        return CVUploadResponse(cv_id=cv_id_generated, success=False, filename=filename, 
-                               cv_data=last_cv_data_for_response, error=last_error_for_response)
+        result = await process_single_cv_async(
+            s3_file_data,
+            cv_id_generated,
+            cv_metadata={
+                "original_filename": filename,
+                "source_s3_uri": request.s3_uri,
+                "source_bucket": s3_file_data.bucket,
+                "source_key": s3_file_data.key,
+                "file_size_mb": s3_file_data.file_size_mb
+            },
+            retry_delay_seconds=3
+        )
+
+        return CVUploadResponse(cv_id=cv_id_generated, success=result.success, filename=filename,
+                                cv_data=result.cv_data, error=result.error)
 
     except HTTPException as http_exc:
         raise http_exc
@@ -268,32 +230,43 @@ async def upload_jd(file: UploadFile = File(...)):
         # Process the uploaded file
         file_data = await process_uploaded_file_content(file)
         
-        if file_data.get("error"):
-            logger.error(f"File processing error for JD {file.filename}: {file_data.get('error')}")
+        if file_data.error:
+            logger.error(f"File processing error for JD {file.filename}: {file_data.error}")
             return LocalJDUploadResponse(
                 jd_id="",
                 filename=file.filename,
                 jd_data=None,
-                error=file_data.get("error")
+                error=file_data.error
             )
 
-        filename = file_data["filename"]
-        raw_text = file_data["raw_text_content"]
-        base64_encoded = file_data["base64_content"]
-        actual_content_type = file_data["content_type"]
-        
-        # Add to database
-        jd_id = await add_jd_to_db(
-            jd_base64_content=base64_encoded,
-            jd_raw_text_content=raw_text,
-            content_type=actual_content_type,
-            jd_specific_metadata={
-                "original_filename": filename,
-                "source": "local_upload",
-                "upload_method": "direct_file"
-            }
+        filename = file_data.filename
+        raw_text = file_data.raw_text_content
+        base64_encoded = file_data.base64_content
+        actual_content_type = file_data.content_type
+        
+        # DB insert and LLM parse consume the same content independently, so run them together
+        logger.info(f"Adding JD to vector DB and parsing with LLM for structured data: {filename}")
+        jd_id, jd_data_from_llm = await asyncio.gather(
+            add_jd_to_db(
+                jd_base64_content=base64_encoded,
+                jd_raw_text_content=raw_text,
+                content_type=actual_content_type,
+                jd_specific_metadata={
+                    "original_filename": filename,
+                    "source": "local_upload",
+                    "upload_method": "direct_file"
+                }
+            ),
+            parse_jd_with_llm(
+                jd_base64_content=base64_encoded,
+                jd_raw_text_content=raw_text,
+                content_type=actual_content_type
+            ),
+            return_exceptions=True
         )
-        
+
+        if isinstance(jd_id, Exception):
+            raise jd_id
         if not jd_id:
             logger.error(f"Failed to add JD to vector DB: {filename}")
             return LocalJDUploadResponse(
@@ -302,14 +275,8 @@ async def upload_jd(file: UploadFile = File(...)):
                 jd_data=None,
                 error="Failed to add JD to vector DB"
             )
-        
-        # Parse with LLM
-        logger.info(f"Parsing JD with LLM for structured data: {filename}")
-        jd_data_from_llm = await parse_jd_with_llm(
-            jd_base64_content=base64_encoded,
-            jd_raw_text_content=raw_text,
-            content_type=actual_content_type
-        )
+        if isinstance(jd_data_from_llm, Exception):
+            raise jd_data_from_llm
 
         if "error" in jd_data_from_llm:
             logger.warning(f"LLM parsing for JD {filename} resulted in an error: {jd_data_from_llm.get('error')}")
@@ -339,110 +306,199 @@ async def upload_jd(file: UploadFile = File(...)):
             error=f"Error processing JD file: {str(e)}"
         )
 
-async def process_single_cv_async(file_data: Dict, cv_id: str) -> LocalCVUploadResult:
-    """Process a single CV file asynchronously with retry logic"""
-    filename = file_data["filename"]
-    raw_text = file_data["raw_text_content"]
-    base64_encoded = file_data["base64_content"]
-    actual_content_type = file_data["content_type"]
+# One lazily formatted record per CV processing attempt
+_CV_ATTEMPT_LOG_FORMAT = "cv_attempt filename=%s cv_id=%s attempt=%d/%d db=%s llm=%s status=%s error=%s"
+
+def _get_local_cv_metadata(filename: str) -> Dict[str, Any]:
+    """Metadata stored with CVs uploaded through /upload-cvs"""
+    return {
+        "original_filename": filename,
+        "source": "local_upload",
+        "upload_method": "batch_file_upload"
+    }
+
+def _is_complete_ranking(ranked_cv_data: Optional[List[Dict[str, Any]]]) -> bool:
+    """True when every ranked CV carries a real LLM evaluation, so the result is safe to cache"""
+    if not ranked_cv_data:
+        return False
+    for item in ranked_cv_data:
+        assessment = item.get("llm_overall_assessment")
+        if not assessment or str(assessment).startswith(("Error:", "N/A:")):
+            return False
+        if any(str(entry).startswith("Error:") for entry in item.get("llm_skills_evaluation") or []):
+            return False
+    return True
+
+async def process_single_cv_async(
+    file_data: ProcessedFile,
+    cv_id: str,
+    cv_metadata: Optional[Dict[str, Any]] = None,
+    max_attempts: int = 2,
+    retry_delay_seconds: float = 2,
+    db_add_successful: bool = False,
+    cv_data_from_llm: Optional[Dict[str, Any]] = None
+) -> LocalCVUploadResult:
+    """
+    Process a single CV file asynchronously with retry logic.
+    Adds the CV to the vector DB and parses it with the LLM, running both concurrently.
+    A failed step is retried on the next attempt; a step that already succeeded is not re-run.
+    Retries stop early when a step fails with a non-retryable (4xx) error.
     
-    max_attempts = 2
-    retry_delay_seconds = 2
+    Args:
+        file_data: Processed file content (filename, raw_text_content, base64_content, content_type)
+        cv_id: ID to store the CV under
+        cv_metadata: Metadata to store with the CV (without 'original_doc_id'); defaults to local upload metadata
+        max_attempts: Maximum number of attempts
+        retry_delay_seconds: Base delay for exponential backoff between attempts
+        db_add_successful: Whether the CV is already stored in the vector DB
+        cv_data_from_llm: Structured data from an earlier successful LLM parse, if any
+        
+    Returns:
+        LocalCVUploadResult; a CV that reached the DB keeps its ID even if LLM parsing failed
+    """
+    filename = file_data.filename
+    raw_text = file_data.raw_text_content
+    base64_encoded = file_data.base64_content
+    actual_content_type = file_data.content_type
+    if cv_metadata is None:
+        cv_metadata = _get_local_cv_metadata(filename)
+
+    last_llm_error_data = None
+    current_error = "All attempts failed"
 
     for attempt in range(max_attempts):
-        logger.info(f"Processing CV: {filename}, CV ID: {cv_id}, Attempt: {attempt + 1}/{max_attempts}")
-        
-        try:
-            # Step 1: Add to DB
-            db_add_result_cv_id = await add_cv_to_db(
+        pending_steps = {}
+        if not db_add_successful:
+            pending_steps["db"] = add_cv_to_db(
                 cv_base64_content=base64_encoded,
                 cv_raw_text_content=raw_text,
                 content_type=actual_content_type,
-                cv_metadata_with_links={
-                    "original_doc_id": cv_id,
-                    "original_filename": filename,
-                    "source": "local_upload",
-                    "upload_method": "batch_file_upload"
-                }
+                cv_metadata_with_links={"original_doc_id": cv_id, **cv_metadata}
             )
-            
-            if not db_add_result_cv_id:
-                current_error = "Failed to add CV to vector DB."
-                logger.error(f"{current_error} - Filename: {filename} (Attempt {attempt + 1})")
-                if attempt == max_attempts - 1:
-                    return LocalCVUploadResult(
-                        cv_id=None,
-                        success=False,
-                        filename=filename,
-                        cv_data={"error": current_error},
-                        error=current_error
-                    )
-                await asyncio.sleep(retry_delay_seconds)
-                continue
-
-            logger.info(f"CV added to DB successfully: {filename}, CV ID: {cv_id} (Attempt {attempt + 1})")
-
-            # Step 2: Parse with LLM
-            llm_parse_result_dict = await parse_cv_with_llm( 
+        if cv_data_from_llm is None:
+            pending_steps["llm"] = parse_cv_with_llm(
                 cv_base64_content=base64_encoded,
                 cv_raw_text_content=raw_text,
                 content_type=actual_content_type
             )
-            cv_data_from_llm = llm_parse_result_dict.get("structured_data")
-
-            if not cv_data_from_llm or (isinstance(cv_data_from_llm, dict) and "error" in cv_data_from_llm):
-                llm_error_msg = cv_data_from_llm.get('error', 'Unknown LLM parsing error') if isinstance(cv_data_from_llm, dict) else "LLM parsing returned no data"
-                current_error = f"LLM Parsing Error: {llm_error_msg}"
-                logger.warning(f"{current_error} for {filename} (Attempt {attempt + 1})")
-                
-                if attempt == max_attempts - 1:
-                    # DB was successful, but LLM failed - still return the CV ID
-                    return LocalCVUploadResult(
-                        cv_id=cv_id,
-                        success=False,
-                        filename=filename,
-                        cv_data=cv_data_from_llm if cv_data_from_llm else {"error": current_error},
-                        error=current_error
-                    )
-                await asyncio.sleep(retry_delay_seconds)
-                continue
-            
-            # Success!
-            logger.info(f"CV processing fully successful: {filename}, CV ID: {cv_id}")
-            return LocalCVUploadResult(
-                cv_id=cv_id,
-                success=True,
-                filename=filename,
-                cv_data=cv_data_from_llm,
-                error=None
-            )
-            
-        except Exception as e:
-            current_error = f"Unexpected exception: {str(e)}"
-            logger.error(f"{current_error} during CV processing: {filename} (Attempt {attempt + 1})", exc_info=True)
-            
-            if attempt == max_attempts - 1:
-                return LocalCVUploadResult(
-                    cv_id=None,
-                    success=False,
-                    filename=filename,
-                    cv_data={"error": current_error},
-                    error=current_error
-                )
-            await asyncio.sleep(retry_delay_seconds)
-    
-    # Fallback (should not reach here)
+        step_results = dict(zip(pending_steps, await asyncio.gather(*pending_steps.values(), return_exceptions=True)))
+
+        attempt_errors = []
+        attempt_exception = None
+        retryable = True
+        if "db" in step_results:
+            db_result = step_results["db"]
+            if isinstance(db_result, Exception):
+                retryable = retryable and is_retryable_error(db_result)
+                attempt_exception = db_result
+                attempt_errors.append(f"Unexpected exception: {str(db_result)}")
+            elif not db_result:
+                attempt_errors.append("Failed to add CV to vector DB.")
+            else:
+                db_add_successful = True
+
+        if "llm" in step_results:
+            llm_result = step_results["llm"]
+            if isinstance(llm_result, Exception):
+                retryable = retryable and is_retryable_error(llm_result)
+                attempt_exception = attempt_exception or llm_result
+                attempt_errors.append(f"Unexpected exception: {str(llm_result)}")
+            elif not llm_result.ok:
+                attempt_errors.append(f"LLM Parsing Error: {llm_result.error}")
+                last_llm_error_data = llm_result.data
+            else:
+                cv_data_from_llm = llm_result.data
+
+        db_status = "ok" if db_add_successful else "failed"
+        llm_status = "ok" if cv_data_from_llm is not None else "failed"
+        if db_add_successful and cv_data_from_llm is not None:
+            logger.info(_CV_ATTEMPT_LOG_FORMAT, filename, cv_id, attempt + 1, max_attempts, db_status, llm_status, "success", None)
+            return LocalCVUploadResult(cv_id=cv_id, success=True, filename=filename, cv_data=cv_data_from_llm, error=None)
+
+        current_error = "; ".join(attempt_errors) or "Unknown error in attempt."
+        if not retryable:
+            logger.error(_CV_ATTEMPT_LOG_FORMAT, filename, cv_id, attempt + 1, max_attempts, db_status, llm_status, "non_retryable", current_error, exc_info=attempt_exception)
+            break
+        if attempt < max_attempts - 1:
+            delay = backoff_delay(attempt, retry_delay_seconds)
+            logger.warning(_CV_ATTEMPT_LOG_FORMAT + " retry_in=%.1fs", filename, cv_id, attempt + 1, max_attempts, db_status, llm_status, "retrying", current_error, delay, exc_info=attempt_exception)
+            await asyncio.sleep(delay)
+        else:
+            logger.error(_CV_ATTEMPT_LOG_FORMAT, filename, cv_id, attempt + 1, max_attempts, db_status, llm_status, "failed", current_error, exc_info=attempt_exception)
+
+    cv_data = cv_data_from_llm or last_llm_error_data
     return LocalCVUploadResult(
-        cv_id=None,
+        cv_id=cv_id if db_add_successful else None,
         success=False,
         filename=filename,
-        cv_data={"error": "All attempts failed"},
-        error="All attempts failed"
+        cv_data=cv_data if cv_data else {"error": current_error},
+        error=current_error
     )
 
+async def _stream_cv_upload_results(
+    file_data_list: List[Tuple[Optional[str], ProcessedFile]],
+    total_files: int,
+    start_time: float
+) -> AsyncIterator[bytes]:
+    """
+    Yield one NDJSON line per CV as soon as it finishes processing, then a final summary line.
+    Each CV is processed independently so early finishers are not held back by the rest of the batch.
+    """
+    successful_count = 0
+    failed_count = 0
+    filename_by_task = {}
+    try:
+        for cv_id, file_data in file_data_list:
+            if cv_id:
+                task = asyncio.create_task(process_single_cv_async(file_data, cv_id))
+                filename_by_task[task] = file_data.filename
+            else:
+                failed_count += 1
+                yield orjson.dumps(LocalCVUploadResult(
+                    cv_id=None, success=False, filename=file_data.filename,
+                    cv_data={"error": file_data.error}, error=file_data.error
+                ).model_dump()) + b"\n"
+
+        pending = set(filename_by_task)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                try:
+                    result = task.result()
+                except Exception as e:
+                    error_msg = f"Processing exception: {str(e)}"
+                    logger.error(f"Exception processing CV {filename_by_task[task]}: {error_msg}")
+                    result = LocalCVUploadResult(
+                        cv_id=None, success=False, filename=filename_by_task[task],
+                        cv_data={"error": error_msg}, error=error_msg
+                    )
+                if result.success:
+                    successful_count += 1
+                else:
+                    failed_count += 1
+                yield orjson.dumps(result.model_dump()) + b"\n"
+
+        processing_time = time.time() - start_time
+        logger.info(f"Streamed CV processing completed: {successful_count} successful, {failed_count} failed, {processing_time:.2f}s")
+        yield orjson.dumps({
+            "total_files": total_files,
+            "successful_uploads": successful_count,
+            "failed_uploads": failed_count,
+            "processing_time_seconds": round(processing_time, 2)
+        }) + b"\n"
+    finally:
+        # Client went away mid-stream: stop the remaining work
+        for task in filename_by_task:
+            if not task.done():
+                task.cancel()
+
 @app.post("/upload-cvs", response_model=LocalMultipleCVUploadResponse, operation_id="upload_cvs")
-async def upload_multiple_cvs(files: List[UploadFile] = File(...)):
-    """Upload and process multiple CV files from local storage asynchronously"""
+async def upload_multiple_cvs(files: List[UploadFile] = File(...), stream: bool = False):
+    """
+    Upload and process multiple CV files from local storage asynchronously.
+    With stream=true, per-CV results are returned as NDJSON lines as they complete,
+    followed by a summary line; otherwise a single LocalMultipleCVUploadResponse is returned.
+    """
     start_time = time.time()
     
     try:
@@ -452,51 +508,101 @@ async def upload_multiple_cvs(files: List[UploadFile] = File(...)):
             raise HTTPException(status_code=400, detail="No files provided")
         
         # Validate files and process file content
-        file_data_list = []
-        cv_ids = []
-        
-        for file in files:
-            if not file.filename:
-                logger.warning(f"Skipping file with no filename")
-                continue
-                
-            # Process file content
-            file_data = await process_uploaded_file_content(file)
-            
-            if file_data.get("error"):
-                logger.error(f"File processing error for CV {file.filename}: {file_data.get('error')}")
+        named_files = [file for file in files if file.filename]
+        if len(named_files) < len(files):
+            logger.warning(f"Skipping {len(files) - len(named_files)} file(s) with no filename")
+
+        # Extract content from all files concurrently
+        extracted = await asyncio.gather(
+            *(process_uploaded_file_content(file) for file in named_files),
+            return_exceptions=True
+        )
+
+        # (cv_id, processed file) pairs; cv_id is None for files that failed extraction
+        file_data_list: List[Tuple[Optional[str], ProcessedFile]] = []
+        new_cv_ids = iter(generate_uuid4_batch(len(named_files)))
+        for file, file_data in zip(named_files, extracted):
+            if isinstance(file_data, Exception):
+                file_data = ProcessedFile(filename=file.filename, error=f"Error processing file: {str(file_data)}")
+
+            if file_data.error:
+                logger.error(f"File processing error for CV {file.filename}: {file_data.error}")
                 # Add error result to process later
-                file_data_list.append({
-                    "filename": file.filename,
-                    "error": file_data.get("error"),
-                    "cv_id": None
-                })
+                file_data_list.append((None, file_data))
             else:
-                cv_id = str(uuid.uuid4())
-                cv_ids.append(cv_id)
-                file_data["cv_id"] = cv_id
-                file_data_list.append(file_data)
+                file_data_list.append((next(new_cv_ids), file_data))
         
-        # Process all CVs asynchronously
-        tasks = []
-        for file_data in file_data_list:
-            if file_data.get("error"):
-                # Create a task that returns the error immediately
-                async def create_error_result(filename, error_msg):
-                    return LocalCVUploadResult(
-                        cv_id=None,
-                        success=False,
-                        filename=filename,
-                        cv_data={"error": error_msg},
-                        error=error_msg
-                    )
-                tasks.append(create_error_result(file_data["filename"], file_data["error"]))
+        if stream:
+            return StreamingResponse(
+                _stream_cv_upload_results(file_data_list, len(files), start_time),
+                media_type="application/x-ndjson"
+            )
+
+        valid_file_data = [(cv_id, file_data) for cv_id, file_data in file_data_list if cv_id]
+
+        # First pass: one batched vector DB insert for all CVs, alongside per-CV LLM parsing
+        logger.info(f"Starting batched processing of {len(valid_file_data)} CV files")
+        batch_db_task = add_cvs_batch_to_db([
+            {
+                "cv_metadata_with_links": {"original_doc_id": cv_id, **_get_local_cv_metadata(file_data.filename)},
+                "cv_base64_content": file_data.base64_content,
+                "cv_raw_text_content": file_data.raw_text_content,
+                "content_type": file_data.content_type
+            }
+            for cv_id, file_data in valid_file_data
+        ])
+        llm_tasks = asyncio.gather(*(
+            parse_cv_with_llm(
+                cv_base64_content=file_data.base64_content,
+                cv_raw_text_content=file_data.raw_text_content,
+                content_type=file_data.content_type
+            )
+            for _, file_data in valid_file_data
+        ), return_exceptions=True)
+        batch_db_result, llm_results = await asyncio.gather(batch_db_task, llm_tasks, return_exceptions=True)
+        if isinstance(batch_db_result, Exception):
+            logger.error(f"Batched vector DB insert failed; falling back to per-CV inserts: {batch_db_result}")
+            batch_db_result = [None] * len(valid_file_data)
+        if isinstance(llm_results, Exception):
+            llm_results = [llm_results] * len(valid_file_data)
+
+        results_by_cv_id = {}
+        retry_tasks = []
+        for (cv_id, file_data), stored_cv_id, llm_result in zip(valid_file_data, batch_db_result, llm_results):
+            cv_data_from_llm = llm_result.data if not isinstance(llm_result, Exception) and llm_result.ok else None
+
+            if stored_cv_id and cv_data_from_llm is not None:
+                results_by_cv_id[cv_id] = LocalCVUploadResult(
+                    cv_id=cv_id, success=True, filename=file_data.filename,
+                    cv_data=cv_data_from_llm, error=None
+                )
             else:
-                tasks.append(process_single_cv_async(file_data, file_data["cv_id"]))
-        
-        # Execute all tasks concurrently
-        logger.info(f"Starting concurrent processing of {len(tasks)} CV files")
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+                # Second pass: retry only the step that failed for this CV
+                retry_tasks.append((cv_id, file_data, bool(stored_cv_id), cv_data_from_llm))
+
+        if retry_tasks:
+            logger.info(f"Retrying {len(retry_tasks)} CV files individually after batched processing")
+            await asyncio.sleep(backoff_delay(0, 2))
+            retry_results = await asyncio.gather(*(
+                process_single_cv_async(
+                    file_data, cv_id, max_attempts=1,
+                    db_add_successful=db_add_successful, cv_data_from_llm=cv_data_from_llm
+                )
+                for cv_id, file_data, db_add_successful, cv_data_from_llm in retry_tasks
+            ), return_exceptions=True)
+            for (cv_id, _, _, _), retry_result in zip(retry_tasks, retry_results):
+                results_by_cv_id[cv_id] = retry_result
+
+        results = [
+            results_by_cv_id[cv_id] if cv_id else LocalCVUploadResult(
+                cv_id=None,
+                success=False,
+                filename=file_data.filename,
+                cv_data={"error": file_data.error},
+                error=file_data.error
+            )
+            for cv_id, file_data in file_data_list
+        ]
         
         # Process results
         final_results = []
@@ -506,7 +612,7 @@ async def upload_multiple_cvs(files: List[UploadFile] = File(...)):
         for i, result in enumerate(results):
             if isinstance(result, Exception):
                 # Handle exceptions that occurred during processing
-                filename = file_data_list[i].get("filename", f"file_{i}")
+                filename = file_data_list[i][1].filename or f"file_{i}"
                 error_msg = f"Processing exception: {str(result)}"
                 logger.error(f"Exception processing CV {filename}: {error_msg}")
                 
@@ -566,31 +672,36 @@ async def rank_cvs(request: RankingRequest):
             })
 
         logger.info(f"Calling calculate_cv_ranking for JD ID: {jd_id}")
-        ranked_cv_data = await calculate_cv_ranking(
-            current_jd_id=jd_id,
-            active_session_cvs=cv_details_for_ranking,
-            top_n=top_n_to_rank
+        ranked_cv_data = await ranking_cache.get_or_compute(
+            ("rank_cvs", jd_id, tuple(sorted(cv_ids_from_request)), top_n_to_rank),
+            lambda: calculate_cv_ranking(
+                current_jd_id=jd_id,
+                active_session_cvs=cv_details_for_ranking,
+                top_n=top_n_to_rank
+            ),
+            doc_ids=[jd_id, *cv_ids_from_request],
+            should_cache=_is_complete_ranking
         )
         
         if ranked_cv_data is None:
             logger.error(f"calculate_cv_ranking returned None for JD ID: {jd_id}. Ranking failed.")
             return RankingResponse(rankings=[]) 
 
-        final_rankings_for_api = []
-        for cv_rank_item in ranked_cv_data:
-            final_rankings_for_api.append(
-                RankingResult(
-                    cv_id=cv_rank_item.get("cv_id", "unknown_cv_id"),
-                    score=float(cv_rank_item.get("llm_ranking_score", 0.0)),
-                    evaluation={
-                        "filename": cv_rank_item.get("filename", "N/A"),
-                        "llm_skills_evaluation": cv_rank_item.get("llm_skills_evaluation", []),
-                        "llm_experience_evaluation": cv_rank_item.get("llm_experience_evaluation", []),
-                        "llm_additional_points": cv_rank_item.get("llm_additional_points", []),
-                        "llm_overall_assessment": cv_rank_item.get("llm_overall_assessment", "N/A")
-                    }
-                )
+        # Ranking output is built internally, so skip per-item validation
+        final_rankings_for_api = [
+            RankingResult.model_construct(
+                cv_id=cv_rank_item.get("cv_id", "unknown_cv_id"),
+                score=float(cv_rank_item.get("llm_ranking_score", 0.0)),
+                evaluation={
+                    "filename": cv_rank_item.get("filename", "N/A"),
+                    "llm_skills_evaluation": cv_rank_item.get("llm_skills_evaluation", []),
+                    "llm_experience_evaluation": cv_rank_item.get("llm_experience_evaluation", []),
+                    "llm_additional_points": cv_rank_item.get("llm_additional_points", []),
+                    "llm_overall_assessment": cv_rank_item.get("llm_overall_assessment", "N/A")
+                }
             )
+            for cv_rank_item in ranked_cv_data
+        ]
 
         logger.info(f"Successfully ranked {len(final_rankings_for_api)} CVs for JD ID: {jd_id}.")
         return RankingResponse(rankings=final_rankings_for_api)
@@ -599,7 +710,8 @@ async def rank_cvs(request: RankingRequest):
         logger.error(f"HTTPException in rank_cvs for JD ID {request.jd_id if request else 'unknown'}: {http_exc.detail}")
         raise http_exc
     except Exception as e:
-        logger.error(f"Unexpected error in rank_cvs for JD ID {request.jd_id if request else 'unknown'}: {str(e)}", exc_info=True)
+        logger.error(f"Unexpected error in rank_cvs for JD ID {request.jd_id if request else 'unknown'}: {type(e).__name__}: {str(e)}")
+        logger.debug("Traceback for rank_cvs error", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Unexpected error ranking CVs: {str(e)}")
 
 @app.post("/generate-questions", response_model=QuestionGenerationResponse, operation_id="generate_questions")
@@ -614,50 +726,53 @@ async def generate_questions(request: QuestionGenerationRequest):
             logger.warning("Missing jd_id or cv_id in generate_questions request.")
             raise HTTPException(status_code=400, detail="Missing jd_id or cv_id")
         
-        logger.info(f"Fetching full JD text for ID: {jd_id}")
-        full_jd_text = await get_full_document_text_from_db(jd_id, JD_COLLECTION_NAME())
+        logger.info(f"Fetching full JD text for ID: {jd_id} and full CV text for ID: {cv_id}")
+        full_jd_text, full_cv_text = await asyncio.gather(
+            get_full_document_text_from_db(jd_id, JD_COLLECTION_NAME),
+            get_full_document_text_from_db(cv_id, CV_COLLECTION_NAME)
+        )
         if not full_jd_text:
             logger.error(f"Could not retrieve full JD text for ID: {jd_id}. Cannot generate questions.")
             raise HTTPException(status_code=404, detail=f"JD text not found for ID: {jd_id}")
-
-        logger.info(f"Fetching full CV text for ID: {cv_id}")
-        full_cv_text = await get_full_document_text_from_db(cv_id, CV_COLLECTION_NAME())
         if not full_cv_text:
             logger.error(f"Could not retrieve full CV text for ID: {cv_id}. Cannot generate questions.")
             raise HTTPException(status_code=404, detail=f"CV text not found for ID: {cv_id}")
         
         logger.info(f"Calling core_generate_questions for CV ID: {cv_id}")
-        candidate_questions_output = await core_generate_questions(
-            jd_text=full_jd_text,
-            cv_text=full_cv_text,
-            candidate_name_or_id=cv_id
+        candidate_questions_output = await questions_cache.get_or_compute(
+            ("generate_questions", jd_id, cv_id),
+            lambda: core_generate_questions(
+                jd_text=full_jd_text,
+                cv_text=full_cv_text,
+                candidate_name_or_id=cv_id
+            ),
+            doc_ids=[jd_id, cv_id],
+            should_cache=lambda output: bool(output and (output.technical_questions or output.general_behavioral_questions))
         )
 
         if not candidate_questions_output or (not candidate_questions_output.technical_questions and not candidate_questions_output.general_behavioral_questions):
             logger.warning(f"core_generate_questions returned no questions for CV ID: {cv_id}.")
-            return QuestionGenerationResponse(technical_questions=[], general_behavioral_questions=[])
-        
-        api_technical_questions = []
-        if candidate_questions_output.technical_questions:
-            for q_item in candidate_questions_output.technical_questions:
-                api_technical_questions.append(Question(
-                    question=q_item.question,
-                    category=q_item.category,
-                    good_answer_pointers=q_item.good_answer_pointers,
-                    unsure_answer_pointers=q_item.unsure_answer_pointers,
-                    rationale=None 
-                ))
-        
-        api_general_questions = []
-        if candidate_questions_output.general_behavioral_questions:
-            for q_item in candidate_questions_output.general_behavioral_questions:
-                api_general_questions.append(Question(
-                    question=q_item.question,
-                    category=q_item.category,
-                    good_answer_pointers=q_item.good_answer_pointers,
-                    unsure_answer_pointers=q_item.unsure_answer_pointers,
-                    rationale=None 
-                ))
+            return QuestionGenerationResponse(cv_id=cv_id, jd_id=jd_id, technical_questions=[], general_behavioral_questions=[])
+        
+        # Question output comes from our own validated LLM schema, so skip per-item validation
+        api_technical_questions = [
+            Question.model_construct(
+                question=q_item.question,
+                category=q_item.category,
+                good_answer_pointers=q_item.good_answer_pointers,
+                unsure_answer_pointers=q_item.unsure_answer_pointers
+            )
+            for q_item in candidate_questions_output.technical_questions or []
+        ]
+        api_general_questions = [
+            Question.model_construct(
+                question=q_item.question,
+                category=q_item.category,
+                good_answer_pointers=q_item.good_answer_pointers,
+                unsure_answer_pointers=q_item.unsure_answer_pointers
+            )
+            for q_item in candidate_questions_output.general_behavioral_questions or []
+        ]
         
         logger.info(f"Successfully processed questions for CV ID: {cv_id}. Technical: {len(api_technical_questions)}, General: {len(api_general_questions)}.")
         return QuestionGenerationResponse(
@@ -671,7 +786,8 @@ async def generate_questions(request: QuestionGenerationRequest):
         logger.error(f"HTTPException in generate_questions for JD ID {request.jd_id}, CV ID {request.cv_id}: {http_exc.detail}")
         raise http_exc
     except Exception as e:
-        logger.error(f"Unexpected error in generate_questions for JD ID {request.jd_id}, CV ID {request.cv_id}: {str(e)}", exc_info=True)
+        logger.error(f"Unexpected error in generate_questions for JD ID {request.jd_id}, CV ID {request.cv_id}: {type(e).__name__}: {str(e)}")
+        logger.debug("Traceback for generate_questions error", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Unexpected error generating questions: {str(e)}")
 
 @app.post("/keyword_generation", response_model=JDKeywordsResponse, operation_id="keyword_generation")
@@ -710,7 +826,8 @@ async def keyword_generation(request: JDKeywordsRequest):
         logger.error(f"HTTPException in keyword_generation for JD ID {request.jd_id if request else 'unknown'}: {http_exc.detail}")
         raise http_exc
     except Exception as e:
-        logger.error(f"Unexpected error in keyword_generation for JD ID {request.jd_id if request else 'unknown'}: {str(e)}", exc_info=True)
+        logger.error(f"Unexpected error in keyword_generation for JD ID {request.jd_id if request else 'unknown'}: {type(e).__name__}: {str(e)}")
+        logger.debug("Traceback for keyword_generation error", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Unexpected error generating keywords: {str(e)}")
 
 wiserecruit = FastApiMCP(app, include_operations=["s3_upload_jd", "s3_upload_cv", "upload_jd", "upload_cvs", "rank_cvs", "generate_questions", "keyword_generation"])
@@ -0,0 +1,95 @@
+"""
+Append-only JSONL checkpointing of LLM results for Smart Recruit.
+
+When LLM_CHECKPOINT_PATH is set, every successful parse is appended to that file
+keyed by its request hash. A bulk upload that is interrupted and re-run then
+reuses the results already on disk instead of calling the LLM again for each CV.
+Checkpointing is off when the variable is unset.
+"""
+
+import asyncio
+import os
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import orjson
+
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+LLM_CHECKPOINT_PATH: Optional[Path] = Path(os.environ["LLM_CHECKPOINT_PATH"]) if os.getenv("LLM_CHECKPOINT_PATH") else None
+
+# Loaded checkpoint files: path -> {key: result}
+_checkpoint_indexes: Dict[Path, Dict[str, Any]] = {}
+_checkpoint_lock = asyncio.Lock()
+
+def _load_checkpoint_file(path: Path) -> Dict[str, Any]:
+    """
+    Read a checkpoint file into a key -> result dict, skipping corrupt lines.
+
+    Args:
+        path: Path of the JSONL checkpoint file
+
+    Returns:
+        Dictionary of checkpointed results
+    """
+    index: Dict[str, Any] = {}
+    if not path.exists():
+        return index
+    with path.open("rb") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = orjson.loads(line)
+                index[record["key"]] = record["result"]
+            except (orjson.JSONDecodeError, KeyError, TypeError):
+                # A crash mid-write can leave a truncated last line
+                logger.warning(f"Skipping unreadable checkpoint line {line_number} in {path}")
+    logger.info(f"Loaded {len(index)} checkpointed LLM result(s) from {path}")
+    return index
+
+def _append_checkpoint_line(path: Path, line: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("ab") as f:
+        f.write(line)
+
+async def with_checkpoint(key: str,
+                          path: Optional[Path],
+                          coro_factory: Callable[[], Awaitable[Any]],
+                          should_store: Callable[[Any], bool] = lambda value: value is not None) -> Any:
+    """
+    Return the checkpointed result for key, or compute it and append it to the checkpoint file.
+
+    Args:
+        key: Stable hash identifying the LLM request
+        path: JSONL checkpoint file; when None the call is not checkpointed
+        coro_factory: Zero-argument coroutine function performing the LLM call
+        should_store: Predicate on the result deciding whether it is checkpointed
+
+    Returns:
+        The checkpointed or freshly computed result
+    """
+    if path is None:
+        return await coro_factory()
+
+    async with _checkpoint_lock:
+        index = _checkpoint_indexes.get(path)
+        if index is None:
+            index = await asyncio.to_thread(_load_checkpoint_file, path)
+            _checkpoint_indexes[path] = index
+    if key in index:
+        logger.info(f"Reusing checkpointed LLM result for key {key[:12]}")
+        return index[key]
+
+    result = await coro_factory()
+    if should_store(result):
+        line = orjson.dumps({"key": key, "result": result}) + b"\n"
+        async with _checkpoint_lock:
+            index[key] = result
+            try:
+                await asyncio.to_thread(_append_checkpoint_line, path, line)
+            except OSError as e:
+                logger.error(f"Failed to write LLM checkpoint to {path}: {str(e)}")
+    return result
@@ -1,16 +1,39 @@
 """
 LLM document chunking functionality
 """
-import json
-from typing import List, Dict, Union, Optional
-import litellm
+import logging
+from typing import Any, List, Dict, Mapping, Union, Optional
+import re
+import orjson
 import unicodedata
 from src.utils.logging import get_logger
-from src.llm.llmclient import get_litellm_params
-from src.llm.utils import load_prompt
+from src.llm.llmclient import bounded_acompletion, build_cacheable_messages, get_litellm_params, log_prompt_cache_usage
+from src.llm.provider_files import build_document_content_block
+from src.llm.utils import choose_document_content, load_prompt, strip_code_fence
+from src.llm.response_cache import CHUNK_RESPONSE_CACHE, get_or_set, make_response_cache_key
 
 logger = get_logger(__name__)
 
+# str.translate table deleting every BMP code point in a Unicode 'Control' category (Cc, Cf, Cs, Co, Cn)
+_CONTROL_TRANSLATE = {cp: None for cp in range(0x10000) if unicodedata.category(chr(cp))[0] == "C"}
+# Astral characters are rare in LLM output; they are checked individually
+_ASTRAL_RE = re.compile("[\U00010000-\U0010FFFF]")
+
+def _strip_control_characters(text: str) -> str:
+    """
+    Remove characters from all Unicode 'Control' categories in a single C-level pass.
+    
+    Args:
+        text: Text to sanitize
+        
+    Returns:
+        Text without control, format, surrogate, private-use or unassigned characters
+    """
+    text = text.translate(_CONTROL_TRANSLATE)
+    if text.isascii():
+        return text
+    return _ASTRAL_RE.sub(lambda m: "" if unicodedata.category(m.group())[0] == "C" else m.group(), text)
+
 async def chunk_document_with_llm(prompt_file: str, 
                                 base64_content: Optional[str] = None, 
                                 raw_text_content: Optional[str] = None, 
@@ -29,57 +52,78 @@ async def chunk_document_with_llm(prompt_file: str,
     """
     logger.info(f"Starting LLM chunking for document with prompt: {prompt_file}")
 
+    base64_content, raw_text_content = choose_document_content(base64_content, raw_text_content)
     if not base64_content and not raw_text_content:
         logger.error("Error: Either base64_content or raw_text_content must be provided to chunk_document_with_llm.")
         return None
-    if base64_content and raw_text_content:
-        logger.warning("Warning: Both base64_content and raw_text_content provided to chunk_document_with_llm. Prioritizing raw_text_content.")
-        base64_content = None # Prioritize raw text
 
+    params = get_litellm_params()
+    # Ensure the model being used is multimodal if base64_content is used,
+    # or a good text model if raw_text_content is used.
+    # Current get_litellm_params() should provide a model capable of handling both.
+    cache_key = make_response_cache_key(prompt_file, params, raw_text_content or base64_content,
+                                        None if raw_text_content else content_type)
+    # Re-uploads of the same document reuse the earlier chunking
+    return await get_or_set(
+        CHUNK_RESPONSE_CACHE,
+        cache_key,
+        lambda: _call_llm_for_chunks(prompt_file, params, base64_content, raw_text_content, content_type)
+    )
+
+async def _call_llm_for_chunks(prompt_file: str,
+                               params: Mapping[str, Any],
+                               base64_content: Optional[str],
+                               raw_text_content: Optional[str],
+                               content_type: str) -> Optional[List[Dict[str, Union[str, int, None]]]]:
+    """
+    Call the LLM for chunk_document_with_llm and validate the chunks. Uncached.
+
+    Args:
+        prompt_file: Path to the prompt template file
+        params: LiteLLM parameters from get_litellm_params
+        base64_content: Base64-encoded content of the document, if no raw text
+        raw_text_content: Plain text content of the document
+        content_type: MIME type of the document
+
+    Returns:
+        List of chunk dictionaries or None if chunking fails
+    """
     chunking_prompt_text = load_prompt(prompt_file)
     
-    user_content_list = [{"type": "text", "text": chunking_prompt_text}]
+    user_content_list = []
 
     if raw_text_content:
-        logger.info("Processing document for chunking with raw_text_content.")
+        logger.debug("Processing document for chunking with raw_text_content.")
         user_content_list.append({"type": "text", "text": raw_text_content})
     elif base64_content:
-        logger.info(f"Processing document for chunking with base64_content, content_type: {content_type}.")
-        user_content_list.append({
-            "type": "image_url",
-            "image_url": {"url": f"data:{content_type};base64,{base64_content}"}
-        })
+        logger.debug(f"Processing document for chunking with base64_content, content_type: {content_type}.")
+        user_content_list.append(await build_document_content_block(base64_content, content_type, params))
 
-    messages = [{"role": "user", "content": user_content_list}]
-
-    params = get_litellm_params()
-    # Ensure the model being used is multimodal if base64_content is used,
-    # or a good text model if raw_text_content is used.
-    # Current get_litellm_params() should provide a model capable of handling both.
+    messages = build_cacheable_messages(chunking_prompt_text, user_content_list, params)
 
+    response_content: Optional[str] = None
     try:
         logger.info(f"Calling LLM for chunking. Model: {params.get('model')}")
-        response = await litellm.acompletion(
+        response = await bounded_acompletion(
             **params,
             messages=messages,
             response_format={"type": "json_object"}
         )
+        log_prompt_cache_usage(response, f"chunking with {prompt_file}")
         response_content = response.choices[0].message.content
         logger.info(f"Multimodal chunking raw LLM response for prompt {prompt_file}: {response_content}")
 
-        if response_content.startswith("```json"):
-            response_content = response_content.split("```json")[1].split("```")[0].strip()
-        elif response_content.startswith("```") and response_content.endswith("```"):
-            response_content = response_content.strip("`\n ")
+        response_content = strip_code_fence(response_content)
         
         # Sanitize the response_content to remove problematic control characters
         # This removes characters from all Unicode 'Control' categories (Cc, Cf, Cs, Co, Cn)
-        response_content = "".join(ch for ch in response_content if unicodedata.category(ch)[0] != "C")
+        response_content = _strip_control_characters(response_content)
         
         logger.info(f"Multimodal chunking raw LLM response (sanitized): {response_content[:500]}...")
 
-        parsed_json = json.loads(response_content)
-        logger.info(f"Multimodal chunking parsed JSON for prompt {prompt_file}: {parsed_json}")
+        parsed_json = orjson.loads(response_content)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Multimodal chunking parsed JSON for prompt {prompt_file}: {parsed_json}")
 
         if not parsed_json:
             logger.warning("Warning: Multimodal LLM returned empty JSON for chunking.")
@@ -87,11 +131,14 @@ async def chunk_document_with_llm(prompt_file: str,
 
         # As per new llm_chunking_prompt.md, keys are like 'chunk-1', 'chunk-2'
         # and each maps to an object {"og_content": "...", "enriched_content": "..."}
-        sorted_chunk_keys = sorted(parsed_json.keys(), key=lambda x: int(x.split('-')[-1]))
+        # orjson preserves the model's key order, which is almost always already chunk-1, chunk-2, ...
+        chunk_items = list(parsed_json.items())
+        chunk_numbers = [int(key.rsplit('-', 1)[-1]) for key, _ in chunk_items]
+        if any(later < earlier for earlier, later in zip(chunk_numbers, chunk_numbers[1:])):
+            chunk_items = [item for _, item in sorted(zip(chunk_numbers, chunk_items), key=lambda pair: pair[0])]
         
         processed_chunks = []
-        for key in sorted_chunk_keys:
-            chunk_object = parsed_json.get(key)
+        for key, chunk_object in chunk_items:
             chunk_data_to_add = {}
 
             if (isinstance(chunk_object, dict) and
@@ -122,13 +169,13 @@ async def chunk_document_with_llm(prompt_file: str,
         logger.info(f"Multimodal chunking successful. Number of chunk objects: {len(processed_chunks)}")
         return processed_chunks
 
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         logger.error(f"Error decoding LLM JSON response for multimodal chunking: {e}")
         logger.error(f"Raw response: {response_content[:500]}...")
         return None
     except Exception as e:
         logger.error(f"Error during multimodal LLM chunking: {type(e).__name__} - {e}")
-        raw_content_info = locals().get('response_content', "No content available during multimodal chunking error")
+        raw_content_info = response_content or "No content available during multimodal chunking error"
         if hasattr(e, 'response') and hasattr(e.response, 'text'):
             raw_content_info = e.response.text
         logger.error(f"Raw response snapshot: {str(raw_content_info)[:500]}...")
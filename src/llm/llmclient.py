@@ -1,8 +1,13 @@
 """
 LLM client configuration and management
 """
+import asyncio
+import functools
 import os
-from typing import Dict, Optional, Any
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Any, Union
+import httpx
+import litellm
 from dotenv import load_dotenv
 from src.utils.logging import get_logger
 
@@ -11,6 +16,20 @@ logger = get_logger(__name__)
 # Load environment variables
 load_dotenv()
 
+# Upper bound on concurrent LLM requests across the whole process, so callers can
+# gather() per-document calls freely without overwhelming the provider's rate limits
+LLM_MAX_INFLIGHT = int(os.getenv("LLM_MAX_INFLIGHT", "32"))
+_llm_semaphore = asyncio.Semaphore(LLM_MAX_INFLIGHT)
+
+# One pooled HTTP client for every LLM request in the process, so concurrent calls reuse
+# open connections instead of each paying for its own TCP and TLS handshake
+LLM_HTTP_TIMEOUT_SECONDS = float(os.getenv("LLM_HTTP_TIMEOUT_SECONDS", "600"))
+litellm.aclient_session = httpx.AsyncClient(
+    limits=httpx.Limits(max_connections=2 * LLM_MAX_INFLIGHT, max_keepalive_connections=LLM_MAX_INFLIGHT),
+    http2=True,
+    timeout=httpx.Timeout(LLM_HTTP_TIMEOUT_SECONDS),
+)
+
 # Model configurations
 MODEL_CONFIGS = {
     "gemini_flash_multimodal": {
@@ -31,15 +50,17 @@ MODEL_CONFIGS = {
     # Add other model configurations here
 }
 
-def get_litellm_params(model_alias: str = "gemini_flash_multimodal") -> Dict[str, Any]:
+@functools.lru_cache(maxsize=8)
+def get_litellm_params(model_alias: str = "gemini_flash_multimodal") -> Mapping[str, Any]:
     """
     Get LiteLLM parameters for the specified model.
+    Built once per alias; API keys are read from the environment on first use.
     
     Args:
         model_alias: Alias of the model configuration to use
         
     Returns:
-        Dictionary of parameters for LiteLLM
+        Read-only mapping of parameters for LiteLLM (copy it to add call-specific options)
         
     Raises:
         ValueError: If the model alias is not found in the configuration
@@ -61,9 +82,11 @@ def get_litellm_params(model_alias: str = "gemini_flash_multimodal") -> Dict[str
     if "max_tokens" in config:
         params["max_tokens"] = config["max_tokens"]
     # ... and so on for other LiteLLM parameters
+    if config["model_name"].startswith("anthropic/"):
+        params["extra_headers"] = {"anthropic-beta": "prompt-caching-2024-07-31"}
     
     logger.info(f"Using LLM model: {config['model_name']}")
-    return params
+    return MappingProxyType(params)
 
 def get_api_key_for_model(model_alias: str) -> Optional[str]:
     """
@@ -78,4 +101,86 @@ def get_api_key_for_model(model_alias: str) -> Optional[str]:
     config = MODEL_CONFIGS.get(model_alias)
     if config and config.get("api_key_env"):
         return os.getenv(config["api_key_env"])
-    return None 
\ No newline at end of file
+    return None
+
+def build_prompt_block(prompt_text: str, params: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    Build the leading message content block holding a static prompt template.
+
+    The template must come before the document so providers can serve it from
+    their prompt-prefix cache. Gemini and OpenAI cache prefixes implicitly;
+    Anthropic needs an explicit cache_control marker.
+    
+    Args:
+        prompt_text: Prompt template text
+        params: LiteLLM parameters from get_litellm_params
+        
+    Returns:
+        Content block for a user message
+    """
+    block = {"type": "text", "text": prompt_text}
+    if params.get("model", "").startswith("anthropic/"):
+        block["cache_control"] = {"type": "ephemeral"}
+    return block
+
+def build_cacheable_messages(static_prompt: str,
+                             user_content: Union[str, List[Dict[str, Any]]],
+                             params: Mapping[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Build a chat message list with the static instructions in a leading system message
+    and the per-request content (JD, CV, candidate) in the user message.
+
+    Keeping the system message byte-identical across requests lets providers reuse
+    the cached prefix instead of re-processing the instructions every call.
+    
+    Args:
+        static_prompt: Prompt template text that does not vary between requests
+        user_content: Per-request text or content blocks
+        params: LiteLLM parameters from get_litellm_params
+        
+    Returns:
+        Messages for litellm.acompletion
+    """
+    return [
+        {"role": "system", "content": [build_prompt_block(static_prompt, params)]},
+        {"role": "user", "content": user_content},
+    ]
+
+def log_prompt_cache_usage(response: Any, label: str) -> None:
+    """
+    Log how many input tokens were read from the provider's prompt cache.
+    
+    Args:
+        response: LiteLLM completion response
+        label: Short description of the call for the log line
+    """
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    cached_tokens = getattr(usage, "cache_read_input_tokens", None)
+    if cached_tokens is None:
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", None)
+    logger.info(f"Prompt cache usage for {label}: {cached_tokens or 0}/{getattr(usage, 'prompt_tokens', 0)} input tokens cached")
+
+async def bounded_acompletion(**kwargs: Any) -> Any:
+    """
+    Call litellm.acompletion while holding a slot of the shared LLM concurrency limit.
+    
+    Args:
+        **kwargs: Arguments forwarded to litellm.acompletion
+        
+    Returns:
+        The LiteLLM completion response
+    """
+    async with _llm_semaphore:
+        return await litellm.acompletion(**kwargs)
+
+async def close_llm_clients() -> None:
+    """
+    Close the shared LLM HTTP client.
+    Call once on application shutdown.
+    """
+    if litellm.aclient_session is not None:
+        await litellm.aclient_session.aclose()
+        litellm.aclient_session = None
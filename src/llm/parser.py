@@ -1,14 +1,15 @@
 """
 LLM document parsing functionality
 """
-import json
-from typing import Dict, Union, Type, Optional
-import litellm
+from typing import Any, Dict, Mapping, Union, Type, Optional
+from pydantic import ValidationError
 from src.schemas.schemas import JDOutput, CVOutput
 from src.utils.logging import get_logger
-from src.llm.llmclient import get_litellm_params
-from src.llm.utils import load_prompt
-import traceback
+from src.llm.llmclient import bounded_acompletion, build_cacheable_messages, get_litellm_params, log_prompt_cache_usage
+from src.llm.provider_files import build_document_content_block
+from src.llm.utils import choose_document_content, load_prompt, strip_code_fence
+from src.llm.checkpoint import LLM_CHECKPOINT_PATH, with_checkpoint
+from src.llm.response_cache import PARSE_RESPONSE_CACHE, get_or_set, make_response_cache_key
 
 logger = get_logger(__name__)
 
@@ -32,41 +33,75 @@ async def parse_document(prompt_file: str,
     """
     logger.info(f"Starting LLM parsing for document with prompt: {prompt_file}")
     
+    base64_content, raw_text_content = choose_document_content(base64_content, raw_text_content)
     if not base64_content and not raw_text_content:
         logger.error("Error: Either base64_content or raw_text_content must be provided to parse_document.")
         return {"error": "No content provided to LLM."}
-    if base64_content and raw_text_content:
-        logger.warning("Warning: Both base64_content and raw_text_content provided to parse_document. Prioritizing raw_text_content.")
-        base64_content = None # Prioritize raw text if both are somehow passed
 
+    params = get_litellm_params()
+    cache_key = make_response_cache_key(prompt_file, params, raw_text_content or base64_content,
+                                        None if raw_text_content else content_type)
+    is_success = lambda result: "error" not in result
+    # Identical documents parsed with the same prompt and model reuse the earlier validated result,
+    # first from memory, then from the on-disk checkpoint of an interrupted bulk run (if enabled)
+    return await get_or_set(
+        PARSE_RESPONSE_CACHE,
+        cache_key,
+        lambda: with_checkpoint(
+            cache_key,
+            LLM_CHECKPOINT_PATH,
+            lambda: _call_llm_and_validate(prompt_file, output_schema_class, params,
+                                           base64_content, raw_text_content, content_type),
+            should_store=is_success
+        ),
+        should_cache=is_success
+    )
+
+async def _call_llm_and_validate(prompt_file: str,
+                                 output_schema_class: Type[Union[JDOutput, CVOutput]],
+                                 params: Mapping[str, Any],
+                                 base64_content: Optional[str],
+                                 raw_text_content: Optional[str],
+                                 content_type: str) -> Dict:
+    """
+    Call the LLM for parse_document and validate its output. Uncached.
+
+    Args:
+        prompt_file: Path to the prompt template file
+        output_schema_class: Pydantic model class for validating and structuring the output
+        params: LiteLLM parameters from get_litellm_params
+        base64_content: Base64-encoded content of the document, if no raw text
+        raw_text_content: Plain text content of the document
+        content_type: MIME type of the document
+
+    Returns:
+        Dict containing the parsed document data or error information
+    """
     text_prompt = load_prompt(prompt_file)
     
-    user_content_list = [{"type": "text", "text": text_prompt}]
+    user_content_list = []
 
     if raw_text_content:
-        logger.info("Processing document with raw_text_content.")
+        logger.debug("Processing document with raw_text_content.")
         user_content_list.append({"type": "text", "text": raw_text_content})
     elif base64_content:
-        logger.info(f"Processing document with base64_content, content_type: {content_type}.")
-        user_content_list.append({
-            "type": "image_url", 
-            "image_url": {"url": f"data:{content_type};base64,{base64_content}"}
-        })
+        logger.debug(f"Processing document with base64_content, content_type: {content_type}.")
+        user_content_list.append(await build_document_content_block(base64_content, content_type, params))
         
-    messages = [{"role": "user", "content": user_content_list}]
-    
-    params = get_litellm_params()
+    messages = build_cacheable_messages(text_prompt, user_content_list, params)
     
+    content: Optional[str] = None
     try:
         # Log the parameters being used (except for the content which could be large)
         param_log = {k: v for k, v in params.items() if k != 'api_key'}
         logger.info(f"Calling LLM with params: {param_log}")
         
-        response = await litellm.acompletion(
+        response = await bounded_acompletion(
             **params,
             messages=messages,
             response_format={"type": "json_object"}
         )
+        log_prompt_cache_usage(response, f"parse with {prompt_file}")
         
         # Check if response is None or empty
         if not response or not response.choices:
@@ -85,71 +120,60 @@ async def parse_document(prompt_file: str,
         logger.info(f"Raw LLM response received: {truncated_content}...")
         
         # Handle various JSON formatting issues
-        if content.startswith("```json"):
-            content = content.split("```json")[1].split("```")[0].strip()
-            logger.info("Extracted JSON from markdown code block")
-        elif content.startswith("```") and "```" in content[3:]:
-            content = content.split("```", 2)[1]
-            if content.startswith("json"):
-                content = content[4:].strip()
-            logger.info("Extracted content from generic code block")
+        content = strip_code_fence(content)
         
         # Check if the content is empty after cleaning
         if not content.strip():
             logger.error("LLM returned empty JSON content after cleanup")
             return {"error": "LLM returned empty content", "raw_response": response.choices[0].message.content}
             
+        # Validate against schema straight from the JSON text (parse + validation in one pydantic-core pass)
         try:
-            parsed_output = json.loads(content)
-            logger.info("Successfully parsed JSON response")
-            
-            # Check if the parsed output is empty or missing key fields
-            if not parsed_output:
-                logger.error("Parsed JSON is empty")
-                return {"error": "Parsed JSON is empty", "raw_response": content}
-            
-            # Validate against schema
-            try:
-                validated_data = output_schema_class(**parsed_output).dict()
-                
-                # Check if the validated data is meaningful (e.g., has candidate name or skills)
-                if output_schema_class == CVOutput:
-                    if not validated_data.get('candidate_name') and not validated_data.get('skills'):
-                        logger.warning("Parsed CV data appears to be missing essential fields")
-                
-                logger.info("LLM parsing completed successfully with valid schema")
-                return validated_data
-            except Exception as schema_error:
-                logger.error(f"Schema validation failed: {str(schema_error)}")
-                logger.error(f"Schema validation traceback: {traceback.format_exc()}")
-                return {"error": f"Schema validation failed: {str(schema_error)}", "raw_response": content}
-                
-        except json.JSONDecodeError as json_error:
+            validated_model = output_schema_class.model_validate_json(content)
+        except ValidationError as validation_error:
+            if not any(error["type"] == "json_invalid" for error in validation_error.errors()):
+                logger.error(f"Schema validation failed: {str(validation_error)}")
+                logger.debug("Schema validation traceback", exc_info=True)
+                return {"error": f"Schema validation failed: {str(validation_error)}", "raw_response": content}
+
             # Try a more lenient approach - find anything that looks like JSON
-            logger.warning(f"Initial JSON parsing failed: {str(json_error)}. Attempting more lenient parsing.")
+            logger.warning(f"Initial JSON parsing failed: {str(validation_error)}. Attempting more lenient parsing.")
             try:
                 # Look for content between curly braces
                 if '{' in content and '}' in content:
                     json_start = content.find('{')
                     json_end = content.rfind('}') + 1
                     json_content = content[json_start:json_end]
-                    parsed_output = json.loads(json_content)
-                    logger.info("Successfully parsed JSON with lenient method")
-                    validated_data = output_schema_class(**parsed_output).dict()
+                    validated_data = output_schema_class.model_validate_json(json_content).model_dump()
                     logger.info("LLM parsing completed successfully with lenient parsing")
                     return validated_data
             except Exception as lenient_error:
                 logger.error(f"Lenient JSON parsing also failed: {str(lenient_error)}")
                 
             # If we reach here, both parsing attempts failed
-            logger.error(f"Failed to parse LLM response as JSON. Original error: {str(json_error)}")
-            return {"error": f"Failed to parse LLM response as JSON: {str(json_error)}", 
+            logger.error(f"Failed to parse LLM response as JSON. Original error: {str(validation_error)}")
+            return {"error": f"Failed to parse LLM response as JSON: {str(validation_error)}", 
                     "raw_response": content}
 
+        # An empty JSON object sets no fields
+        if not validated_model.model_fields_set:
+            logger.error("Parsed JSON is empty")
+            return {"error": "Parsed JSON is empty", "raw_response": content}
+
+        validated_data = validated_model.model_dump()
+        
+        # Check if the validated data is meaningful (e.g., has candidate name or skills)
+        if output_schema_class == CVOutput:
+            if not validated_data.get('candidate_name') and not validated_data.get('skills'):
+                logger.warning("Parsed CV data appears to be missing essential fields")
+        
+        logger.info("LLM parsing completed successfully with valid schema")
+        return validated_data
+
     except Exception as e:
-        logger.error(f"LLM API call failed: {str(e)}")
-        logger.error(f"Full traceback: {traceback.format_exc()}")
-        raw_content_info = locals().get('content', "No content available")
+        logger.error(f"LLM API call failed: {type(e).__name__}: {str(e)}")
+        logger.debug("LLM API call traceback", exc_info=True)
+        raw_content_info = content or "No content available"
         if hasattr(e, 'response') and hasattr(e.response, 'text'):
             raw_content_info = e.response.text
         return {"error": f"LLM API call failed: {str(e)}", "raw_response": raw_content_info} 
\ No newline at end of file
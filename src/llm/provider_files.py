@@ -0,0 +1,78 @@
+"""
+Provider File API uploads for large documents.
+
+Large PDFs sent inline are carried as base64 in the message list and again in the
+serialized request body on every call. For Gemini models, documents above a size
+threshold are uploaded once through the provider's File API and referenced by ID,
+so parse and chunk requests for the same CV send only the reference.
+"""
+
+import asyncio
+import base64
+import hashlib
+import os
+from typing import Any, Dict, Mapping
+
+import litellm
+
+from src.llm.utils import build_document_block
+from src.utils.cache import AsyncTTLCache
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Size of the base64 string above which documents are uploaded instead of inlined
+FILE_UPLOAD_THRESHOLD_CHARS = int(os.getenv("LLM_FILE_UPLOAD_THRESHOLD_CHARS", str(1_000_000)))
+
+# Gemini deletes uploaded files after 48 hours; keep references a little shorter
+_uploaded_file_ids = AsyncTTLCache("llm_uploaded_files", maxsize=256, ttl_seconds=47 * 3600)
+
+async def _upload_document(base64_content: str, content_type: str, params: Mapping[str, Any]) -> str:
+    """
+    Upload a base64-encoded document to the provider's File API.
+
+    Args:
+        base64_content: Base64-encoded content of the document
+        content_type: MIME type of the document
+        params: LiteLLM parameters from get_litellm_params
+
+    Returns:
+        Provider file ID to reference in messages
+    """
+    file_bytes = await asyncio.to_thread(base64.b64decode, base64_content)
+    created = await litellm.acreate_file(
+        file=("document", file_bytes, content_type),
+        purpose="user_data",
+        custom_llm_provider="gemini",
+        api_key=params.get("api_key"),
+    )
+    logger.info(f"Uploaded {len(file_bytes)} byte document to provider File API as {created.id}")
+    return created.id
+
+async def build_document_content_block(base64_content: str,
+                                       content_type: str,
+                                       params: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    Build the message content block for a base64 document, uploading it to the
+    provider's File API first if it is large and the model supports it.
+    Falls back to an inline data URL if the upload fails.
+
+    Args:
+        base64_content: Base64-encoded content of the document
+        content_type: MIME type of the document
+        params: LiteLLM parameters from get_litellm_params
+
+    Returns:
+        Content block for a user message
+    """
+    if params["model"].startswith("gemini/") and len(base64_content) > FILE_UPLOAD_THRESHOLD_CHARS:
+        content_hash = hashlib.sha256(base64_content.encode("ascii")).hexdigest()
+        try:
+            file_id = await _uploaded_file_ids.get_or_compute(
+                content_hash,
+                lambda: _upload_document(base64_content, content_type, params)
+            )
+            return {"type": "file", "file": {"file_id": file_id, "format": content_type}}
+        except Exception as e:
+            logger.warning(f"File API upload failed, sending document inline instead: {type(e).__name__}: {str(e)}")
+    return build_document_block(base64_content, content_type, params["model"])
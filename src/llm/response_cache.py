@@ -0,0 +1,72 @@
+"""
+Exact-match caching of LLM responses for Smart Recruit.
+
+Re-uploading the same JD or CV sends byte-identical prompts to the provider.
+Results are keyed on a hash of the prompt file and its content, model settings
+and document content, so a duplicate upload skips the LLM round-trip entirely.
+Editing a prompt (or changing the model) naturally invalidates old entries.
+"""
+
+import hashlib
+from typing import Any, Awaitable, Callable, Mapping, Optional, Tuple
+
+import orjson
+
+from src.llm.utils import load_prompt_digest
+from src.utils.cache import AsyncTTLCache
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Validated parse_document outputs (structured JD/CV data)
+PARSE_RESPONSE_CACHE = AsyncTTLCache("llm_parse_responses", maxsize=1024, ttl_seconds=24 * 3600)
+# chunk_document_with_llm outputs
+CHUNK_RESPONSE_CACHE = AsyncTTLCache("llm_chunk_responses", maxsize=512, ttl_seconds=3600)
+# get_llm_comparison_for_cv outputs, keyed on JD text + CV text
+RANKING_RESPONSE_CACHE = AsyncTTLCache("llm_ranking_responses", maxsize=2048, ttl_seconds=24 * 3600)
+
+def make_response_cache_key(prompt_file: str,
+                            params: Mapping[str, Any],
+                            content: str,
+                            content_type: Optional[str] = None) -> str:
+    """
+    Build the cache key for an LLM call over a single document.
+
+    Args:
+        prompt_file: Path to the prompt template file; its content digest is part of the key
+        params: LiteLLM parameters; only model and temperature are part of the key
+        content: Raw text or base64 content of the document
+        content_type: MIME type of base64 content, if any
+
+    Returns:
+        Hex SHA-256 digest identifying the request
+    """
+    prefix = f"{prompt_file}|{load_prompt_digest(prompt_file)}|{params.get('model')}|{params.get('temperature')}|{content_type or ''}|"
+    return hashlib.sha256(prefix.encode() + content.encode()).hexdigest()
+
+async def get_or_set(cache: AsyncTTLCache,
+                     key: str,
+                     coro_factory: Callable[[], Awaitable[Any]],
+                     should_cache: Callable[[Any], bool] = lambda value: value is not None) -> Any:
+    """
+    Return the cached LLM result for key, calling coro_factory on a miss.
+
+    Results are stored as orjson bytes, so every caller gets its own copy and
+    cannot mutate the cached value. Concurrent identical requests share one call.
+
+    Args:
+        cache: Cache to use (PARSE_RESPONSE_CACHE, CHUNK_RESPONSE_CACHE or RANKING_RESPONSE_CACHE)
+        key: Key from make_response_cache_key
+        coro_factory: Zero-argument coroutine function performing the LLM call
+        should_cache: Predicate on the result deciding whether it is stored
+
+    Returns:
+        The cached or freshly computed result
+    """
+    async def compute() -> Tuple[bool, bytes]:
+        result = await coro_factory()
+        return should_cache(result), orjson.dumps(result)
+
+    # Failed calls are handed back to every waiting caller but never stored
+    _, serialized = await cache.get_or_compute(key, compute, should_cache=lambda value: value[0])
+    return orjson.loads(serialized)
@@ -1,14 +1,28 @@
 """
 Utility functions for LLM operations
 """
+import functools
+import hashlib
 import os
+import re
+from typing import Any, Dict, List, Mapping, Optional, Tuple
 from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# {{PLACEHOLDER}} markers in prompt templates
+_PLACEHOLDER_RE = re.compile(r"\{\{([A-Z_]+)\}\}")
+
+# Markdown code fence around a model's JSON answer: ```json ... ``` or ``` ... ```
+_FENCE_RE = re.compile(r"^```(?:json)?\s*(.*?)\s*```", re.DOTALL)
+_PARAGRAPH_BREAK_RE = re.compile(r"\n\s*\n")
+
+@functools.lru_cache(maxsize=64)
 def load_prompt(file_path: str) -> str:
     """
     Load a prompt template from a file.
+    Prompts are static deployment files, so each path is read once per process;
+    call load_prompt.cache_clear() and load_prompt_digest.cache_clear() to pick up edits during development.
     
     Args:
         file_path: Path to the prompt template file
@@ -49,4 +63,133 @@ def load_prompt(file_path: str) -> str:
     
     # If all attempts fail, raise FileNotFoundError
     logger.error(f"Prompt file not found: {file_path}")
-    raise FileNotFoundError(f"Prompt file not found: {file_path}") 
\ No newline at end of file
+    raise FileNotFoundError(f"Prompt file not found: {file_path}")
+
+@functools.lru_cache(maxsize=64)
+def load_prompt_digest(file_path: str) -> str:
+    """
+    SHA-256 of a prompt template's UTF-8 bytes, encoded once per process.
+    Used in response cache keys so editing a prompt invalidates cached results.
+    
+    Args:
+        file_path: Path to the prompt template file
+        
+    Returns:
+        Hex digest of the prompt content
+    """
+    return hashlib.sha256(load_prompt(file_path).encode("utf-8")).hexdigest()
+
+def fill_prompt(template: str, values: Mapping[str, str]) -> str:
+    """
+    Substitute {{NAME}} placeholders in a prompt template in a single pass.
+    Unknown placeholders are left untouched, and placeholder-like text inside
+    the substituted values is never expanded.
+    
+    Args:
+        template: Prompt template text
+        values: Replacement text per placeholder name
+        
+    Returns:
+        The filled prompt
+    """
+    return _PLACEHOLDER_RE.sub(lambda match: values.get(match.group(1), match.group(0)), template)
+
+def preload_prompts(prompt_dir: str = "src/prompts") -> int:
+    """
+    Read every prompt template in prompt_dir into the load_prompt cache,
+    so request handlers never do prompt file I/O on the event loop.
+    Paths are cached as "<prompt_dir>/<file>", the form callers pass to load_prompt.
+    
+    Args:
+        prompt_dir: Directory containing the .md prompt templates
+        
+    Returns:
+        Number of prompts loaded
+    """
+    if not os.path.isdir(prompt_dir):
+        logger.warning(f"Prompt directory not found, skipping preload: {prompt_dir}")
+        return 0
+    prompt_files = sorted(name for name in os.listdir(prompt_dir) if name.endswith(".md"))
+    for name in prompt_files:
+        load_prompt_digest(f"{prompt_dir}/{name}")
+    return len(prompt_files)
+
+def choose_document_content(base64_content: Optional[str],
+                            raw_text_content: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Pick the single representation of a document to send to the LLM.
+    Raw text is preferred over base64 when both are given.
+    
+    Args:
+        base64_content: Base64-encoded content of the document
+        raw_text_content: Plain text content of the document
+        
+    Returns:
+        (base64_content, raw_text_content) with at most one of them set
+    """
+    if raw_text_content:
+        return None, raw_text_content
+    return base64_content or None, None
+
+def build_document_block(base64_content: str, content_type: str, model: str) -> Dict[str, Any]:
+    """
+    Build the message content block carrying a base64-encoded document.
+    
+    Args:
+        base64_content: Base64-encoded content of the document
+        content_type: MIME type of the document
+        model: LiteLLM model name the block is sent to
+        
+    Returns:
+        image_url content block for a user message
+    """
+    # One join allocates the (multi-MB) data URL once
+    image_url: Dict[str, Any] = {"url": "".join(("data:", content_type, ";base64,", base64_content))}
+    if model.startswith("gemini/"):
+        # Lets LiteLLM map the block to Gemini inline data without sniffing the MIME type from the URL
+        image_url["format"] = content_type
+    return {"type": "image_url", "image_url": image_url}
+
+def strip_code_fence(text: str) -> str:
+    """
+    Return the body of a leading markdown code fence, or the text unchanged if it has none.
+    
+    Args:
+        text: Raw LLM response content
+        
+    Returns:
+        Content with the surrounding code fence removed
+    """
+    match = _FENCE_RE.match(text.strip())
+    return match.group(1) if match else text
+
+def split_text_on_paragraphs(text: str, max_chars: int) -> List[str]:
+    """
+    Split text into pieces of at most max_chars, breaking between paragraphs where possible.
+    Paragraphs longer than max_chars are cut at max_chars.
+    
+    Args:
+        text: Text to split
+        max_chars: Maximum length of each piece
+        
+    Returns:
+        Non-empty text pieces in document order
+    """
+    pieces: List[str] = []
+    current = ""
+    for paragraph in _PARAGRAPH_BREAK_RE.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if current and len(current) + 2 + len(paragraph) <= max_chars:
+            current = f"{current}\n\n{paragraph}"
+            continue
+        if current:
+            pieces.append(current)
+        while len(paragraph) > max_chars:
+            pieces.append(paragraph[:max_chars])
+            paragraph = paragraph[max_chars:]
+        current = paragraph
+    if current:
+        pieces.append(current)
+    return pieces
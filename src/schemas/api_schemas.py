@@ -1,5 +1,8 @@
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from typing import Annotated, List, Dict, Any, Optional
+
+# JD and CV IDs are canonical (lowercase, hyphenated) UUID strings; checked by pydantic-core while parsing
+DocumentId = Annotated[str, Field(pattern=r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$')]
 
 class JDUploadResponse(BaseModel):
     """Response model for JD upload endpoint"""
@@ -17,8 +20,8 @@ class CVUploadResponse(BaseModel):
 
 class RankingRequest(BaseModel):
     """Request model for CV ranking endpoint"""
-    jd_id: str
-    cv_ids: List[str]
+    jd_id: DocumentId
+    cv_ids: List[DocumentId] = Field(min_length=1)
     top_n: Optional[int] = None
 
 class RankingResult(BaseModel):
@@ -33,8 +36,8 @@ class RankingResponse(BaseModel):
 
 class QuestionGenerationRequest(BaseModel):
     """Request model for question generation endpoint"""
-    jd_id: str
-    cv_id: str
+    jd_id: DocumentId
+    cv_id: DocumentId
 
 class Question(BaseModel):
     """Model for individual interview question"""
@@ -38,6 +38,9 @@ class CVOutput(BaseModel):
     contact_info: Optional[ContactInfo] = None
     personal_details: Optional[PersonalDetails] = None
 
+class CVBatchOutput(BaseModel):
+    cvs: List[CVOutput] = []
+
 class CVRankingOutput(BaseModel):
     ranking_score: int
     explanation: str
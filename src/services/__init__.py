@@ -9,7 +9,7 @@ This package provides service interfaces for:
 """
 
 from src.services.jd_service import parse_jd_with_llm, process_jd
-from src.services.cv_service import parse_cv_with_llm, process_cv, process_multiple_cvs
+from src.services.cv_service import ParseResult, parse_cv_with_llm, parse_cvs_batch_with_llm, process_cv, process_multiple_cvs
 from src.services.ranking_service import get_llm_comparison_for_cv, calculate_cv_ranking
 from src.services.question_service import generate_candidate_questions
 
@@ -19,7 +19,9 @@ __all__ = [
     'process_jd',
     
     # CV service functions
+    'ParseResult',
     'parse_cv_with_llm',
+    'parse_cvs_batch_with_llm',
     'process_cv',
     'process_multiple_cvs',
     
@@ -6,22 +6,52 @@ This module provides:
 2. CV processing logic (single and multiple)
 """
 
-from typing import Dict, List, Optional
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
 import asyncio
-import uuid
+import os
 
+from src.llm.llmclient import bounded_acompletion, build_cacheable_messages, get_litellm_params
 from src.llm.parser import parse_document
-from src.schemas.schemas import CVOutput
-from src.vector_db.cv_repository import add_cv_to_db
+from src.llm.provider_files import build_document_content_block
+from src.llm.utils import choose_document_content, fill_prompt, load_prompt, strip_code_fence
+from src.schemas.schemas import CVBatchOutput, CVOutput
+from src.vector_db.cv_repository import (
+    add_cv_to_db,
+    add_cvs_batch_to_db,
+    begin_bulk_ingest,
+    finalize_bulk_ingest,
+    update_cv_structured_data
+)
+from src.utils.ids import generate_uuid7_batch
 from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+CV_PROMPT_FILE = "src/prompts/json_output_cv_prompt.md"
+CV_BATCH_PROMPT_FILE = "src/prompts/cv_batch_prompt.md"
+# Maximum number of CVs packed into one LLM parsing request by process_multiple_cvs
+CV_PARSE_BATCH_SIZE = 8
+# Bound on (longest CV in the batch x batch size), in base64 characters, so long CVs are
+# batched with each other instead of stalling a batch of short ones
+CV_PARSE_BATCH_CHAR_BUDGET = int(os.getenv("CV_PARSE_BATCH_CHAR_BUDGET", str(2_000_000)))
+# Bound on CV parse batches in flight in process_multiple_cvs
+CV_PARSE_CONCURRENCY = int(os.getenv("CV_PARSE_CONCURRENCY", "8"))
+_cv_parse_semaphore = asyncio.Semaphore(CV_PARSE_CONCURRENCY)
+
+@dataclass(frozen=True, slots=True)
+class ParseResult:
+    """Outcome of an LLM CV parse"""
+    ok: bool
+    # Structured CV data when ok; otherwise the parser's error payload (e.g. raw_response), if any
+    data: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
 async def parse_cv_with_llm(
     cv_base64_content: Optional[str] = None, 
     cv_raw_text_content: Optional[str] = None, 
     content_type: str = "application/pdf"
-) -> Dict:
+) -> ParseResult:
     """
     Parses a CV using an LLM for structured data.
     Accepts either base64 encoded content or raw text content.
@@ -32,30 +62,131 @@ async def parse_cv_with_llm(
         content_type: MIME type of the content
         
     Returns:
-        Dictionary containing structured CV data
+        ParseResult with the structured CV data, or the error if parsing failed
     """
     logger.info("Starting CV parsing with LLM.")
+    if not cv_base64_content and not cv_raw_text_content:
+        logger.error("Error: CV content not provided (neither base64 nor raw text).")
+        return ParseResult(ok=False, error="CV content not provided.")
     
     try:
         # Get structured data from LLM
         structured_data = await parse_document(
-            prompt_file="src/prompts/json_output_cv_prompt.md", 
+            prompt_file=CV_PROMPT_FILE, 
             output_schema_class=CVOutput,
             base64_content=cv_base64_content,
             raw_text_content=cv_raw_text_content,
             content_type=content_type
         )
-        
-        logger.info("CV parsing with LLM completed successfully.")
-        
-        # Return the structured data in a dictionary with the key 'structured_data'
-        # to match the format expected by the routes.py API handling
-        return {
-            "structured_data": structured_data
-        }
     except Exception as e:
         logger.error(f"Error during CV parsing with LLM: {e}")
-        return {"error": f"Failed to parse CV: {str(e)}"}
+        return ParseResult(ok=False, error=f"Failed to parse CV: {str(e)}")
+
+    if not structured_data:
+        return ParseResult(ok=False, error="LLM parsing returned no data")
+    if "error" in structured_data:
+        return ParseResult(ok=False, data=structured_data, error=structured_data.get("error") or "Unknown LLM parsing error")
+
+    logger.info("CV parsing with LLM completed successfully.")
+    return ParseResult(ok=True, data=structured_data)
+
+async def _call_llm_for_cv_batch(
+    cv_documents: List[Tuple[Optional[str], Optional[str]]],
+    content_type: str
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Send several CVs to the LLM in one request and validate the returned list.
+    
+    Args:
+        cv_documents: (base64_content, raw_text_content) per CV, each with exactly one set
+        content_type: MIME type of base64 content
+        
+    Returns:
+        Structured data per CV in input order, or None if the response was empty
+    """
+    params = get_litellm_params()
+    user_content_list = [
+        {"type": "text", "text": fill_prompt(load_prompt(CV_BATCH_PROMPT_FILE), {"CV_COUNT": str(len(cv_documents))})},
+    ]
+    for index, (base64_content, raw_text_content) in enumerate(cv_documents, 1):
+        user_content_list.append({"type": "text", "text": f"<<<CV {index}>>>"})
+        if raw_text_content:
+            user_content_list.append({"type": "text", "text": raw_text_content})
+        else:
+            user_content_list.append(await build_document_content_block(base64_content, content_type, params))
+        user_content_list.append({"type": "text", "text": f"<<<END {index}>>>"})
+
+    response = await bounded_acompletion(
+        **params,
+        # The single-CV prompt is the system message, shared with parse_cv_with_llm's prefix cache
+        messages=build_cacheable_messages(load_prompt(CV_PROMPT_FILE), user_content_list, params),
+        response_format={"type": "json_object"}
+    )
+    content = response.choices[0].message.content if response and response.choices else None
+    if not content:
+        return None
+    return [cv.model_dump() for cv in CVBatchOutput.model_validate_json(strip_code_fence(content)).cvs]
+
+async def parse_cvs_batch_with_llm(
+    cv_base64_contents: List[Optional[str]],
+    cv_raw_text_contents: Optional[List[Optional[str]]] = None,
+    content_type: str = "application/pdf"
+) -> List[ParseResult]:
+    """
+    Parses several CVs with a single LLM call, sharing the instruction prompt between them.
+    Falls back to one parse_cv_with_llm call per CV if the batched call fails
+    or does not return exactly one result per CV.
+    
+    Args:
+        cv_base64_contents: Base64 encoded content per CV (None where raw text is given)
+        cv_raw_text_contents: Raw text content per CV, if available
+        content_type: MIME type of the base64 content
+        
+    Returns:
+        ParseResult per CV, in input order
+    """
+    if cv_raw_text_contents is None:
+        cv_raw_text_contents = [None] * len(cv_base64_contents)
+    cv_documents = [choose_document_content(b64, text) for b64, text in zip(cv_base64_contents, cv_raw_text_contents)]
+
+    # Batching only pays off for several CVs that all have content; otherwise parse individually
+    if len(cv_documents) > 1 and all(b64 or text for b64, text in cv_documents):
+        logger.info(f"Starting batched CV parsing with LLM for {len(cv_documents)} CVs.")
+        try:
+            batch_data = await _call_llm_for_cv_batch(cv_documents, content_type)
+        except Exception as e:
+            logger.error(f"Error during batched CV parsing with LLM: {type(e).__name__}: {str(e)}")
+            batch_data = None
+
+        if batch_data is not None and len(batch_data) == len(cv_documents):
+            logger.info(f"Batched CV parsing with LLM completed successfully for {len(batch_data)} CVs.")
+            return [ParseResult(ok=True, data=cv_data) for cv_data in batch_data]
+        logger.warning(
+            f"Batched CV parsing returned {len(batch_data) if batch_data is not None else 'no'} results "
+            f"for {len(cv_documents)} CVs. Falling back to parsing each CV separately."
+        )
+
+    results = await asyncio.gather(*(
+        parse_cv_with_llm(cv_base64_content=b64, cv_raw_text_content=text, content_type=content_type)
+        for b64, text in cv_documents
+    ), return_exceptions=True)
+    return [_parse_result_or_failure(result, f"CV {index}") for index, result in enumerate(results)]
+
+def _parse_result_or_failure(result: Any, label: str) -> ParseResult:
+    """
+    Turn an exception returned by asyncio.gather(..., return_exceptions=True) into a failed ParseResult.
+    
+    Args:
+        result: A ParseResult or the exception raised while producing it
+        label: Description of the input for the log line
+        
+    Returns:
+        The ParseResult, or a failed one describing the exception
+    """
+    if isinstance(result, BaseException):
+        logger.error(f"CV parsing raised for {label}: {type(result).__name__}: {result}")
+        return ParseResult(ok=False, error=f"{type(result).__name__}: {result}")
+    return result
 
 async def process_cv(
     cv_base64_content: Optional[str] = None,
@@ -84,35 +215,30 @@ async def process_cv(
         return {"error": "Associated JD ID is required to process a CV."}
         
     try:
-        # First parse the CV with LLM
-        structured_data = await parse_cv_with_llm(
-            cv_base64_content=cv_base64_content,
-            cv_raw_text_content=cv_raw_text_content,
-            content_type=content_type
-        )
-        
-        # Generate a unique ID for the CV if not provided
-        cv_id = cv_metadata.get("original_doc_id", str(uuid.uuid4()))
-        
-        # Prepare metadata for vector DB
-        cv_metadata_with_links = {
-            **cv_metadata,
-            "original_doc_id": cv_id,
-            "associated_jd_id": associated_jd_id,
-            "structured_data": structured_data,
-            "original_filename": cv_metadata.get("original_filename", f"CV_{cv_id}")
-        }
+        cv_metadata_with_links = _build_cv_metadata_with_links(cv_metadata, associated_jd_id)
         
-        # Add to vector database
-        stored_cv_id = await add_cv_to_db(
-            cv_metadata_with_links=cv_metadata_with_links,
-            cv_base64_content=cv_base64_content,
-            cv_raw_text_content=cv_raw_text_content,
-            content_type=content_type
+        # Chunking + embedding + upsert and LLM parsing hit different backends; run them together
+        # and attach the structured data to the stored record once parsing finishes
+        parse_result, stored_cv_id = await asyncio.gather(
+            parse_cv_with_llm(
+                cv_base64_content=cv_base64_content,
+                cv_raw_text_content=cv_raw_text_content,
+                content_type=content_type
+            ),
+            add_cv_to_db(
+                cv_metadata_with_links=cv_metadata_with_links,
+                cv_base64_content=cv_base64_content,
+                cv_raw_text_content=cv_raw_text_content,
+                content_type=content_type
+            )
         )
         
         if not stored_cv_id:
             return {"error": "Failed to add CV to vector database."}
+        
+        structured_data = _structured_data_from(parse_result)
+        if not await update_cv_structured_data(stored_cv_id, structured_data):
+            return {"error": "Failed to store parsed CV data in vector database."}
             
         return {
             "cv_id": stored_cv_id,
@@ -124,11 +250,71 @@ async def process_cv(
         logger.error(f"Error processing CV: {e}")
         return {"error": f"Failed to process CV: {str(e)}"}
 
+def _bin_cvs_by_length(cv_contents: List[str]) -> List[List[str]]:
+    """
+    Group CVs into parse batches of similar length. A batched LLM call finishes with
+    its longest CV, so CVs are sorted by size and packed while
+    (longest CV in the batch x batch size) stays within CV_PARSE_BATCH_CHAR_BUDGET,
+    up to CV_PARSE_BATCH_SIZE CVs per batch.
+    
+    Args:
+        cv_contents: Base64 encoded CV contents
+        
+    Returns:
+        Batches of CV contents, shortest CVs first
+    """
+    batches: List[List[str]] = []
+    current: List[str] = []
+    for cv_content in sorted(cv_contents, key=len):
+        # Sorted ascending, so the CV being added is the longest in the batch
+        if current and (len(current) >= CV_PARSE_BATCH_SIZE
+                        or len(cv_content) * (len(current) + 1) > CV_PARSE_BATCH_CHAR_BUDGET):
+            batches.append(current)
+            current = []
+        current.append(cv_content)
+    if current:
+        batches.append(current)
+    return batches
+
+def _structured_data_from(parse_result: ParseResult) -> Dict[str, Any]:
+    """Structured data stored for a CV: the parsed fields, or the parse error."""
+    return parse_result.data if parse_result.ok else {"error": parse_result.error}
+
+def _build_cv_metadata_with_links(
+    cv_metadata: Dict,
+    associated_jd_id: str,
+    structured_data: Optional[Dict[str, Any]] = None,
+    new_cv_id: Optional[str] = None
+) -> Dict:
+    """
+    Build a CV's metadata dictionary for the vector DB from a copy of cv_metadata.
+    
+    Args:
+        cv_metadata: Additional metadata for the CV (left unmodified)
+        associated_jd_id: ID of the associated job description
+        structured_data: Parsed CV data, if already available
+        new_cv_id: Pre-generated ID to use if cv_metadata has no original_doc_id
+        
+    Returns:
+        A new dictionary with cv_metadata plus original_doc_id, associated_jd_id and, if given, structured_data
+    """
+    # Use a time-ordered ID for the CV if not provided
+    cv_id = cv_metadata.get("original_doc_id") or new_cv_id or generate_uuid7_batch(1)[0]
+    
+    meta = dict(cv_metadata)
+    meta["original_doc_id"] = cv_id
+    meta["associated_jd_id"] = associated_jd_id
+    meta.setdefault("original_filename", f"CV_{cv_id}")
+    if structured_data is not None:
+        meta["structured_data"] = structured_data
+    return meta
+
 async def process_multiple_cvs(
     cv_base64_contents: List[str],
     associated_jd_id: str,
     cv_metadata_list: Optional[List[Dict]] = None,
-    content_type: str = "application/pdf"
+    content_type: str = "application/pdf",
+    bulk: bool = False
 ) -> List[Dict]:
     """
     Process multiple CVs concurrently.
@@ -138,6 +324,8 @@ async def process_multiple_cvs(
         associated_jd_id: ID of the associated job description
         cv_metadata_list: List of metadata dictionaries for each CV
         content_type: MIME type of the content
+        bulk: Pause vector indexing while writing and index everything once at the end.
+            Faster for large onboarding batches, but CV searches run unindexed meanwhile.
         
     Returns:
         List of dictionaries containing processed CV data
@@ -145,6 +333,9 @@ async def process_multiple_cvs(
     if not cv_base64_contents:
         return []
         
+    if not associated_jd_id:
+        return [{"error": "Associated JD ID is required to process a CV."} for _ in cv_base64_contents]
+        
     if cv_metadata_list is None:
         cv_metadata_list = [{} for _ in cv_base64_contents]
         
@@ -152,19 +343,59 @@ async def process_multiple_cvs(
     if len(cv_metadata_list) != len(cv_base64_contents):
         cv_metadata_list.extend([{} for _ in range(len(cv_base64_contents) - len(cv_metadata_list))])
         
-    tasks = []
-    for i, cv_content in enumerate(cv_base64_contents):
-        tasks.append(
-            process_cv(
-                cv_base64_content=cv_content,
-                cv_metadata=cv_metadata_list[i],
-                associated_jd_id=associated_jd_id,
-                content_type=content_type
-            )
-        )
-        
-    results = await asyncio.gather(*tasks)
-    return list(results)
+    # Re-uploaded CVs are parsed once and the result is shared by every copy
+    unique_contents = list(dict.fromkeys(cv_base64_contents))
+    if len(unique_contents) < len(cv_base64_contents):
+        logger.info(f"Parsing {len(unique_contents)} distinct CVs for {len(cv_base64_contents)} uploads.")
+
+    async def parse_batch(batch_contents: List[str]) -> List[ParseResult]:
+        async with _cv_parse_semaphore:
+            return await parse_cvs_batch_with_llm(batch_contents, content_type=content_type)
+
+    # Parse length-binned batches of CVs per LLM call, with a bounded number of batches in flight
+    # A failing batch must not cancel the others; its CVs are recorded as parse failures
+    batches = _bin_cvs_by_length(unique_contents)
+    batch_results = await asyncio.gather(*(parse_batch(batch_contents) for batch_contents in batches), return_exceptions=True)
+    parse_results_by_content = {}
+    for batch_number, (batch_contents, batch) in enumerate(zip(batches, batch_results)):
+        if isinstance(batch, BaseException):
+            batch = [_parse_result_or_failure(batch, f"CV batch {batch_number}")] * len(batch_contents)
+        parse_results_by_content.update(zip(batch_contents, batch))
+    parse_results = [parse_results_by_content[cv_content] for cv_content in cv_base64_contents]
+
+    # Then write every CV with batched upserts instead of one vector DB round trip per CV
+    new_cv_ids = generate_uuid7_batch(len(cv_base64_contents))
+    metadata_list = [
+        _build_cv_metadata_with_links(cv_metadata, associated_jd_id, _structured_data_from(parse_result), new_cv_id)
+        for parse_result, cv_metadata, new_cv_id in zip(parse_results, cv_metadata_list, new_cv_ids)
+    ]
+    if bulk:
+        await begin_bulk_ingest()
+    try:
+        stored_cv_ids = await add_cvs_batch_to_db([
+            {
+                "cv_metadata_with_links": cv_metadata_with_links,
+                "cv_base64_content": cv_content,
+                "cv_raw_text_content": None,
+                "content_type": content_type
+            }
+            for cv_metadata_with_links, cv_content in zip(metadata_list, cv_base64_contents)
+        ])
+    except Exception as e:
+        logger.error(f"Error adding CV batch to vector database: {e}")
+        return [{"error": f"Failed to process CV: {str(e)}"} for _ in cv_base64_contents]
+    finally:
+        if bulk:
+            await finalize_bulk_ingest()
+
+    return [
+        {
+            "cv_id": stored_cv_id,
+            "structured_data": cv_metadata_with_links["structured_data"],
+            "message": "CV processed and added to vector database successfully."
+        } if stored_cv_id else {"error": "Failed to add CV to vector database."}
+        for stored_cv_id, cv_metadata_with_links in zip(stored_cv_ids, metadata_list)
+    ]
 
 async def process_cv_from_s3(
     s3_uri: str,
@@ -190,22 +421,22 @@ async def process_cv_from_s3(
         # Get file from S3
         s3_file_data = await s3_handler.get_file_from_s3(s3_uri)
         
-        if s3_file_data.get("error"):
-            logger.error(f"S3 file processing error for CV {s3_file_data.get('filename')}: {s3_file_data.get('error')}")
-            return {"error": s3_file_data.get("error")}
+        if s3_file_data.error:
+            logger.error(f"S3 file processing error for CV {s3_file_data.filename}: {s3_file_data.error}")
+            return {"error": s3_file_data.error}
 
-        filename = s3_file_data["filename"]
-        raw_text = s3_file_data["raw_text_content"]
-        base64_encoded = s3_file_data["base64_content"]
-        actual_content_type = s3_file_data["content_type"]
+        filename = s3_file_data.filename
+        raw_text = s3_file_data.raw_text_content
+        base64_encoded = s3_file_data.base64_content
+        actual_content_type = s3_file_data.content_type
         
         # Prepare metadata for vector DB
         cv_metadata = {
             "original_filename": filename,
             "source_s3_uri": s3_uri,
-            "source_bucket": s3_file_data["bucket"],
-            "source_key": s3_file_data["key"],
-            "file_size_mb": s3_file_data["file_size_mb"]
+            "source_bucket": s3_file_data.bucket,
+            "source_key": s3_file_data.key,
+            "file_size_mb": s3_file_data.file_size_mb
         }
         
         # Use existing process_cv function
@@ -6,15 +6,60 @@ This module provides:
 2. JD keyword processing logic
 """
 
-from typing import Dict, Optional
+import asyncio
+import os
+from typing import Dict, List, Optional
 
 from src.llm.parser import parse_document
+from src.llm.utils import split_text_on_paragraphs
 from src.schemas.schemas import JDKeywordsOutput
-from src.vector_db.vectordb_client import get_full_document_text_from_db, JD_COLLECTION_NAME
+from src.vector_db.vectordb_client import get_full_document_text_from_db, get_full_document_texts_from_db, JD_COLLECTION_NAME
 from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+JD_KEYWORDS_PROMPT_FILE = "src/prompts/jd_keywords_prompt.md"
+# JDs longer than this are split and their keywords extracted piecewise in parallel
+KEYWORDS_SPLIT_THRESHOLD_CHARS = int(os.getenv("KEYWORDS_SPLIT_THRESHOLD_CHARS", "40000"))
+# Target size of each piece of a split JD
+KEYWORDS_PIECE_CHARS = int(os.getenv("KEYWORDS_PIECE_CHARS", "8000"))
+
+async def _generate_keywords_for_long_jd(jd_text: str) -> Dict:
+    """
+    Extract keywords from each paragraph-aligned piece of a long JD concurrently and merge them.
+    
+    Args:
+        jd_text: Raw text content of the JD
+        
+    Returns:
+        Dictionary containing the merged keywords, or the first error if every piece failed
+    """
+    pieces = split_text_on_paragraphs(jd_text, KEYWORDS_PIECE_CHARS)
+    logger.info(f"JD text is {len(jd_text)} characters; extracting keywords from {len(pieces)} pieces.")
+    piece_results = await asyncio.gather(*(
+        parse_document(
+            prompt_file=JD_KEYWORDS_PROMPT_FILE,
+            output_schema_class=JDKeywordsOutput,
+            raw_text_content=piece,
+            content_type="text/plain"
+        )
+        for piece in pieces
+    ))
+    
+    successful_results = [result for result in piece_results if "error" not in result]
+    if not successful_results:
+        return piece_results[0]
+    if len(successful_results) < len(piece_results):
+        logger.warning(f"Keyword extraction failed for {len(piece_results) - len(successful_results)} of {len(piece_results)} JD pieces.")
+    
+    # Union of the keywords in first-seen order, ignoring case
+    keywords_by_lowercase: Dict[str, str] = {}
+    for result in successful_results:
+        for keyword in result.get("keywords", []):
+            keywords_by_lowercase.setdefault(keyword.strip().lower(), keyword.strip())
+    keywords: List[str] = [keyword for keyword in keywords_by_lowercase.values() if keyword]
+    return {"keywords": keywords}
+
 async def generate_jd_keywords_from_text(jd_text: str) -> Dict:
     """
     Generate keywords from JD text using LLM.
@@ -32,9 +77,12 @@ async def generate_jd_keywords_from_text(jd_text: str) -> Dict:
         return {"error": "JD text content is empty or not provided."}
 
     try:
+        if len(jd_text) > KEYWORDS_SPLIT_THRESHOLD_CHARS:
+            return await _generate_keywords_for_long_jd(jd_text)
+        
         # Use parse_document to generate keywords
         parsed_keywords_from_llm = await parse_document(
-            prompt_file="src/prompts/jd_keywords_prompt.md", 
+            prompt_file=JD_KEYWORDS_PROMPT_FILE, 
             output_schema_class=JDKeywordsOutput,
             raw_text_content=jd_text,
             content_type="text/plain"
@@ -66,7 +114,7 @@ async def generate_jd_keywords_by_id(jd_id: str) -> Dict:
     try:
         # Fetch the full JD text from the database
         logger.info(f"Fetching JD content from database for ID: {jd_id}")
-        jd_text = await get_full_document_text_from_db(jd_id, JD_COLLECTION_NAME())
+        jd_text = await get_full_document_text_from_db(jd_id, JD_COLLECTION_NAME)
         
         if not jd_text:
             logger.error(f"Could not retrieve JD text for ID: {jd_id}")
@@ -86,4 +134,40 @@ async def generate_jd_keywords_by_id(jd_id: str) -> Dict:
         
     except Exception as e:
         logger.error(f"Error generating keywords for JD ID {jd_id}: {e}")
-        return {"error": f"Failed to generate keywords for JD ID {jd_id}: {str(e)}"} 
\ No newline at end of file
+        return {"error": f"Failed to generate keywords for JD ID {jd_id}: {str(e)}"} 
+
+async def generate_jd_keywords_by_ids(jd_ids: List[str]) -> Dict[str, Dict]:
+    """
+    Generate keywords for several JDs, fetching all of their texts from the database in one query.
+    The LLM calls run concurrently, bounded by the shared LLM concurrency limit.
+    
+    Args:
+        jd_ids: The IDs of the JDs in the vector database
+        
+    Returns:
+        Dictionary mapping each JD ID to its keywords or error information
+    """
+    unique_jd_ids = list(dict.fromkeys(jd_id for jd_id in jd_ids if jd_id and jd_id.strip()))
+    if not unique_jd_ids:
+        return {}
+    logger.info(f"Starting JD keyword generation for {len(unique_jd_ids)} JD IDs")
+
+    jd_texts = await get_full_document_texts_from_db(unique_jd_ids, JD_COLLECTION_NAME)
+    found_jd_ids = [jd_id for jd_id in unique_jd_ids if jd_id in jd_texts]
+
+    async def generate(jd_id: str) -> Dict:
+        try:
+            return await generate_jd_keywords_from_text(jd_texts[jd_id])
+        except Exception as e:
+            logger.error(f"Error generating keywords for JD ID {jd_id}: {e}")
+            return {"error": f"Failed to generate keywords for JD ID {jd_id}: {str(e)}"}
+
+    keyword_results = await asyncio.gather(*(generate(jd_id) for jd_id in found_jd_ids))
+    keywords_by_jd_id = dict(zip(found_jd_ids, keyword_results))
+    # Results follow the input order
+    results = {
+        jd_id: keywords_by_jd_id[jd_id] if jd_id in keywords_by_jd_id else {"error": f"JD not found for ID: {jd_id}"}
+        for jd_id in unique_jd_ids
+    }
+    logger.info(f"Generated keywords for {sum('error' not in result for result in results.values())}/{len(unique_jd_ids)} JD IDs")
+    return results
@@ -6,11 +6,12 @@ This module provides:
 2. JD processing logic
 """
 
+import asyncio
 from typing import Dict, Optional
 
 from src.llm.parser import parse_document
 from src.schemas.schemas import JDOutput
-from src.vector_db.jd_repository import add_jd_to_db
+from src.vector_db.jd_repository import add_jd_to_db, delete_jd_from_db, update_jd_structured_data
 from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -74,32 +75,36 @@ async def process_jd(
         jd_metadata = {}
         
     try:
-        # First parse the JD with LLM
-        parsed_jd = await parse_jd_with_llm(
-            jd_base64_content=jd_base64_content,
-            jd_raw_text_content=jd_raw_text_content,
-            content_type=content_type
+        jd_metadata.setdefault("original_filename", "Unknown JD")
+        
+        # Parsing and chunking + embedding + upsert are independent; run them together
+        # and attach the structured data to the stored chunks once parsing finishes
+        parsed_jd, jd_id = await asyncio.gather(
+            parse_jd_with_llm(
+                jd_base64_content=jd_base64_content,
+                jd_raw_text_content=jd_raw_text_content,
+                content_type=content_type
+            ),
+            add_jd_to_db(
+                jd_specific_metadata=jd_metadata,
+                jd_base64_content=jd_base64_content,
+                jd_raw_text_content=jd_raw_text_content,
+                content_type=content_type
+            )
         )
         
         if "error" in parsed_jd:
+            # The chunks were stored alongside the parse; don't leave an unreachable JD behind
+            if jd_id:
+                await delete_jd_from_db(jd_id)
             return parsed_jd
-            
-        # Add structured data to metadata
-        jd_metadata.update({
-            "structured_data": parsed_jd,
-            "original_filename": jd_metadata.get("original_filename", "Unknown JD")
-        })
-        
-        # Add to vector database
-        jd_id = await add_jd_to_db(
-            jd_specific_metadata=jd_metadata,
-            jd_base64_content=jd_base64_content,
-            jd_raw_text_content=jd_raw_text_content,
-            content_type=content_type
-        )
         
         if not jd_id:
             return {"error": "Failed to add JD to vector database."}
+        
+        if not await update_jd_structured_data(jd_id, parsed_jd):
+            await delete_jd_from_db(jd_id)
+            return {"error": "Failed to store parsed JD data in vector database."}
             
         return {
             "jd_id": jd_id,
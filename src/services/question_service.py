@@ -5,16 +5,53 @@ This module provides:
 1. Functions for generating interview questions based on JD and CV
 """
 
-import json
-import litellm
-from typing import List, Dict, Optional
+import functools
+from typing import Any, List, Dict, Mapping, Optional, Tuple
 
-from src.llm.llmclient import get_litellm_params
+from pydantic import ValidationError
+
+from src.llm.llmclient import bounded_acompletion, build_cacheable_messages, get_litellm_params
+from src.llm.utils import fill_prompt, load_prompt
 from src.schemas.schemas import CandidateQuestionsOutput
 from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+QUESTIONS_PROMPT_FILE = "src/prompts/candidate_questions_prompt.md"
+# Everything before this marker in the questions prompt is candidate-independent
+QUESTIONS_INPUT_MARKER = "**Input:**"
+
+@functools.lru_cache(maxsize=1)
+def _split_questions_prompt() -> Tuple[str, str]:
+    """
+    Split the questions prompt into its static instructions and the part holding the placeholders.
+
+    Returns:
+        (static_header, input_template); static_header is empty if the marker is missing
+    """
+    template = load_prompt(QUESTIONS_PROMPT_FILE)
+    static_header, marker, input_template = template.partition(QUESTIONS_INPUT_MARKER)
+    if not marker:
+        return "", template
+    return static_header.rstrip(), marker + input_template
+
+def _build_questions_messages(user_prompt: str, llm_params: Mapping[str, Any]) -> List[Dict]:
+    """
+    Build the chat messages for a questions request, sending the static prompt header
+    as a cacheable prefix when the prompt has one.
+
+    Args:
+        user_prompt: The filled-in questions prompt
+        llm_params: LiteLLM parameters the request will use
+
+    Returns:
+        Chat messages for bounded_acompletion
+    """
+    static_header, _ = _split_questions_prompt()
+    if not static_header:
+        return [{"role": "user", "content": user_prompt}]
+    return build_cacheable_messages(static_header, user_prompt, llm_params)
+
 async def generate_candidate_questions(
     jd_text: str,
     cv_text: str,
@@ -31,19 +68,19 @@ async def generate_candidate_questions(
     Returns:
         A CandidateQuestionsOutput object containing a list of questions, or None on error.
     """
-    from src.llm.utils import load_prompt
-    
     logger.info(f"Starting candidate question generation for: {candidate_name_or_id}")
     
     try:
-        questions_prompt_template = load_prompt("src/prompts/candidate_questions_prompt.md")
+        _, questions_prompt_template = _split_questions_prompt()
     except Exception as e:
         logger.error(f"Error loading candidate questions prompt: {e}")
         return None
 
-    prompt = questions_prompt_template.replace("{{JD_TEXT}}", jd_text)
-    prompt = prompt.replace("{{CV_TEXT}}", cv_text)
-    prompt = prompt.replace("{{CANDIDATE_NAME_OR_ID}}", candidate_name_or_id)
+    prompt = fill_prompt(questions_prompt_template, {
+        "JD_TEXT": jd_text,
+        "CV_TEXT": cv_text,
+        "CANDIDATE_NAME_OR_ID": candidate_name_or_id,
+    })
 
     try:
         llm_params = get_litellm_params()
@@ -51,9 +88,9 @@ async def generate_candidate_questions(
         # The prompt already requests JSON, but this enforces it for some models.
         llm_params_for_json = {**llm_params, "response_format": {"type": "json_object"}}
         logger.info(f"Calling LLM for candidate question generation for: {candidate_name_or_id}.")
-        response = await litellm.acompletion(
+        response = await bounded_acompletion(
             **llm_params_for_json,
-            messages=[{"role": "user", "content": prompt}]
+            messages=_build_questions_messages(prompt, llm_params)
         )
         
         response_content = response.choices[0].message.content
@@ -61,16 +98,18 @@ async def generate_candidate_questions(
             logger.error(f"LLM returned empty content for candidate questions: {candidate_name_or_id}")
             return None
 
-        # Parse the JSON string into our Pydantic model
-        llm_output_data = json.loads(response_content)
-        questions_result = CandidateQuestionsOutput(**llm_output_data)
+        # Parse and validate the JSON string in one pydantic-core pass
+        questions_result = CandidateQuestionsOutput.model_validate_json(response_content)
             
         return questions_result
 
-    except json.JSONDecodeError as json_e:
-        logger.error(f"Error decoding LLM JSON response for candidate questions ({candidate_name_or_id}): {json_e}")
+    except ValidationError as validation_error:
+        if any(error["type"] == "json_invalid" for error in validation_error.errors()):
+            logger.error(f"Error decoding LLM JSON response for candidate questions ({candidate_name_or_id}): {validation_error}")
+        else:
+            logger.error(f"LLM response for candidate questions ({candidate_name_or_id}) does not match the schema: {validation_error}")
         logger.error(f"LLM Raw Response: {response_content[:500]}...")
         return None
     except Exception as e:
         logger.error(f"Error during LLM question generation for candidate {candidate_name_or_id}: {type(e).__name__} - {e}")
-        return None 
\ No newline at end of file
+        return None
@@ -6,20 +6,76 @@ This module provides:
 2. CV ranking and scoring logic
 """
 
-import json
-import litellm
 import asyncio
-from typing import List, Dict, Any, Optional, Tuple
+import functools
+import logging
+import os
+from types import MappingProxyType
+from typing import List, Dict, Any, Mapping, Optional, Tuple
 
-from src.llm.llmclient import get_litellm_params
+from pydantic import ValidationError
+
+from src.llm.llmclient import bounded_acompletion, build_cacheable_messages, build_prompt_block, get_litellm_params, log_prompt_cache_usage
+from src.llm.response_cache import RANKING_RESPONSE_CACHE, get_or_set, make_response_cache_key
+from src.llm.utils import fill_prompt, load_prompt
 from src.schemas.schemas import LLMJdCvComparisonOutput
-from src.vector_db.vectordb_client import JD_COLLECTION_NAME, CV_COLLECTION_NAME
 from src.vector_db.jd_repository import get_jd_chunks, get_full_jd_text
-from src.vector_db.cv_repository import get_cv_chunks, get_full_cv_text, search_cv_chunks
+from src.vector_db.cv_repository import get_cv_chunks, get_full_cv_texts, search_cv_chunks_batch
 from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+RANKING_PROMPT_FILE = "src/prompts/cv_ranking_prompt.md"
+RANKING_MODEL_ALIAS = "gemini_2_5_flash_preview"
+# The ranking prompt is static instructions, then the JD section, then the per-CV section
+RANKING_JD_MARKER = "**Job Description (JD):**"
+RANKING_CV_MARKER = "**Curriculum Vitae (CV):**"
+# Overall deadline for the Stage 2 LLM comparisons; CVs still waiting after it are ranked last
+RANKING_LLM_TIMEOUT_SECONDS = float(os.getenv("RANKING_LLM_TIMEOUT_SECONDS", "300"))
+
+@functools.lru_cache(maxsize=1)
+def _split_ranking_prompt() -> Tuple[str, str, str]:
+    """
+    Split the ranking prompt into its static instructions, the JD section and the CV section.
+
+    Returns:
+        (static_header, jd_template, cv_template); the first two are empty if a marker is missing
+    """
+    template = load_prompt(RANKING_PROMPT_FILE)
+    static_header, jd_marker, rest = template.partition(RANKING_JD_MARKER)
+    jd_section, cv_marker, cv_section = rest.partition(RANKING_CV_MARKER)
+    if not jd_marker or not cv_marker:
+        return "", "", template
+    return static_header.rstrip(), jd_marker + jd_section, cv_marker + cv_section
+
+@functools.lru_cache(maxsize=1)
+def _ranking_llm_params() -> Mapping[str, Any]:
+    """LiteLLM parameters for ranking calls, with JSON output enabled. Built once per process."""
+    return MappingProxyType({**get_litellm_params(model_alias=RANKING_MODEL_ALIAS), "response_format": {"type": "json_object"}})
+
+def _build_ranking_messages(jd_text: str, cv_text: str, cv_id: str, llm_params: Mapping[str, Any]) -> List[Dict]:
+    """
+    Build the comparison messages so the instructions and JD form a prefix shared by every CV
+    ranked against the same JD, which providers can serve from their prompt cache.
+
+    Args:
+        jd_text: The full text of the Job Description.
+        cv_text: The full text of the Curriculum Vitae.
+        cv_id: The ID of the CV.
+        llm_params: LiteLLM parameters from get_litellm_params
+
+    Returns:
+        Messages for litellm.acompletion
+    """
+    static_header, jd_template, cv_template = _split_ranking_prompt()
+    cv_values = {"CV_TEXT": cv_text, "CV_ID": cv_id}
+    if not static_header:
+        return [{"role": "user", "content": fill_prompt(cv_template, {"JD_TEXT": jd_text, **cv_values})}]
+    return build_cacheable_messages(static_header, [
+        build_prompt_block(fill_prompt(jd_template, {"JD_TEXT": jd_text}), llm_params),
+        {"type": "text", "text": fill_prompt(cv_template, cv_values)},
+    ], llm_params)
+
 async def get_llm_comparison_for_cv(
     jd_text: str, 
     cv_text: str, 
@@ -27,6 +83,7 @@ async def get_llm_comparison_for_cv(
 ) -> Optional[LLMJdCvComparisonOutput]:
     """
     Uses an LLM to compare a single CV against a JD and provide structured reasoning.
+    Repeat rankings of an unchanged JD and CV reuse the earlier comparison.
 
     Args:
         jd_text: The full text of the Job Description.
@@ -36,50 +93,73 @@ async def get_llm_comparison_for_cv(
     Returns:
         An LLMJdCvComparisonOutput object with matched/unmatched points, or None on error.
     """
-    from src.llm.utils import load_prompt
-    
     try:
-        comparison_prompt_template = load_prompt("src/prompts/cv_ranking_prompt.md")
+        llm_params = _ranking_llm_params()
+        cache_key = make_response_cache_key(RANKING_PROMPT_FILE, llm_params, f"{jd_text}\0{cv_text}\0{cv_id}")
     except Exception as e:
-        logger.error(f"Error loading JD-CV comparison prompt: {e}")
+        logger.error(f"Error preparing JD-CV comparison for CV ID {cv_id}: {type(e).__name__} - {e}")
         return None
+    comparison_data = await get_or_set(
+        RANKING_RESPONSE_CACHE,
+        cache_key,
+        lambda: _call_llm_for_comparison(jd_text, cv_text, cv_id, llm_params)
+    )
+    return LLMJdCvComparisonOutput.model_validate(comparison_data) if comparison_data is not None else None
 
-    prompt = comparison_prompt_template.replace("{{JD_TEXT}}", jd_text)
-    prompt = prompt.replace("{{CV_TEXT}}", cv_text)
-    prompt = prompt.replace("{{CV_ID}}", cv_id)
+async def _call_llm_for_comparison(
+    jd_text: str,
+    cv_text: str,
+    cv_id: str,
+    llm_params: Mapping[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """
+    Call the LLM for get_llm_comparison_for_cv and validate its output. Uncached.
 
+    Args:
+        jd_text: The full text of the Job Description.
+        cv_text: The full text of the Curriculum Vitae.
+        cv_id: The ID of the CV.
+        llm_params: LiteLLM parameters from _ranking_llm_params
+
+    Returns:
+        The validated comparison as a dictionary, or None on error.
+    """
     try:
-        # Using the default model from config.py
-        llm_params = get_litellm_params(model_alias="gemini_2_5_flash_preview") 
-        
-        # Ensure response_format for JSON is correctly set
-        llm_params_for_json = {**llm_params, "response_format": {"type": "json_object"}}
+        # The prompt is read from disk and split once per process
+        messages = _build_ranking_messages(jd_text, cv_text, cv_id, llm_params)
+    except Exception as e:
+        logger.error(f"Error loading JD-CV comparison prompt: {e}")
+        return None
 
+    try:
         logger.info(f"Calling LLM for JD-CV comparison for CV ID: {cv_id}. Model: {llm_params.get('model')}")
-        response = await litellm.acompletion(
-            **llm_params_for_json,
-            messages=[{"role": "user", "content": prompt}]
+        response = await bounded_acompletion(
+            **llm_params,
+            messages=messages
         )
+        log_prompt_cache_usage(response, f"JD-CV comparison for CV ID {cv_id}")
         
         response_content = response.choices[0].message.content
         if not response_content:
             logger.error(f"LLM returned empty content for CV ID: {cv_id}")
             return None
 
-        # Parse the JSON string into our Pydantic model
-        llm_output_data = json.loads(response_content)
-        comparison_result = LLMJdCvComparisonOutput(**llm_output_data)
+        # Parse and validate the JSON string in one pydantic-core pass
+        comparison_result = LLMJdCvComparisonOutput.model_validate_json(response_content)
         
+        comparison_data = comparison_result.model_dump()
         # Ensure the cv_id from LLM matches the one we sent, as a sanity check.
-        if comparison_result.cv_id != cv_id:
-            logger.warning(f"Warning: LLM output cv_id '{comparison_result.cv_id}' does not match expected '{cv_id}'. Using expected.")
-            # Correct it or handle as an error. For now, we can overwrite it to be sure.
-            comparison_result.cv_id = cv_id 
+        if comparison_data["cv_id"] != cv_id:
+            logger.warning(f"Warning: LLM output cv_id '{comparison_data['cv_id']}' does not match expected '{cv_id}'. Using expected.")
+            comparison_data["cv_id"] = cv_id
             
-        return comparison_result
+        return comparison_data
 
-    except json.JSONDecodeError as json_e:
-        logger.error(f"Error decoding LLM JSON response for CV ID {cv_id}: {json_e}")
+    except ValidationError as validation_error:
+        if any(error["type"] == "json_invalid" for error in validation_error.errors()):
+            logger.error(f"Error decoding LLM JSON response for CV ID {cv_id}: {validation_error}")
+        else:
+            logger.error(f"LLM response for CV ID {cv_id} does not match the schema: {validation_error}")
         logger.error(f"LLM Raw Response: {response_content[:500]}...")
         return None
     except Exception as e:
@@ -89,7 +169,8 @@ async def get_llm_comparison_for_cv(
 async def calculate_cv_ranking(
     current_jd_id: str,
     active_session_cvs: List[Dict[str, Any]],
-    top_n: Optional[int] = None
+    top_n: Optional[int] = None,
+    prefetched_cv_texts: Optional[Dict[str, str]] = None
 ) -> Optional[List[Dict[str, Any]]]:
     """
     Calculates CV rankings: 
@@ -103,6 +184,7 @@ async def calculate_cv_ranking(
         current_jd_id: ID of the job description to rank CVs against
         active_session_cvs: List of CV information dictionaries
         top_n: Maximum number of CVs to rank (None for all)
+        prefetched_cv_texts: Optional mapping of CV ID to full text already fetched by the caller
         
     Returns:
         A list of the ranked CVs, augmented with LLM reasoning,
@@ -113,15 +195,17 @@ async def calculate_cv_ranking(
         logger.warning("No active CVs to rank.")
         return []
 
-    jd_collection_name = JD_COLLECTION_NAME()
-    cv_collection_name = CV_COLLECTION_NAME()
+    # CV IDs (deduplicated, in order) and their filenames, built in one pass
+    active_cv_ids: List[str] = []
+    cv_id_to_filename: Dict[str, str] = {}
+    for cv_info in active_session_cvs:
+        cv_id = cv_info["cv_id"]
+        if cv_id not in cv_id_to_filename:
+            active_cv_ids.append(cv_id)
+            cv_id_to_filename[cv_id] = cv_info.get("filename", f"CV_{cv_id}")
 
-    cv_id_to_filename = {cv_info["cv_id"]: cv_info.get("filename", f"CV_{cv_info['cv_id']}") for cv_info in active_session_cvs}
-    active_cv_ids = list(cv_id_to_filename.keys())
-
-    if not active_cv_ids:
-        logger.error("No CV IDs extracted from active_session_cvs.")
-        return []
+    # Stage 2 needs the full JD text whatever Stage 1 finds; fetch it alongside Stage 1
+    jd_full_text_task = asyncio.create_task(get_full_jd_text(current_jd_id))
 
     total_cvs = len(active_cv_ids)
     
@@ -134,7 +218,7 @@ async def calculate_cv_ranking(
         for cv_info in active_session_cvs:
             top_cvs_for_llm_stage.append({
                 "cv_id": cv_info["cv_id"],
-                "filename": cv_info.get("filename", f"CV_{cv_info['cv_id']}"),
+                "filename": cv_id_to_filename[cv_info["cv_id"]],
                 "raw_total_score": 0.0,
                 "match_count": 0
             })
@@ -146,9 +230,14 @@ async def calculate_cv_ranking(
         logger.info(f"Performing vector similarity ranking to select top {top_n} from {total_cvs} CVs")
         
         # --- Stage 1: Vector Similarity Ranking ---
-        jd_chunks = await get_jd_chunks(current_jd_id)
+        try:
+            jd_chunks = await get_jd_chunks(current_jd_id)
+        except Exception:
+            jd_full_text_task.cancel()
+            raise
         if not jd_chunks:
             logger.error(f"Failed to retrieve JD chunks for JD ID: {current_jd_id}")
+            jd_full_text_task.cancel()
             return None
 
         cv_scores_aggregator: Dict[str, Dict[str, Any]] = {
@@ -160,48 +249,59 @@ async def calculate_cv_ranking(
         # Detailed logging for Stage 1
         logger.info(f"[Ranking Stage 1 - Analysis] Starting Stage 1 for JD ID: {current_jd_id}. CVs to consider: {active_cv_ids}")
 
-        for jd_chunk_index, jd_chunk in enumerate(jd_chunks):
-            jd_chunk_text = jd_chunk.get("enriched_text", "")
-            jd_chunk_weight = jd_chunk.get("weight", 1)
-            if not isinstance(jd_chunk_weight, int) or not (1 <= jd_chunk_weight <= 3):
-                jd_chunk_weight = 1 # Defaulting already handled
-            
-            logger.info(f"[Ranking Stage 1 - Analysis] Processing JD Chunk {jd_chunk_index+1}/{len(jd_chunks)} (Weight: {jd_chunk_weight}): '{jd_chunk_text[:150]}...'")
-
-            if not jd_chunk_text.strip():
-                logger.warning(f"[Ranking Stage 1] JD Chunk {jd_chunk_index+1} is empty or whitespace, skipping search.")
-                continue
-            
-            cv_chunk_matches = await search_cv_chunks(
-                query_text=jd_chunk_text,
+        # One preprocessing pass: (index, text, weight) for every non-empty JD chunk, weights clamped to 1-3
+        searchable_jd_chunks = [
+            (jd_chunk_index, jd_chunk_text, jd_chunk_weight if isinstance(jd_chunk_weight, int) and 1 <= jd_chunk_weight <= 3 else 1)
+            for jd_chunk_index, jd_chunk_text, jd_chunk_weight in (
+                (index, jd_chunk.get("enriched_text") or "", jd_chunk.get("weight", 1)) for index, jd_chunk in enumerate(jd_chunks)
+            )
+            if jd_chunk_text.strip()
+        ]
+        if len(searchable_jd_chunks) < len(jd_chunks):
+            logger.warning(f"[Ranking Stage 1] Skipping {len(jd_chunks) - len(searchable_jd_chunks)} empty or whitespace JD chunk(s).")
+        if logger.isEnabledFor(logging.DEBUG):
+            for jd_chunk_index, jd_chunk_text, jd_chunk_weight in searchable_jd_chunks:
+                logger.debug(f"[Ranking Stage 1 - Analysis] JD Chunk {jd_chunk_index+1}/{len(jd_chunks)} (Weight: {jd_chunk_weight}): '{jd_chunk_text[:150]}...'")
+        
+        # All JD chunks are embedded together and searched in one batched request; aggregation runs in memory afterwards
+        try:
+            all_cv_chunk_matches = await search_cv_chunks_batch(
+                query_texts=[jd_chunk_text for _, jd_chunk_text, _ in searchable_jd_chunks],
                 top_k=TOP_K_CV_CHUNKS_PER_JD_CHUNK, 
                 filter_by_doc_ids=active_cv_ids 
             )
+        except Exception:
+            jd_full_text_task.cancel()
+            raise
 
+        log_match_details = logger.isEnabledFor(logging.DEBUG)
+        for (jd_chunk_index, _, jd_chunk_weight), cv_chunk_matches in zip(searchable_jd_chunks, all_cv_chunk_matches):
             logger.info(f"[Ranking Stage 1] For JD Chunk {jd_chunk_index+1}, found {len(cv_chunk_matches)} CV chunk matches.")
 
-            for i, cv_match in enumerate(cv_chunk_matches):
+            for cv_match in cv_chunk_matches:
                 matched_cv_id = cv_match.get("original_doc_id")
+                cv_scores = cv_scores_aggregator.get(matched_cv_id)
+                if cv_scores is None:
+                    continue
                 match_score = cv_match.get("_score", 0.0)
+                weighted_score_contribution = match_score * match_score * jd_chunk_weight
+                cv_scores["total_score"] += weighted_score_contribution
+                cv_scores["match_count"] += 1
+                # Update the maximum weighted contribution if the current one is higher
+                if weighted_score_contribution > cv_scores["max_weighted_contribution"]:
+                    cv_scores["max_weighted_contribution"] = weighted_score_contribution
                 
-                if matched_cv_id and matched_cv_id in cv_scores_aggregator:
-                    weighted_score_contribution = (match_score ** 2) * jd_chunk_weight
-                    cv_scores_aggregator[matched_cv_id]["total_score"] += weighted_score_contribution
-                    cv_scores_aggregator[matched_cv_id]["match_count"] += 1
-                    # Update the maximum weighted contribution if the current one is higher
-                    if weighted_score_contribution > cv_scores_aggregator[matched_cv_id]["max_weighted_contribution"]:
-                        cv_scores_aggregator[matched_cv_id]["max_weighted_contribution"] = weighted_score_contribution
-                    
-                    # Log detailed match info for analysis
-                    logger.info(f"[Ranking Stage 1 - Analysis] Match for JD Chunk {jd_chunk_index+1} (Weight: {jd_chunk_weight}): "
-                                f"CV ID: {matched_cv_id} (File: {cv_scores_aggregator[matched_cv_id].get('filename', 'N/A')}), "
-                                f"Raw Score: {match_score:.4f}, Weighted Contribution: {weighted_score_contribution:.4f}, "
-                                f"CV Chunk Enriched Text: '{cv_match.get('enriched_text', '')[:100]}...'")
-
-                    if len(cv_scores_aggregator[matched_cv_id]["explanation_details"]) < 3: 
-                        cv_scores_aggregator[matched_cv_id]["explanation_details"].append(
-                            f"JD chunk {jd_chunk_index+1} (weight: {jd_chunk_weight}) matched CV (raw score: {match_score:.3f})"
-                        )
+                # Log detailed match info for analysis (hundreds of lines per ranking, so debug only)
+                if log_match_details:
+                    logger.debug(f"[Ranking Stage 1 - Analysis] Match for JD Chunk {jd_chunk_index+1} (Weight: {jd_chunk_weight}): "
+                                 f"CV ID: {matched_cv_id} (File: {cv_scores.get('filename', 'N/A')}), "
+                                 f"Raw Score: {match_score:.4f}, Weighted Contribution: {weighted_score_contribution:.4f}, "
+                                 f"CV Chunk Enriched Text: '{cv_match.get('enriched_text', '')[:100]}...'")
+
+                if len(cv_scores["explanation_details"]) < 3: 
+                    cv_scores["explanation_details"].append(
+                        f"JD chunk {jd_chunk_index+1} (weight: {jd_chunk_weight}) matched CV (raw score: {match_score:.3f})"
+                    )
         
         initial_ranked_cvs = []
         logger.info("[Ranking Stage 1 - Analysis] Final Aggregated Scores before primary sorting (by max_weighted_contribution):")
@@ -226,15 +326,15 @@ async def calculate_cv_ranking(
 
         if not top_cvs_for_llm_stage:
             logger.warning("No CVs found after initial vector ranking stage.")
+            jd_full_text_task.cancel()
             return []
 
     # --- Stage 2: LLM Reasoning for Top N CVs ---
-    async def _get_llm_reasoning_for_single_cv_task(cv_data_item: Dict[str, Any], jd_full_text: str, collection_name_cv: str) -> Dict[str, Any]:
+    async def _get_llm_reasoning_for_single_cv_task(cv_data_item: Dict[str, Any], jd_full_text: str, full_cv_text: Optional[str]) -> Dict[str, Any]:
         """Async helper to get LLM reasoning for one CV and augment its data."""
         cv_id = cv_data_item["cv_id"]
         augmented_cv_data_item = {**cv_data_item} # Work on a copy
 
-        full_cv_text = await get_full_cv_text(cv_id)
         if not full_cv_text:
             logger.error(f"Failed to get full CV text for {cv_id}. Skipping LLM reasoning for this CV.")
             augmented_cv_data_item["llm_skills_evaluation"] = ["Error: Could not retrieve full CV text."]
@@ -261,19 +361,48 @@ async def calculate_cv_ranking(
                 
         return augmented_cv_data_item
 
-    # Get full JD text for LLM reasoning
-    jd_full_text = await get_full_jd_text(current_jd_id)
+    # Get full JD text and all selected CV texts for LLM reasoning; CV texts come from one batched lookup
+    prefetched_cv_texts = prefetched_cv_texts or {}
+    cv_ids_to_fetch = [cv_data["cv_id"] for cv_data in top_cvs_for_llm_stage if cv_data["cv_id"] not in prefetched_cv_texts]
+    jd_full_text, fetched_cv_texts = await asyncio.gather(
+        jd_full_text_task,
+        get_full_cv_texts(cv_ids_to_fetch)
+    )
+    cv_texts = {**prefetched_cv_texts, **fetched_cv_texts}
     if not jd_full_text:
         logger.error(f"Failed to get full JD text for {current_jd_id}. Cannot perform LLM reasoning.")
         return top_cvs_for_llm_stage # Return the vector similarity results only
         
-    # Process each CV with LLM reasoning
-    llm_reasoning_tasks = []
-    for cv_data in top_cvs_for_llm_stage:
-        llm_reasoning_tasks.append(_get_llm_reasoning_for_single_cv_task(cv_data, jd_full_text, cv_collection_name))
-        
-    # Wait for all LLM reasoning tasks to complete
-    llm_augmented_cv_data = await asyncio.gather(*llm_reasoning_tasks)
+    # Process each CV with LLM reasoning; a stuck call must not hold up the rest of the batch
+    llm_reasoning_tasks = {
+        asyncio.create_task(_get_llm_reasoning_for_single_cv_task(cv_data, jd_full_text, cv_texts.get(cv_data["cv_id"]))): cv_data
+        for cv_data in top_cvs_for_llm_stage
+    }
+    augmented_by_cv_id: Dict[str, Dict[str, Any]] = {}
+    try:
+        for next_completed in asyncio.as_completed(llm_reasoning_tasks, timeout=RANKING_LLM_TIMEOUT_SECONDS):
+            augmented_cv_data_item = await next_completed
+            augmented_by_cv_id[augmented_cv_data_item["cv_id"]] = augmented_cv_data_item
+    except asyncio.TimeoutError:
+        logger.error(f"LLM reasoning did not finish within {RANKING_LLM_TIMEOUT_SECONDS}s for "
+                     f"{len(top_cvs_for_llm_stage) - len(augmented_by_cv_id)} CV(s); ranking them without it.")
+
+    llm_augmented_cv_data = []
+    for task, cv_data in llm_reasoning_tasks.items():
+        augmented_cv_data_item = augmented_by_cv_id.get(cv_data["cv_id"])
+        if augmented_cv_data_item is None and task.done() and not task.cancelled():
+            augmented_cv_data_item = task.result()
+        if augmented_cv_data_item is None:
+            task.cancel()
+            augmented_cv_data_item = {
+                **cv_data,
+                "llm_skills_evaluation": ["Error: LLM reasoning timed out."],
+                "llm_experience_evaluation": [],
+                "llm_additional_points": [],
+                "llm_overall_assessment": "N/A: LLM reasoning timed out.",
+                "llm_ranking_score": 0.0
+            }
+        llm_augmented_cv_data.append(augmented_cv_data_item)
     
     # Sort by LLM ranking score (descending)
     final_ranked_cvs = sorted(llm_augmented_cv_data, key=lambda x: x.get("llm_ranking_score", 0.0), reverse=True)
@@ -0,0 +1,167 @@
+"""
+In-process caching utilities for Smart Recruit.
+
+This module provides:
+1. An async TTL/LRU cache that deduplicates concurrent computations of the same key
+2. Document-based invalidation across every cache instance
+"""
+
+import asyncio
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Every AsyncTTLCache registers itself here so document updates can invalidate all of them
+_registered_caches: "weakref.WeakSet[AsyncTTLCache]" = weakref.WeakSet()
+
+class AsyncTTLCache:
+    """
+    Bounded LRU cache with per-entry expiry for results of async computations.
+
+    Entries can be tagged with the document IDs they were derived from, so that
+    re-uploading a JD or CV drops every cached result that depends on it.
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl_seconds: float = 3600):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any, Tuple[str, ...]]]" = OrderedDict()
+        self._keys_by_doc_id: Dict[str, Set[Hashable]] = {}
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        _registered_caches.add(self)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Return the cached value for key, or None if it is missing or expired.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached value or None
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value, _ = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, doc_ids: Iterable[str] = ()) -> None:
+        """
+        Store value under key, evicting the least recently used entry if full.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            doc_ids: IDs of the documents the value was derived from
+        """
+        if key in self._entries:
+            self._remove(key)
+        doc_ids = tuple(doc_ids)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value, doc_ids)
+        for doc_id in doc_ids:
+            self._keys_by_doc_id.setdefault(doc_id, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            self._remove(next(iter(self._entries)))
+
+    async def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], Awaitable[Any]],
+        doc_ids: Iterable[str] = (),
+        should_cache: Callable[[Any], bool] = lambda value: value is not None
+    ) -> Any:
+        """
+        Return the cached value for key, computing and storing it on a miss.
+        Concurrent callers for the same key share a single computation.
+
+        Args:
+            key: Cache key
+            compute: Zero-argument coroutine function producing the value
+            doc_ids: IDs of the documents the value is derived from
+            should_cache: Predicate deciding whether a computed value is stored
+
+        Returns:
+            The cached or freshly computed value
+        """
+        value = self.get(key)
+        if value is not None:
+            logger.debug(f"Cache '{self.name}' hit for key {key!r}")
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await compute()
+            # Only store if no invalidation for this key happened while computing
+            if self._inflight.get(key) is future and should_cache(value):
+                self.set(key, value, doc_ids)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            # Avoid "exception was never retrieved" warnings when nobody else awaited
+            future.exception()
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def invalidate_doc(self, doc_id: str) -> int:
+        """
+        Drop every entry derived from the given document.
+
+        Args:
+            doc_id: Document ID whose dependent entries should be removed
+
+        Returns:
+            Number of entries removed
+        """
+        keys = self._keys_by_doc_id.pop(doc_id, set())
+        for key in keys:
+            self._remove(key)
+            self._inflight.pop(key, None)
+        return len(keys)
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._entries.clear()
+        self._keys_by_doc_id.clear()
+        self._inflight.clear()
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for doc_id in entry[2]:
+            keys = self._keys_by_doc_id.get(doc_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_doc_id[doc_id]
+
+def invalidate_document(doc_id: str) -> None:
+    """
+    Drop cached results derived from a document from every registered cache.
+    Call whenever a JD or CV is (re-)written to the database.
+
+    Args:
+        doc_id: The original_doc_id of the document that changed
+    """
+    removed = sum(cache.invalidate_doc(doc_id) for cache in list(_registered_caches))
+    if removed:
+        logger.info(f"Invalidated {removed} cached result(s) for document '{doc_id}'")
@@ -6,18 +6,180 @@ This module provides:
 2. File content extraction and conversion
 """
 
+import asyncio
 import base64
+import codecs
+import functools
 import io
-from typing import Dict, Optional, Union
-import docx
+import os
+import zipfile
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from xml.etree import ElementTree
 import magic
 from fastapi import UploadFile
+try:
+    # SIMD base64 kernels; several times faster than the stdlib on multi-MB PDFs
+    import pybase64
+except ImportError:
+    pybase64 = None
 
 from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
-async def process_uploaded_file_content(file: UploadFile) -> Dict[str, Optional[Union[str, bytes]]]:
+# Supported file types recognised by extension without running libmagic
+MIME_TYPES_BY_EXTENSION = {
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".txt": "text/plain",
+    ".md": "text/markdown",
+}
+SUPPORTED_MIME_TYPES = frozenset(MIME_TYPES_BY_EXTENSION.values())
+# File signatures sit in the header; libmagic only needs the start of the file
+MIME_SNIFF_BYTES = 8192
+# Leading bytes checked for UTF-8 validity before decoding a whole text file
+TEXT_SNIFF_BYTES = 4096
+
+# WordprocessingML element tags read by extract_docx_text
+_WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_DOCX_PARAGRAPH = _WORD_NS + "p"
+_DOCX_RUN = _WORD_NS + "r"
+_DOCX_TEXT = _WORD_NS + "t"
+_DOCX_RUN_BREAKS = {_WORD_NS + "tab": "\t", _WORD_NS + "br": "\n", _WORD_NS + "cr": "\n"}
+# Alternate rendering of content that is also present in mc:Choice; skipped to avoid duplicate text
+_MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+
+@dataclass(frozen=True, slots=True)
+class ProcessedFile:
+    """Content extracted from an uploaded or downloaded file, ready for the DB and LLM layers"""
+    filename: Optional[str]
+    raw_text_content: Optional[str] = None
+    base64_content: Optional[str] = None
+    content_type: Optional[str] = None
+    error: Optional[str] = None
+    # Set for files fetched from S3
+    s3_uri: Optional[str] = None
+    bucket: Optional[str] = None
+    key: Optional[str] = None
+    file_size_mb: Optional[float] = None
+    mime_type: Optional[str] = None
+
+def detect_mime_type(contents: bytes, filename: Optional[str], declared_type: Optional[str] = None) -> str:
+    """
+    Determine a file's MIME type from the type declared by its source (HTTP Content-Type,
+    S3 ContentType) or its extension, sniffing the content with libmagic only when
+    neither is one of the supported types.
+    
+    Args:
+        contents: Raw file bytes
+        filename: Original filename, if known
+        declared_type: Content type reported by the server or object store, if any
+        
+    Returns:
+        MIME type string
+    """
+    if declared_type:
+        declared_type = declared_type.partition(';')[0].strip().lower()
+        if declared_type in SUPPORTED_MIME_TYPES:
+            return declared_type
+    extension = os.path.splitext(filename.lower())[1] if filename else ""
+    mime_type = MIME_TYPES_BY_EXTENSION.get(extension)
+    if mime_type is None:
+        # libmagic needs a real bytes object; downloads may arrive as a bytearray
+        mime_type = _sniff_mime_type(bytes(contents[:MIME_SNIFF_BYTES]))
+    return mime_type
+
+@functools.lru_cache(maxsize=256)
+def _sniff_mime_type(prefix: bytes) -> str:
+    """libmagic detection on a file's leading bytes, cached so repeat uploads of the same file skip it."""
+    return magic.from_buffer(prefix, mime=True)
+
+def decode_text_file(contents: bytes) -> Tuple[str, str]:
+    """
+    Decode text file bytes as UTF-8 (dropping a BOM), or as Latin-1 if they are not valid UTF-8.
+    Latin-1 maps every byte, so the fallback cannot fail and no second error path is needed.
+    Pure-ASCII files (the common case) take a single scan, and files whose first bytes are
+    already invalid UTF-8 go straight to Latin-1 without a full failed UTF-8 decode.
+    
+    Args:
+        contents: Raw file bytes
+        
+    Returns:
+        (text, encoding used)
+    """
+    if contents.isascii():
+        return contents.decode('ascii'), 'utf-8'
+    try:
+        # An incremental decoder tolerates a multi-byte character cut off at the end of the sample
+        codecs.getincrementaldecoder('utf-8')().decode(contents[:TEXT_SNIFF_BYTES], final=False)
+        return contents.decode('utf-8-sig'), 'utf-8'
+    except UnicodeDecodeError:
+        return contents.decode('latin-1'), 'latin-1'
+
+def extract_docx_text(contents: bytes) -> str:
+    """
+    Extract the text of a DOCX file, one line per non-empty paragraph (table cells included).
+    Streams word/document.xml straight out of the zip instead of building python-docx's
+    object model of styles, numbering and sections.
+    
+    Args:
+        contents: Raw DOCX file bytes
+        
+    Returns:
+        Paragraph texts joined with newlines
+        
+    Raises:
+        zipfile.BadZipFile, KeyError, ElementTree.ParseError: If the file is not a readable DOCX
+    """
+    paragraphs: List[str] = []
+    open_paragraphs: List[List[str]] = []
+    run_depth = 0
+    fallback_depth = 0
+    with zipfile.ZipFile(io.BytesIO(contents)) as archive, archive.open("word/document.xml") as document_xml:
+        for event, element in ElementTree.iterparse(document_xml, events=("start", "end")):
+            tag = element.tag
+            if event == "start":
+                if tag == _DOCX_PARAGRAPH:
+                    open_paragraphs.append([])
+                elif tag == _DOCX_RUN:
+                    run_depth += 1
+                elif tag == _MC_FALLBACK:
+                    fallback_depth += 1
+            elif tag == _DOCX_PARAGRAPH:
+                paragraph_text = "".join(open_paragraphs.pop())
+                if paragraph_text and not fallback_depth:
+                    paragraphs.append(paragraph_text)
+                element.clear()
+            elif tag == _DOCX_RUN:
+                run_depth -= 1
+            elif tag == _MC_FALLBACK:
+                fallback_depth -= 1
+            elif run_depth and open_paragraphs and not fallback_depth:
+                # Only run content counts; w:tab also appears as a tab-stop definition in paragraph properties
+                if tag == _DOCX_TEXT:
+                    open_paragraphs[-1].append(element.text or "")
+                elif tag in _DOCX_RUN_BREAKS:
+                    open_paragraphs[-1].append(_DOCX_RUN_BREAKS[tag])
+    return "\n".join(paragraphs)
+
+def encode_base64(data: bytes) -> str:
+    """
+    Base64-encode file bytes for LLM request bodies, the only consumer that needs base64.
+    Uses pybase64 when installed, which also builds the str directly without an
+    intermediate bytes copy; otherwise the stdlib with the cheaper ASCII decode.
+    
+    Args:
+        data: Raw file bytes
+        
+    Returns:
+        Base64-encoded string
+    """
+    if pybase64 is not None:
+        return pybase64.b64encode_as_string(data)
+    return base64.b64encode(data).decode('ascii')
+
+async def process_uploaded_file_content(file: UploadFile) -> ProcessedFile:
     """
     Process an uploaded file and extract its content.
     
@@ -25,69 +187,124 @@ async def process_uploaded_file_content(file: UploadFile) -> Dict[str, Optional[
         file: FastAPI UploadFile object
         
     Returns:
-        Dictionary containing:
+        ProcessedFile containing:
         - raw_text_content: Extracted text content if available
         - base64_content: Base64-encoded content if text extraction not possible
         - content_type: MIME type of the file
         - filename: Original filename
         - error: Error message if processing failed
     """
+    # Read once; nothing downstream re-reads the upload, so the stream is not rewound
     contents = await file.read()
-    await file.seek(0) 
 
-    mime_type = magic.from_buffer(contents, mime=True)
-    logger.info(f"Detected MIME type for {file.filename}: {mime_type}")
+    # MIME sniffing, DOCX parsing and base64 encoding are CPU-bound; keep them off the event loop
+    return await asyncio.to_thread(_extract_file_content, contents, file.filename)
 
+def _extract_file_content(contents: bytes, filename: Optional[str]) -> ProcessedFile:
+    """
+    Extract text or base64 content from raw file bytes. Blocking; see process_uploaded_file_content.
+    
+    Args:
+        contents: Raw file bytes
+        filename: Original filename, used for DOCX detection and logging
+        
+    Returns:
+        ProcessedFile in the same format as process_uploaded_file_content
+    """
+    mime_type = detect_mime_type(contents, filename)
+    logger.info(f"Detected MIME type for {filename}: {mime_type}")
+    return ProcessedFile(filename=filename, **process_binary_content(contents, filename, mime_type))
+
+def process_binary_content(file_bytes: bytes, filename: Optional[str], mime_type: str) -> Dict[str, Optional[str]]:
+    """
+    Extract text (DOCX, plain text, markdown) or base64 content (PDF and anything else) from file bytes.
+    Shared by the upload, S3 and URL handlers. Blocking; call it off the event loop.
+    
+    Args:
+        file_bytes: Raw file bytes
+        filename: Original filename, used for DOCX detection and logging
+        mime_type: MIME type from detect_mime_type
+        
+    Returns:
+        Dict with raw_text_content, base64_content, content_type and error
+    """
     raw_text_content: Optional[str] = None
     base64_content_str: Optional[str] = None
-
-    if mime_type == "application/pdf":
-        base64_content_str = base64.b64encode(contents).decode('utf-8')
-    elif mime_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document" or \
-         (mime_type == "application/zip" and file.filename and file.filename.lower().endswith('.docx')):
-        if mime_type == "application/zip":
-            logger.info(f"MIME type detected as 'application/zip' for {file.filename}, but attempting DOCX parse due to .docx extension.")
-        try:
-            doc = docx.Document(io.BytesIO(contents))
-            extracted_text = "\\\\n".join([para.text for para in doc.paragraphs])
-            if not extracted_text.strip(): # Check if extracted text is blank
-                logger.warning(f"No text content found in DOCX paragraphs for {file.filename}. It might be image-only or text in unsupported elements.")
-                return {"error": f"No text content found in DOCX paragraphs for {file.filename}. The document might be image-only or text is in elements not directly parseable as paragraphs.", "filename": file.filename, "raw_text_content": None, "base64_content": None, "content_type": "application/vnd.openxmlformats-officedocument.wordprocessingml.document"}
-
-            raw_text_content = extracted_text # Assign if not blank
-            logger.info(f"Successfully extracted text from DOCX: {file.filename}")
-            # Ensure the content_type reflects that we are treating it as docx for text extraction
-            mime_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document" 
-        except Exception as e:
-            logger.error(f"Error processing DOCX file {file.filename} (even after specific check): {e}", exc_info=True)
-            # Fallback to base64 if DOCX parsing fails for a .docx file
-            logger.warning(f"Falling back to base64 for {file.filename} after DOCX parsing attempt failed.")
-            base64_content_str = base64.b64encode(contents).decode('utf-8')
-            mime_type = "application/octet-stream" # Fallback MIME type
-            raw_text_content = None # Ensure raw_text is None if fallback happens
-    elif mime_type in ["text/plain", "text/markdown"]:
-        try:
-            raw_text_content = contents.decode('utf-8')
-            logger.info(f"Successfully read text from {mime_type} file: {file.filename}")
-        except UnicodeDecodeError:
+    
+    try:
+        if mime_type == "application/pdf":
+            base64_content_str = encode_base64(file_bytes)
+            
+        elif mime_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document" or \
+             (mime_type == "application/zip" and filename and filename.lower().endswith('.docx')):
+            
+            if mime_type == "application/zip":
+                logger.info(f"MIME type detected as 'application/zip' for {filename}, but attempting DOCX parse due to .docx extension.")
+            
             try:
-                raw_text_content = contents.decode('latin-1') # Fallback
-                logger.info(f"Successfully read text (latin-1) from {mime_type} file: {file.filename}")
-            except UnicodeDecodeError as ude_fallback:
-                logger.error(f"Fallback decoding error for {file.filename}: {ude_fallback}", exc_info=True)
-                return {"error": f"Could not decode text file {file.filename}. Ensure it is UTF-8 or Latin-1 encoded.", "filename": file.filename, "raw_text_content": None, "base64_content": None, "content_type": mime_type}
-    else:
-        logger.warning(f"Unsupported or ambiguous file type: {mime_type} for file {file.filename}. Attempting base64 encoding as a fallback.")
-        base64_content_str = base64.b64encode(contents).decode('utf-8')
-        mime_type = "application/octet-stream" # Generic for LLM if it can handle it as image/pdf
+                extracted_text = extract_docx_text(file_bytes)
+                
+                if not extracted_text.strip():
+                    logger.warning(f"No text content found in DOCX paragraphs for {filename}.")
+                    return {
+                        "error": f"No text content found in DOCX paragraphs for {filename}. The document might be image-only or text is in elements not directly parseable as paragraphs.",
+                        "raw_text_content": None,
+                        "base64_content": None,
+                        "content_type": "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+                    }
+                
+                raw_text_content = extracted_text
+                logger.info(f"Successfully extracted text from DOCX: {filename}")
+                # Ensure the content_type reflects that we are treating it as docx for text extraction
+                mime_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+                
+            except Exception as e:
+                logger.error(f"Error processing DOCX file {filename}: {e}", exc_info=True)
+                logger.warning(f"Falling back to base64 for {filename} after DOCX parsing attempt failed.")
+                base64_content_str = encode_base64(file_bytes)
+                mime_type = "application/octet-stream"
+                raw_text_content = None
+                
+        elif mime_type in ["text/plain", "text/markdown"]:
+            raw_text_content, encoding = decode_text_file(file_bytes)
+            logger.info(f"Successfully read text ({encoding}) from {mime_type} file: {filename}")
+        else:
+            logger.warning(f"Unsupported or ambiguous file type: {mime_type} for file {filename}. Attempting base64 encoding as a fallback.")
+            base64_content_str = encode_base64(file_bytes)
+            mime_type = "application/octet-stream"
         
-    return {
-        "raw_text_content": raw_text_content,
-        "base64_content": base64_content_str,
-        "content_type": mime_type,
-        "filename": file.filename,
-        "error": None
-    }
+        return {
+            "raw_text_content": raw_text_content,
+            "base64_content": base64_content_str,
+            "content_type": mime_type,
+            "error": None
+        }
+        
+    except Exception as e:
+        logger.error(f"Error processing file content for {filename}: {e}")
+        return {
+            "error": f"Error processing file content: {str(e)}",
+            "raw_text_content": None,
+            "base64_content": None,
+            "content_type": mime_type
+        }
+
+def detect_and_process_binary_content(file_bytes: bytes, filename: Optional[str], declared_type: Optional[str] = None) -> Tuple[str, Dict[str, Optional[str]]]:
+    """
+    Detect the MIME type of downloaded file bytes and extract their content.
+    Shared by the S3 and URL handlers. Blocking; call it off the event loop.
+    
+    Args:
+        file_bytes: Raw file bytes
+        filename: Original filename
+        declared_type: Content type reported by the source, if any
+        
+    Returns:
+        Tuple of (detected MIME type, process_binary_content result)
+    """
+    mime_type = detect_mime_type(file_bytes, filename, declared_type)
+    logger.info(f"Detected MIME type for {filename}: {mime_type}")
+    return mime_type, process_binary_content(file_bytes, filename, mime_type)
 
 def encode_file_to_base64(file_path: str) -> str:
     """
@@ -105,8 +322,7 @@ def encode_file_to_base64(file_path: str) -> str:
     """
     try:
         with open(file_path, 'rb') as f:
-            file_content = f.read()
-            return base64.b64encode(file_content).decode('utf-8')
+            return encode_base64(f.read())
     except FileNotFoundError:
         logger.error(f"File not found: {file_path}")
         raise
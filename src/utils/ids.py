@@ -0,0 +1,70 @@
+"""
+ID generation utilities for Smart Recruit.
+
+This module provides:
+1. Batched UUID4 generation from a single random read
+2. Batched time-ordered UUID7 generation for vector DB point IDs
+3. Deterministic chunk point IDs derived from a document ID
+"""
+
+import os
+import time
+import uuid
+from typing import List
+
+# Namespace for the name-based (version 5) UUIDs of document chunk points
+_CHUNK_POINT_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "smart-recruit/chunk-points")
+
+def generate_uuid4_batch(count: int) -> List[str]:
+    """
+    Generate several random (version 4) UUID strings from one os.urandom call.
+    
+    Args:
+        count: Number of UUIDs to generate
+        
+    Returns:
+        List of UUID strings in canonical hyphenated form
+    """
+    if count <= 0:
+        return []
+    random_bytes = os.urandom(16 * count)
+    return [str(uuid.UUID(bytes=random_bytes[i:i + 16], version=4)) for i in range(0, 16 * count, 16)]
+
+def generate_uuid7_batch(count: int) -> List[str]:
+    """
+    Generate several time-ordered (version 7) UUID strings from one os.urandom call.
+    IDs share the current millisecond timestamp and carry their position in the batch
+    in the 12-bit rand_a field, so they sort in generation order and insert into the
+    vector DB's ID index in order.
+    
+    Args:
+        count: Number of UUIDs to generate (IDs beyond 4096 wrap the in-batch sequence)
+        
+    Returns:
+        List of UUID strings in canonical hyphenated form
+    """
+    if count <= 0:
+        return []
+    timestamp_ms = (time.time_ns() // 1_000_000) & 0xFFFF_FFFF_FFFF
+    random_bytes = os.urandom(8 * count)
+    uuids = []
+    for i in range(count):
+        rand_b = int.from_bytes(random_bytes[8 * i:8 * i + 8], "big") & 0x3FFF_FFFF_FFFF_FFFF
+        value = (timestamp_ms << 80) | (0x7 << 76) | ((i & 0xFFF) << 64) | (0b10 << 62) | rand_b
+        uuids.append(str(uuid.UUID(int=value)))
+    return uuids
+
+def generate_chunk_point_ids(doc_id: str, count: int) -> List[str]:
+    """
+    Generate the point IDs of a document's chunks. The IDs depend only on the document
+    ID and each chunk's index, so re-storing a document (e.g. retrying a failed write)
+    overwrites its existing chunk points instead of adding duplicates.
+    
+    Args:
+        doc_id: The original_doc_id of the document
+        count: Number of chunks
+        
+    Returns:
+        List of UUID strings, one per chunk index
+    """
+    return [str(uuid.uuid5(_CHUNK_POINT_NAMESPACE, f"{doc_id}:{chunk_index}")) for chunk_index in range(count)]
@@ -4,12 +4,17 @@ Logging utilities for Smart Recruit.
 This module provides:
 1. Logging configuration
 2. Logger factory function
+
+Records are handed to a queue and written by a background listener thread,
+so logging calls on the asyncio event loop never block on file or console I/O.
 """
 
+import atexit
 import os
 import logging
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 # Set the desired log directory
 LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "logs")
@@ -48,9 +53,13 @@ root_logger.setLevel(logging.INFO)
 for handler in root_logger.handlers[:]:
     root_logger.removeHandler(handler)
 
-# Add the handlers
-root_logger.addHandler(file_handler)
-root_logger.addHandler(console_handler)
+# Add the handlers behind a queue; the listener thread formats and writes the records
+log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+root_logger.addHandler(QueueHandler(log_queue))
+log_listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+log_listener.start()
+# Flush queued records on interpreter exit
+atexit.register(log_listener.stop)
 
 def get_logger(name):
     """
@@ -73,5 +82,5 @@ def set_log_level(level):
         level: Logging level (e.g., logging.INFO, logging.DEBUG)
     """
     root_logger.setLevel(level)
-    for handler in root_logger.handlers:
+    for handler in (*root_logger.handlers, file_handler, console_handler):
         handler.setLevel(level) 
\ No newline at end of file
@@ -0,0 +1,44 @@
+"""
+Retry helpers for Smart Recruit.
+
+This module provides:
+1. Exponential backoff delays with jitter
+2. Classification of errors that should not be retried
+"""
+
+import random
+
+# Client errors that are still worth retrying: request timeout and rate limiting
+RETRYABLE_CLIENT_STATUS_CODES = {408, 429}
+
+def backoff_delay(attempt: int, base_delay_seconds: float, max_delay_seconds: float = 30) -> float:
+    """
+    Compute the delay before the next attempt using exponential backoff with jitter.
+    Jitter keeps concurrent callers that failed together from retrying in lockstep.
+    
+    Args:
+        attempt: Zero-based index of the attempt that just failed
+        base_delay_seconds: Delay for the first retry before jitter
+        max_delay_seconds: Upper bound on the delay
+        
+    Returns:
+        Delay in seconds
+    """
+    return min(max_delay_seconds, (2 ** attempt) * base_delay_seconds * (0.5 + random.random()))
+
+def is_retryable_error(error: BaseException) -> bool:
+    """
+    Decide whether an exception is worth retrying.
+    Exceptions carrying an HTTP 4xx status (LLM provider, Qdrant) other than 408/429
+    indicate a bad request that will fail the same way again.
+    
+    Args:
+        error: The exception raised by the failed attempt
+        
+    Returns:
+        False for non-retryable client errors, True otherwise
+    """
+    status_code = getattr(error, "status_code", None)
+    if isinstance(status_code, int) and 400 <= status_code < 500:
+        return status_code in RETRYABLE_CLIENT_STATUS_CODES
+    return True
@@ -1,13 +1,23 @@
+import asyncio
+import re
 import boto3
-import base64
-import magic
+from botocore.config import Config
 from urllib.parse import urlparse
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Tuple
 from src.utils.logging import get_logger
+from src.utils.file_handler import ProcessedFile, detect_and_process_binary_content
 from config import get_s3_config
 
 logger = get_logger(__name__)
 
+# Objects larger than one part are downloaded as parallel byte-range GETs
+S3_RANGE_PART_SIZE = 8 * 1024 * 1024
+S3_RANGE_CONCURRENCY = 8
+# Bodies are read in chunks of this size directly into the destination buffer
+S3_STREAM_CHUNK_SIZE = 1024 * 1024
+# s3://bucket/key, with a non-empty bucket and key
+_S3_URI_RE = re.compile(r'\As3://([^/]+)/(.+)\Z', re.DOTALL)
+
 class S3Handler:
     """Handler for S3 operations with direct memory processing"""
     
@@ -21,8 +31,17 @@ class S3Handler:
             # 4. ~/.aws/credentials file
             # 5. EC2 instance metadata
             region = self.s3_config.get("region", "ap-south-1")
+            # One client is shared by every download thread; size its pool for the parallel
+            # ranged GETs of concurrent uploads so connections are reused, not discarded
+            client_config = Config(
+                region_name=region,
+                max_pool_connections=self.s3_config.get("max_pool_connections", 64),
+                retries={"max_attempts": 5, "mode": "adaptive"},
+                tcp_keepalive=True,
+                s3={"use_accelerate_endpoint": self.s3_config.get("use_accelerate_endpoint", False)},
+            )
             
-            self.s3_client = boto3.client('s3', region_name=region)
+            self.s3_client = boto3.client('s3', config=client_config)
             logger.info(f"S3 handler initialized in region '{region}' using AWS credential chain")
                 
         except Exception as e:
@@ -32,21 +51,13 @@ class S3Handler:
     def parse_s3_uri(self, s3_uri: str) -> Dict[str, str]:
         """Parse S3 URI and extract bucket and key components"""
         try:
-            if not s3_uri.startswith('s3://'):
+            match = _S3_URI_RE.match(s3_uri)
+            if not match:
                 raise ValueError(f"Invalid S3 URI. Expected format: s3://bucket-name/key. Got: {s3_uri}")
-            
-            # Remove s3:// prefix and split
-            path_part = s3_uri[5:]  # Remove 's3://'
-            if '/' not in path_part:
-                raise ValueError(f"Invalid S3 URI format. Missing key after bucket name: {s3_uri}")
-            
-            bucket_name, key = path_part.split('/', 1)
-            
-            if not bucket_name or not key:
-                raise ValueError(f"Invalid S3 URI format. Bucket or key is empty: {s3_uri}")
+            bucket_name, key = match.groups()
             
             # Extract filename from key
-            filename = key.split('/')[-1] if '/' in key else key
+            filename = key.rpartition('/')[2]
             
             return {
                 "bucket": bucket_name,
@@ -58,10 +69,10 @@ class S3Handler:
             logger.error(f"Failed to parse S3 URI '{s3_uri}': {e}")
             raise ValueError(f"Invalid S3 URI format: {e}")
     
-    async def get_file_from_s3(self, s3_uri: str) -> Dict[str, Any]:
+    async def get_file_from_s3(self, s3_uri: str) -> ProcessedFile:
         """
         Download file from S3 directly into memory and process it
-        Returns dict with file content, metadata, and processing info
+        Returns ProcessedFile with file content, S3 metadata, and processing info
         """
         try:
             s3_info = self.parse_s3_uri(s3_uri)
@@ -71,17 +82,17 @@ class S3Handler:
             
             logger.info(f"Fetching file from S3: {s3_uri}")
             
-            # Check if object exists and get metadata
+            # The first GET covers the object's first part and reports its total size,
+            # so no separate HEAD round trip is needed to check it exists
             try:
-                response = self.s3_client.head_object(Bucket=bucket, Key=key)
-                file_size_bytes = response['ContentLength']
+                first_part_response, file_size_bytes = await asyncio.to_thread(self._get_first_part, bucket, key)
                 file_size_mb = file_size_bytes / (1024 * 1024)
                     
             except self.s3_client.exceptions.NoSuchKey:
                 raise ValueError(f"File not found in S3: {s3_uri}")
             except self.s3_client.exceptions.ClientError as e:
                 error_code = e.response['Error']['Code']
-                if error_code == 'Forbidden' or error_code == '403':
+                if error_code in ('Forbidden', '403', 'AccessDenied'):
                     raise ValueError(f"Access denied to S3 object: {s3_uri}. Please check AWS credentials and bucket permissions.")
                 elif error_code == 'InvalidAccessKeyId':
                     raise ValueError(f"Invalid AWS access key. Please check AWS credentials configuration.")
@@ -94,113 +105,88 @@ class S3Handler:
             
             # Download file content to memory
             try:
-                response = self.s3_client.get_object(Bucket=bucket, Key=key)
-                file_bytes = response['Body'].read()
+                file_bytes = await self._download_object(bucket, key, first_part_response, file_size_bytes)
                 
             except Exception as e:
                 raise ValueError(f"Error downloading file from S3: {e}")
             
-            # Detect MIME type
-            mime_type = magic.from_buffer(file_bytes, mime=True)
-            logger.info(f"Detected MIME type for {filename}: {mime_type}")
+            # MIME sniffing, DOCX parsing and base64 encoding are CPU-bound; keep them off the event loop.
+            # Only one of raw text or base64 is produced, and the downloaded bytes are released on return.
+            mime_type, processed_content = await asyncio.to_thread(detect_and_process_binary_content, file_bytes, filename, first_part_response.get('ContentType'))
+            del file_bytes
             
-            # Process file content using same logic as other handlers
-            processed_content = await self._process_s3_file_content(file_bytes, filename, mime_type)
-            
-            return {
-                "filename": filename,
-                "s3_uri": s3_uri,
-                "bucket": bucket,
-                "key": key,
-                "file_size_mb": file_size_mb,
-                "mime_type": mime_type,
+            return ProcessedFile(
+                filename=filename,
+                s3_uri=s3_uri,
+                bucket=bucket,
+                key=key,
+                file_size_mb=file_size_mb,
+                mime_type=mime_type,
                 **processed_content
-            }
+            )
             
         except Exception as e:
             logger.error(f"Error fetching file from S3 '{s3_uri}': {e}")
             raise
     
-    async def _process_s3_file_content(self, file_bytes: bytes, filename: str, mime_type: str) -> Dict[str, Optional[str]]:
+    def _get_first_part(self, bucket: str, key: str) -> Tuple[Dict[str, Any], int]:
         """
-        Process S3 file content similar to existing handlers
-        Returns dict with raw_text_content, base64_content, content_type, and error
+        Blocking GET of the first S3_RANGE_PART_SIZE bytes of an object.
+        Returns the response (body not yet read) and the object's total size from Content-Range.
         """
-        raw_text_content: Optional[str] = None
-        base64_content_str: Optional[str] = None
-        
         try:
-            if mime_type == "application/pdf":
-                base64_content_str = base64.b64encode(file_bytes).decode('utf-8')
-                
-            elif mime_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document" or \
-                 (mime_type == "application/zip" and filename.lower().endswith('.docx')):
-                
-                if mime_type == "application/zip":
-                    logger.info(f"MIME type detected as 'application/zip' for {filename}, but attempting DOCX parse due to .docx extension.")
-                
-                try:
-                    import docx
-                    import io
-                    doc = docx.Document(io.BytesIO(file_bytes))
-                    extracted_text = "\\n".join([para.text for para in doc.paragraphs])
-                    
-                    if not extracted_text.strip():
-                        logger.warning(f"No text content found in DOCX paragraphs for {filename}.")
-                        return {
-                            "error": f"No text content found in DOCX paragraphs for {filename}. The document might be image-only or text is in elements not directly parseable as paragraphs.",
-                            "raw_text_content": None,
-                            "base64_content": None,
-                            "content_type": "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                        }
-                    
-                    raw_text_content = extracted_text
-                    logger.info(f"Successfully extracted text from DOCX: {filename}")
-                    mime_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                    
-                except Exception as e:
-                    logger.error(f"Error processing DOCX file {filename}: {e}")
-                    logger.warning(f"Falling back to base64 for {filename} after DOCX parsing attempt failed.")
-                    base64_content_str = base64.b64encode(file_bytes).decode('utf-8')
-                    mime_type = "application/octet-stream"
-                    raw_text_content = None
-                    
-            elif mime_type in ["text/plain", "text/markdown"]:
-                try:
-                    raw_text_content = file_bytes.decode('utf-8')
-                    logger.info(f"Successfully read text from {mime_type} file: {filename}")
-                except UnicodeDecodeError:
-                    try:
-                        raw_text_content = file_bytes.decode('latin-1')
-                        logger.info(f"Successfully read text (latin-1) from {mime_type} file: {filename}")
-                    except UnicodeDecodeError as ude_fallback:
-                        logger.error(f"Fallback decoding error for {filename}: {ude_fallback}")
-                        return {
-                            "error": f"Could not decode text file {filename}. Ensure it is UTF-8 or Latin-1 encoded.",
-                            "raw_text_content": None,
-                            "base64_content": None,
-                            "content_type": mime_type
-                        }
-            else:
-                logger.warning(f"Unsupported or ambiguous file type: {mime_type} for file {filename}. Attempting base64 encoding as a fallback.")
-                base64_content_str = base64.b64encode(file_bytes).decode('utf-8')
-                mime_type = "application/octet-stream"
-            
-            return {
-                "raw_text_content": raw_text_content,
-                "base64_content": base64_content_str,
-                "content_type": mime_type,
-                "error": None
-            }
-            
-        except Exception as e:
-            logger.error(f"Error processing S3 file content for {filename}: {e}")
-            return {
-                "error": f"Error processing file content: {str(e)}",
-                "raw_text_content": None,
-                "base64_content": None,
-                "content_type": mime_type
-            }
+            response = self.s3_client.get_object(Bucket=bucket, Key=key, Range=f"bytes=0-{S3_RANGE_PART_SIZE - 1}")
+        except self.s3_client.exceptions.ClientError as e:
+            # S3 rejects any byte range on an empty object
+            if e.response['Error']['Code'] != 'InvalidRange':
+                raise
+            response = self.s3_client.get_object(Bucket=bucket, Key=key)
+        content_range = response.get('ContentRange')
+        size_bytes = int(content_range.rpartition('/')[2]) if content_range else response['ContentLength']
+        return response, size_bytes
+    
+    def _stream_body_into(self, body: Any, buffer: bytearray, start: int, end: int) -> None:
+        """Blocking: stream a GET response body straight into buffer[start:end + 1]"""
+        view = memoryview(buffer)
+        offset = start
+        for chunk in body.iter_chunks(chunk_size=S3_STREAM_CHUNK_SIZE):
+            chunk_end = offset + len(chunk)
+            if chunk_end > end + 1:
+                raise ValueError(f"Object grew while downloading bytes {start}-{end}")
+            view[offset:chunk_end] = chunk
+            offset = chunk_end
+        if offset != end + 1:
+            raise ValueError(f"Short read for bytes {start}-{end}: got {offset - start} bytes")
+    
+    def _read_object_into(self, bucket: str, key: str, buffer: bytearray, start: int, end: int) -> None:
+        """Blocking ranged GET of bytes start..end (inclusive) of an object, streamed into buffer[start:end + 1]"""
+        response = self.s3_client.get_object(Bucket=bucket, Key=key, Range=f"bytes={start}-{end}")
+        self._stream_body_into(response['Body'], buffer, start, end)
+    
+    async def _download_object(self, bucket: str, key: str, first_part_response: Dict[str, Any], size_bytes: int) -> bytearray:
+        """
+        Download an object into memory without blocking the event loop.
+        The body is streamed into one buffer sized from the first GET's Content-Range, so no
+        per-part copies or final join are made. The rest of an object larger than
+        S3_RANGE_PART_SIZE is fetched as concurrent ranged GETs (at most S3_RANGE_CONCURRENCY in flight).
+        """
+        buffer = bytearray(size_bytes)
+        first_part_end = min(S3_RANGE_PART_SIZE, size_bytes) - 1
+        if size_bytes:
+            await asyncio.to_thread(self._stream_body_into, first_part_response['Body'], buffer, 0, first_part_end)
+        if size_bytes <= S3_RANGE_PART_SIZE:
+            return buffer
+        
+        semaphore = asyncio.Semaphore(S3_RANGE_CONCURRENCY)
+        
+        async def fetch_part(start: int) -> None:
+            end = min(start + S3_RANGE_PART_SIZE, size_bytes) - 1
+            async with semaphore:
+                await asyncio.to_thread(self._read_object_into, bucket, key, buffer, start, end)
+        
+        await asyncio.gather(*(fetch_part(start) for start in range(S3_RANGE_PART_SIZE, size_bytes, S3_RANGE_PART_SIZE)))
+        logger.info(f"Downloaded s3://{bucket}/{key} in {-(-size_bytes // S3_RANGE_PART_SIZE)} ranged parts")
+        return buffer
 
 # Global S3 handler instance
 s3_handler = S3Handler() 
\ No newline at end of file
@@ -1,20 +1,40 @@
+import asyncio
 import aiohttp
-import base64
-import magic
 from urllib.parse import urlparse, unquote
 from typing import Dict, List, Optional, Any
 from src.utils.logging import get_logger
+from src.utils.file_handler import detect_and_process_binary_content
 
 logger = get_logger(__name__)
 
+# Response bodies are read in chunks of this size
+URL_STREAM_CHUNK_SIZE = 1024 * 1024
+
 class URLHandler:
     """Handler for HTTP/HTTPS operations with direct memory processing"""
     
     def __init__(self, max_file_size_mb: int = 50, timeout_seconds: int = 300):
         self.max_file_size_mb = max_file_size_mb
         self.timeout = aiohttp.ClientTimeout(total=timeout_seconds)
+        # One session for all downloads so connections and DNS lookups are reused across files
+        self._session: Optional[aiohttp.ClientSession] = None
         logger.info("URL handler initialized successfully")
     
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Returns the shared HTTP session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=self.timeout,
+                connector=aiohttp.TCPConnector(limit=64, ttl_dns_cache=300, enable_cleanup_closed=True)
+            )
+        return self._session
+    
+    async def close(self) -> None:
+        """Closes the shared HTTP session. Call once on application shutdown."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
     def parse_url(self, url: str) -> Dict[str, str]:
         """Parse URL and extract components"""
         try:
@@ -24,7 +44,7 @@ class URLHandler:
             
             # Extract filename from path
             path = unquote(parsed.path)
-            filename = path.split('/')[-1] if path else 'unknown_file'
+            filename = path.rpartition('/')[2] or 'unknown_file'
             
             return {
                 "scheme": parsed.scheme,
@@ -48,32 +68,30 @@ class URLHandler:
             
             logger.info(f"Fetching file from URL: {url}")
             
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                async with session.get(url) as response:
-                    if response.status != 200:
-                        raise ValueError(f"HTTP {response.status}: Failed to download file from {url}")
+            async with self._get_session().get(url) as response:
+                if response.status != 200:
+                    raise ValueError(f"HTTP {response.status}: Failed to download file from {url}")
                     
-                    # Check Content-Length header if available
-                    content_length = response.headers.get('Content-Length')
-                    if content_length:
-                        file_size_mb = int(content_length) / (1024 * 1024)
-                        if file_size_mb > self.max_file_size_mb:
-                            raise ValueError(f"File size ({file_size_mb:.2f} MB) exceeds maximum allowed size ({self.max_file_size_mb} MB)")
+                # Check Content-Length header if available
+                max_size_bytes = self.max_file_size_mb * 1024 * 1024
+                content_length = response.headers.get('Content-Length')
+                declared_type = response.headers.get('Content-Type')
+                if content_length:
+                    file_size_mb = int(content_length) / (1024 * 1024)
+                    if file_size_mb > self.max_file_size_mb:
+                        raise ValueError(f"File size ({file_size_mb:.2f} MB) exceeds maximum allowed size ({self.max_file_size_mb} MB)")
                     
-                    # Read file content
-                    file_bytes = await response.read()
-                    
-                    # Double-check actual file size
-                    actual_size_mb = len(file_bytes) / (1024 * 1024)
-                    if actual_size_mb > self.max_file_size_mb:
-                        raise ValueError(f"File size ({actual_size_mb:.2f} MB) exceeds maximum allowed size ({self.max_file_size_mb} MB)")
-            
-            # Detect MIME type
-            mime_type = magic.from_buffer(file_bytes, mime=True)
-            logger.info(f"Detected MIME type for {filename}: {mime_type}")
+                # Stream the body into one buffer, stopping as soon as it exceeds the size limit
+                # (servers may omit or misreport Content-Length)
+                file_bytes = bytearray()
+                async for chunk in response.content.iter_chunked(URL_STREAM_CHUNK_SIZE):
+                    file_bytes += chunk
+                    if len(file_bytes) > max_size_bytes:
+                        raise ValueError(f"File size exceeds maximum allowed size ({self.max_file_size_mb} MB)")
+                actual_size_mb = len(file_bytes) / (1024 * 1024)
             
-            # Process file content using same logic as S3Handler
-            processed_content = await self._process_url_file_content(file_bytes, filename, mime_type)
+            # MIME sniffing, DOCX parsing and base64 encoding are CPU-bound; keep them off the event loop
+            mime_type, processed_content = await asyncio.to_thread(detect_and_process_binary_content, file_bytes, filename, declared_type)
             
             return {
                 "filename": filename,
@@ -98,26 +116,25 @@ class URLHandler:
         try:
             logger.info(f"Listing files from folder API: {folder_list_url}")
             
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                async with session.get(folder_list_url) as response:
-                    if response.status != 200:
-                        raise ValueError(f"HTTP {response.status}: Failed to list folder contents from {folder_list_url}")
+            async with self._get_session().get(folder_list_url) as response:
+                if response.status != 200:
+                    raise ValueError(f"HTTP {response.status}: Failed to list folder contents from {folder_list_url}")
                     
-                    data = await response.json()
+                data = await response.json()
                     
-                    # Handle different possible response formats
-                    if isinstance(data, dict) and "files" in data:
-                        file_urls = data["files"]
-                    elif isinstance(data, list):
-                        file_urls = data
-                    else:
-                        raise ValueError(f"Unexpected response format from folder listing API: {data}")
+                # Handle different possible response formats
+                if isinstance(data, dict) and "files" in data:
+                    file_urls = data["files"]
+                elif isinstance(data, list):
+                    file_urls = data
+                else:
+                    raise ValueError(f"Unexpected response format from folder listing API: {data}")
                     
-                    if not isinstance(file_urls, list):
-                        raise ValueError(f"Expected list of file URLs, got: {type(file_urls)}")
+                if not isinstance(file_urls, list):
+                    raise ValueError(f"Expected list of file URLs, got: {type(file_urls)}")
                     
-                    logger.info(f"Found {len(file_urls)} files in folder")
-                    return file_urls
+                logger.info(f"Found {len(file_urls)} files in folder")
+                return file_urls
                     
         except aiohttp.ClientError as e:
             logger.error(f"Network error listing folder '{folder_list_url}': {e}")
@@ -125,87 +142,6 @@ class URLHandler:
         except Exception as e:
             logger.error(f"Error listing folder '{folder_list_url}': {e}")
             raise
-    
-    async def _process_url_file_content(self, file_bytes: bytes, filename: str, mime_type: str) -> Dict[str, Optional[str]]:
-        """
-        Process URL file content similar to S3Handler._process_s3_file_content
-        Returns dict with raw_text_content, base64_content, content_type, and error
-        """
-        raw_text_content: Optional[str] = None
-        base64_content_str: Optional[str] = None
-        
-        try:
-            if mime_type == "application/pdf":
-                base64_content_str = base64.b64encode(file_bytes).decode('utf-8')
-                
-            elif mime_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document" or \
-                 (mime_type == "application/zip" and filename.lower().endswith('.docx')):
-                
-                if mime_type == "application/zip":
-                    logger.info(f"MIME type detected as 'application/zip' for {filename}, but attempting DOCX parse due to .docx extension.")
-                
-                try:
-                    import docx
-                    import io
-                    doc = docx.Document(io.BytesIO(file_bytes))
-                    extracted_text = "\\n".join([para.text for para in doc.paragraphs])
-                    
-                    if not extracted_text.strip():
-                        logger.warning(f"No text content found in DOCX paragraphs for {filename}.")
-                        return {
-                            "error": f"No text content found in DOCX paragraphs for {filename}. The document might be image-only or text is in elements not directly parseable as paragraphs.",
-                            "raw_text_content": None,
-                            "base64_content": None,
-                            "content_type": "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                        }
-                    
-                    raw_text_content = extracted_text
-                    logger.info(f"Successfully extracted text from DOCX: {filename}")
-                    mime_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                    
-                except Exception as e:
-                    logger.error(f"Error processing DOCX file {filename}: {e}")
-                    logger.warning(f"Falling back to base64 for {filename} after DOCX parsing attempt failed.")
-                    base64_content_str = base64.b64encode(file_bytes).decode('utf-8')
-                    mime_type = "application/octet-stream"
-                    raw_text_content = None
-                    
-            elif mime_type in ["text/plain", "text/markdown"]:
-                try:
-                    raw_text_content = file_bytes.decode('utf-8')
-                    logger.info(f"Successfully read text from {mime_type} file: {filename}")
-                except UnicodeDecodeError:
-                    try:
-                        raw_text_content = file_bytes.decode('latin-1')
-                        logger.info(f"Successfully read text (latin-1) from {mime_type} file: {filename}")
-                    except UnicodeDecodeError as ude_fallback:
-                        logger.error(f"Fallback decoding error for {filename}: {ude_fallback}")
-                        return {
-                            "error": f"Could not decode text file {filename}. Ensure it is UTF-8 or Latin-1 encoded.",
-                            "raw_text_content": None,
-                            "base64_content": None,
-                            "content_type": mime_type
-                        }
-            else:
-                logger.warning(f"Unsupported or ambiguous file type: {mime_type} for file {filename}. Attempting base64 encoding as a fallback.")
-                base64_content_str = base64.b64encode(file_bytes).decode('utf-8')
-                mime_type = "application/octet-stream"
-            
-            return {
-                "raw_text_content": raw_text_content,
-                "base64_content": base64_content_str,
-                "content_type": mime_type,
-                "error": None
-            }
-            
-        except Exception as e:
-            logger.error(f"Error processing URL file content for {filename}: {e}")
-            return {
-                "error": f"Error processing file content: {str(e)}",
-                "raw_text_content": None,
-                "base64_content": None,
-                "content_type": mime_type
-            }
 
 # Global URL handler instance
 url_handler = URLHandler() 
\ No newline at end of file
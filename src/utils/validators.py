@@ -7,16 +7,23 @@ This module provides:
 """
 
 import re
-import uuid
-from typing import Dict, Any, List, Optional, Union
+from typing import FrozenSet, List, Union
 
 from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Simple regex for email validation; \Z (unlike $) does not accept a trailing newline
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\Z')
+# Canonical UUID text, i.e. exactly the strings str(uuid.UUID(...)) produces
+_UUID_RE = re.compile(r'\A[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\Z')
+
+# Document types the upload handlers can extract (see file_handler.MIME_TYPES_BY_EXTENSION)
+ALLOWED_DOCUMENT_EXTENSIONS: FrozenSet[str] = frozenset({'pdf', 'docx', 'txt', 'md'})
+
 def is_valid_uuid(uuid_string: str) -> bool:
     """
-    Check if a string is a valid UUID.
+    Check if a string is a valid UUID in canonical form (lowercase, hyphenated).
     
     Args:
         uuid_string: String to validate as UUID
@@ -24,11 +31,7 @@ def is_valid_uuid(uuid_string: str) -> bool:
     Returns:
         True if the string is a valid UUID, False otherwise
     """
-    try:
-        uuid_obj = uuid.UUID(uuid_string)
-        return str(uuid_obj) == uuid_string
-    except (ValueError, AttributeError):
-        return False
+    return isinstance(uuid_string, str) and _UUID_RE.match(uuid_string) is not None
 
 def validate_jd_id(jd_id: str) -> bool:
     """
@@ -70,13 +73,15 @@ def validate_cv_id(cv_id: str) -> bool:
     
     return True
 
-def validate_file_type(filename: str, allowed_extensions: List[str]) -> bool:
+def validate_file_type(filename: str,
+                       allowed_extensions: Union[List[str], FrozenSet[str]] = ALLOWED_DOCUMENT_EXTENSIONS) -> bool:
     """
     Validate if a filename has an allowed extension.
     
     Args:
         filename: Name of the file to validate
-        allowed_extensions: List of allowed file extensions (e.g., ['pdf', 'docx'])
+        allowed_extensions: Allowed lowercase file extensions (e.g., frozenset({'pdf', 'docx'}));
+            pass a set or frozenset built once for O(1) lookups, lists are converted per call
         
     Returns:
         True if the file has an allowed extension, False otherwise
@@ -85,9 +90,13 @@ def validate_file_type(filename: str, allowed_extensions: List[str]) -> bool:
         logger.error(f"Invalid filename: {filename}. Must be a non-empty string.")
         return False
     
-    extension = filename.split('.')[-1].lower() if '.' in filename else ''
+    if not isinstance(allowed_extensions, (set, frozenset)):
+        allowed_extensions = frozenset(ext.lower() for ext in allowed_extensions)
+    
+    _, dot, extension = filename.rpartition('.')
+    extension = extension.lower() if dot else ''
     if not extension or extension not in allowed_extensions:
-        logger.error(f"Invalid file type: {filename}. Allowed extensions: {', '.join(allowed_extensions)}.")
+        logger.error(f"Invalid file type: {filename}. Allowed extensions: {', '.join(sorted(allowed_extensions))}.")
         return False
     
     return True
@@ -105,64 +114,4 @@ def validate_email(email: str) -> bool:
     if not email or not isinstance(email, str):
         return False
     
-    # Simple regex for email validation
-    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return bool(re.match(email_pattern, email))
-
-def validate_ranking_request(request_data: Dict[str, Any]) -> Optional[str]:
-    """
-    Validate a ranking request.
-    
-    Args:
-        request_data: Dictionary containing ranking request data
-        
-    Returns:
-        Error message if validation fails, None if validation succeeds
-    """
-    if not isinstance(request_data, dict):
-        return "Request data must be a dictionary."
-    
-    if 'jd_id' not in request_data:
-        return "Missing required field: jd_id."
-    
-    if not validate_jd_id(request_data['jd_id']):
-        return f"Invalid JD ID: {request_data['jd_id']}."
-    
-    if 'cv_ids' not in request_data or not isinstance(request_data['cv_ids'], list):
-        return "Missing or invalid field: cv_ids. Must be a list."
-    
-    if not request_data['cv_ids']:
-        return "CV IDs list cannot be empty."
-    
-    for cv_id in request_data['cv_ids']:
-        if not validate_cv_id(cv_id):
-            return f"Invalid CV ID in list: {cv_id}."
-    
-    return None
-
-def validate_question_generation_request(request_data: Dict[str, Any]) -> Optional[str]:
-    """
-    Validate a question generation request.
-    
-    Args:
-        request_data: Dictionary containing question generation request data
-        
-    Returns:
-        Error message if validation fails, None if validation succeeds
-    """
-    if not isinstance(request_data, dict):
-        return "Request data must be a dictionary."
-    
-    if 'jd_id' not in request_data:
-        return "Missing required field: jd_id."
-    
-    if not validate_jd_id(request_data['jd_id']):
-        return f"Invalid JD ID: {request_data['jd_id']}."
-    
-    if 'cv_id' not in request_data:
-        return "Missing required field: cv_id."
-    
-    if not validate_cv_id(request_data['cv_id']):
-        return f"Invalid CV ID: {request_data['cv_id']}."
-    
-    return None 
\ No newline at end of file
+    return _EMAIL_RE.match(email) is not None
@@ -4,22 +4,110 @@ CV (Curriculum Vitae) repository for vector database operations.
 This module provides:
 1. Functions for adding CVs to the vector database
 2. CV-specific search and retrieval operations
+
+CVs are stored in two collections: cv_collection holds one slim point per chunk
+(embedding, enriched text and the IDs needed for filtering), while cv_documents
+holds one payload-only record per CV with its metadata, structured data and
+compressed full text.
 """
 
-from typing import Dict, Any, Optional, List, Union
+import asyncio
+import os
+from typing import Dict, Any, Optional, List, Set, Tuple, Union
+
+from qdrant_client.models import PointStruct
 
 from src.vector_db.vectordb_client import (
     CV_COLLECTION_NAME,
+    CV_DOCUMENTS_COLLECTION_NAME,
+    OG_TEXT_COMPRESSED_FIELD,
+    RAW_TEXT_COMPRESSED_FIELD,
+    SCROLL_PAGE_SIZE,
+    TEXT_ENCODING_ZSTD,
+    begin_bulk_ingest as begin_collection_bulk_ingest,
+    compress_text,
+    delete_document_points,
+    finalize_bulk_ingest as finalize_collection_bulk_ingest,
+    get_document_records,
+    get_embeddings_batch,
+    get_document_raw_text,
     get_qdrantchunk_content,
     get_full_document_text_from_db,
-    search_similar_chunks
+    search_similar_chunks,
+    search_similar_chunks_batch
 )
-from src.vector_db.jd_repository import _process_chunks_for_vector_db
+from src.vector_db.jd_repository import UPSERT_CONCURRENCY, _build_chunk_points, _process_chunks_for_vector_db
 from src.llm.chunker import chunk_document_with_llm
 from src.utils.logging import get_logger
+from src.utils.cache import invalidate_document
+from config import qdrant_client
 
 logger = get_logger(__name__)
 
+# Payload fields kept on every CV chunk point; everything else lives on the document record
+CV_CHUNK_METADATA_FIELDS = ("original_doc_id", "associated_jd_id", "document_type")
+
+# Maximum number of points sent in a single upsert request by add_cvs_batch_to_db
+UPSERT_BATCH_SIZE = 64
+
+# Most CVs get_cvs_for_jd collects with one server-side group-by; larger JDs fall back to scrolling
+MAX_CV_GROUPS_PER_JD = int(os.getenv("MAX_CV_GROUPS_PER_JD", "1000"))
+
+def _build_cv_document_point(
+    cv_metadata_with_links: Dict[str, Any],
+    cv_chunks: List[Dict[str, Union[str, int]]]
+) -> PointStruct:
+    """
+    Internal: Builds the payload-only document record point for a CV.
+    
+    Args:
+        cv_metadata_with_links: Full CV metadata, including 'original_doc_id'
+        cv_chunks: Chunk dictionaries produced by the LLM chunker
+        
+    Returns:
+        Point keyed by the CV ID, ready to upsert into cv_documents
+    """
+    full_text = "\n\n".join(
+        og_text for og_text in (chunk.get("og_content", "") for chunk in cv_chunks)
+        if isinstance(og_text, str) and og_text.strip()
+    )
+    payload = {
+        **cv_metadata_with_links,
+        RAW_TEXT_COMPRESSED_FIELD: compress_text(full_text),
+        "text_encoding": TEXT_ENCODING_ZSTD,
+        "total_chunks_for_doc": len(cv_chunks),
+    }
+    return PointStruct(id=cv_metadata_with_links["original_doc_id"], vector={}, payload=payload)
+
+def _get_cv_chunk_metadata(cv_metadata_with_links: Dict[str, Any]) -> Dict[str, Any]:
+    """Internal: Picks the fields kept on every chunk point of a CV."""
+    return {k: cv_metadata_with_links[k] for k in CV_CHUNK_METADATA_FIELDS if k in cv_metadata_with_links}
+
+async def _add_cv_document_record(
+    cv_metadata_with_links: Dict[str, Any],
+    cv_chunks: List[Dict[str, Union[str, int]]]
+) -> bool:
+    """
+    Internal: Upserts the payload-only document record for a CV into cv_documents.
+    
+    Args:
+        cv_metadata_with_links: Full CV metadata, including 'original_doc_id'
+        cv_chunks: Chunk dictionaries produced by the LLM chunker
+        
+    Returns:
+        Boolean indicating success or failure
+    """
+    cv_id = cv_metadata_with_links["original_doc_id"]
+    try:
+        await qdrant_client.upsert(
+            collection_name=CV_DOCUMENTS_COLLECTION_NAME,
+            points=[_build_cv_document_point(cv_metadata_with_links, cv_chunks)]
+        )
+        return True
+    except Exception as e:
+        logger.error(f"Error upserting document record to '{CV_DOCUMENTS_COLLECTION_NAME}' for CV ID {cv_id}: {e}")
+        return False
+
 async def add_cv_to_db(
     cv_metadata_with_links: Dict[str, Any],
     cv_base64_content: Optional[str] = None,
@@ -27,7 +115,8 @@ async def add_cv_to_db(
     content_type: str = "application/pdf" # Default for PDF if base64 is used
 ) -> Optional[str]:
     """
-    Processes CV using LLM for chunking, then adds to cv_collection.
+    Processes CV using LLM for chunking, then adds its chunks to cv_collection
+    and its document record to cv_documents.
     cv_metadata_with_links MUST include 'original_doc_id' (for the CV).
     'associated_jd_id' is optional - CVs can be uploaded independently and later ranked against any JD.
     Accepts either base64 encoded content or raw text content.
@@ -66,14 +155,191 @@ async def add_cv_to_db(
     # Add document type for clarity in DB
     cv_metadata_with_links["document_type"] = "cv"
 
-    # Use the refactored function to process the already chunked CV text
-    success = await _process_chunks_for_vector_db(cv_chunks, CV_COLLECTION_NAME(), cv_metadata_with_links)
+    # Chunk points only carry the fields needed for search and filtering
+    chunk_metadata = _get_cv_chunk_metadata(cv_metadata_with_links)
+
+    success = await _add_cv_document_record(cv_metadata_with_links, cv_chunks)
+    if success:
+        success = await _process_chunks_for_vector_db(cv_chunks, CV_COLLECTION_NAME, chunk_metadata, store_og_text=False)
+        if not success:
+            # The chunk writes clean up after themselves; remove the document record too
+            await delete_document_points([cv_id], CV_DOCUMENTS_COLLECTION_NAME)
     if success:
+        invalidate_document(cv_id)
         logger.info(f"CV (ID: {cv_id}) successfully added to vector DB.")
     else:
         logger.error(f"Failed to add CV (ID: {cv_id}) to vector DB after chunking.")
     return cv_id if success else None
 
+async def _upsert_points_in_batches(
+    collection_name: str,
+    points_with_owner: List[Tuple[str, PointStruct]]
+) -> Set[str]:
+    """
+    Internal: Upserts points in batches of UPSERT_BATCH_SIZE, UPSERT_CONCURRENCY batches at a time.
+    
+    Args:
+        collection_name: Collection to upsert into
+        points_with_owner: (CV ID, point) pairs
+        
+    Returns:
+        Set of CV IDs that had at least one point in a failed batch
+    """
+    failed_cv_ids = set()
+    semaphore = asyncio.Semaphore(UPSERT_CONCURRENCY)
+
+    async def upsert_batch(batch: List[Tuple[str, PointStruct]]) -> None:
+        try:
+            async with semaphore:
+                await qdrant_client.upsert(
+                    collection_name=collection_name,
+                    points=[point for _, point in batch]
+                )
+        except Exception as e:
+            batch_cv_ids = {cv_id for cv_id, _ in batch}
+            logger.error(f"Error upserting batch of {len(batch)} points to '{collection_name}' for CV IDs {sorted(batch_cv_ids)}: {e}")
+            failed_cv_ids.update(batch_cv_ids)
+
+    await asyncio.gather(*(
+        upsert_batch(points_with_owner[batch_start:batch_start + UPSERT_BATCH_SIZE])
+        for batch_start in range(0, len(points_with_owner), UPSERT_BATCH_SIZE)
+    ))
+    return failed_cv_ids
+
+async def add_cvs_batch_to_db(items: List[Dict[str, Any]]) -> List[Optional[str]]:
+    """
+    Processes several CVs and adds them to the vector DB with batched upserts.
+    LLM chunking and embedding run concurrently per CV; all resulting points are
+    then written in batches of UPSERT_BATCH_SIZE instead of one upsert per CV.
+    
+    Args:
+        items: List of dictionaries with the same keys as add_cv_to_db's arguments:
+            'cv_metadata_with_links' (required, including 'original_doc_id'),
+            'cv_base64_content', 'cv_raw_text_content' and 'content_type'
+        
+    Returns:
+        List aligned with items, holding each CV's original_doc_id or None if it failed
+    """
+    if not items:
+        return []
+
+    async def _chunk(item: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        cv_metadata_with_links = item["cv_metadata_with_links"]
+        cv_id = cv_metadata_with_links.get("original_doc_id")
+        if not cv_id:
+            logger.error("Error: 'original_doc_id' for the CV must be provided in cv_metadata_with_links.")
+            return None
+
+        cv_chunks = await chunk_document_with_llm(
+            base64_content=item.get("cv_base64_content"),
+            raw_text_content=item.get("cv_raw_text_content"),
+            content_type=item.get("content_type", "application/pdf"),
+            prompt_file="src/prompts/cv_enrich_prompt.md"
+        )
+        if not cv_chunks:
+            logger.error(f"Failed to chunk CV (ID: {cv_id}) using LLM. Cannot add to vector DB.")
+            return None
+        if not all(isinstance(chunk, dict) and chunk.get("enriched_content") for chunk in cv_chunks):
+            logger.warning(f"No valid chunk objects (with enriched_content) for CV (ID: {cv_id}).")
+            return None
+        return cv_chunks
+
+    logger.info(f"Processing batch of {len(items)} CVs for vector DB using LLM chunking...")
+    chunked = await asyncio.gather(*(_chunk(item) for item in items), return_exceptions=True)
+
+    chunked_items = []
+    for item, result in zip(items, chunked):
+        if isinstance(result, Exception):
+            logger.error(f"Error preparing CV (ID: {item['cv_metadata_with_links'].get('original_doc_id')}) for vector DB: {type(result).__name__} - {result}")
+            continue
+        if result is not None:
+            chunked_items.append((item["cv_metadata_with_links"], result))
+
+    # One embedding pass over every chunk in the batch, sent EMBEDDING_BATCH_SIZE texts per request
+    all_embeddings = await get_embeddings_batch([
+        chunk["enriched_content"] for _, cv_chunks in chunked_items for chunk in cv_chunks
+    ])
+
+    document_points = []
+    chunk_points = []
+    embedding_offset = 0
+    for cv_metadata_with_links, cv_chunks in chunked_items:
+        cv_embeddings = all_embeddings[embedding_offset:embedding_offset + len(cv_chunks)]
+        embedding_offset += len(cv_chunks)
+        cv_id = cv_metadata_with_links["original_doc_id"]
+        cv_metadata_with_links["document_type"] = "cv"
+        cv_chunk_points = await _build_chunk_points(
+            cv_chunks, CV_COLLECTION_NAME, _get_cv_chunk_metadata(cv_metadata_with_links),
+            store_og_text=False, embeddings=cv_embeddings
+        )
+        if not cv_chunk_points:
+            continue
+        document_points.append((cv_id, _build_cv_document_point(cv_metadata_with_links, cv_chunks)))
+        chunk_points.extend((cv_id, point) for point in cv_chunk_points)
+
+    # Document records go first so a CV is never searchable without its text
+    failed_cv_ids = await _upsert_points_in_batches(CV_DOCUMENTS_COLLECTION_NAME, document_points)
+    failed_cv_ids |= await _upsert_points_in_batches(
+        CV_COLLECTION_NAME, [(cv_id, point) for cv_id, point in chunk_points if cv_id not in failed_cv_ids]
+    )
+    if failed_cv_ids:
+        # A failed CV may have chunks stored by its other upsert batches and a document record;
+        # remove both so it is reported failed with nothing left behind for lookups or a retry
+        await asyncio.gather(
+            delete_document_points(sorted(failed_cv_ids), CV_COLLECTION_NAME),
+            delete_document_points(sorted(failed_cv_ids), CV_DOCUMENTS_COLLECTION_NAME)
+        )
+
+    stored_cv_ids = {cv_id for cv_id, _ in document_points} - failed_cv_ids
+    for cv_id in stored_cv_ids:
+        invalidate_document(cv_id)
+    logger.info(f"Batch added {len(stored_cv_ids)}/{len(items)} CVs ({len(chunk_points)} chunk points) to vector DB.")
+    return [
+        item["cv_metadata_with_links"].get("original_doc_id") if item["cv_metadata_with_links"].get("original_doc_id") in stored_cv_ids else None
+        for item in items
+    ]
+
+async def update_cv_structured_data(cv_id: str, structured_data: Dict[str, Any]) -> bool:
+    """
+    Attaches LLM-parsed structured data to a CV's document record after it was stored.
+    Lets callers write the CV and parse it concurrently.
+    
+    Args:
+        cv_id: The original_doc_id of the stored CV
+        structured_data: Parsed CV data (or the parse error payload)
+        
+    Returns:
+        True if the record was updated, False otherwise
+    """
+    try:
+        await qdrant_client.set_payload(
+            collection_name=CV_DOCUMENTS_COLLECTION_NAME,
+            payload={"structured_data": structured_data},
+            points=[cv_id],
+            wait=True
+        )
+    except Exception as e:
+        logger.error(f"Error updating structured data for CV (ID: {cv_id}): {e}")
+        return False
+    invalidate_document(cv_id)
+    return True
+
+async def begin_bulk_ingest() -> None:
+    """
+    Pause segment indexing on the CV chunk collection for a large ingest.
+    Points inserted meanwhile are stored but not HNSW-indexed; searches still work
+    but fall back to slower unindexed scans until finalize_bulk_ingest is called.
+    Calls nest: indexing resumes when the last concurrent bulk ingest finishes.
+    """
+    await begin_collection_bulk_ingest(CV_COLLECTION_NAME)
+
+async def finalize_bulk_ingest() -> None:
+    """
+    Restore indexing on the CV chunk collection after begin_bulk_ingest,
+    so Qdrant indexes everything inserted during the bulk ingest in one pass.
+    """
+    await finalize_collection_bulk_ingest(CV_COLLECTION_NAME)
+
 async def search_cv_chunks(query_text: str, top_k: int = 5, filter_by_doc_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
     """
     Search for CV chunks similar to query text, optionally filtered by specific document IDs.
@@ -86,7 +352,21 @@ async def search_cv_chunks(query_text: str, top_k: int = 5, filter_by_doc_ids: O
     Returns:
         List of dictionaries containing search results with scores
     """
-    return await search_similar_chunks(query_text, CV_COLLECTION_NAME(), top_k, filter_by_doc_ids)
+    return await search_similar_chunks(query_text, CV_COLLECTION_NAME, top_k, filter_by_doc_ids)
+
+async def search_cv_chunks_batch(query_texts: List[str], top_k: int = 5, filter_by_doc_ids: Optional[List[str]] = None) -> List[List[Dict[str, Any]]]:
+    """
+    Search for CV chunks similar to each of several query texts in a single batched request.
+    
+    Args:
+        query_texts: Texts to search for
+        top_k: Maximum number of results to return per query
+        filter_by_doc_ids: Optional list of document IDs to filter by
+        
+    Returns:
+        Search results with scores per query text, aligned with query_texts
+    """
+    return await search_similar_chunks_batch(query_texts, CV_COLLECTION_NAME, top_k, filter_by_doc_ids)
 
 async def get_cv_chunks(doc_id: str) -> List[Dict[str, Any]]:
     """
@@ -98,7 +378,7 @@ async def get_cv_chunks(doc_id: str) -> List[Dict[str, Any]]:
     Returns:
         List of dictionaries containing chunk payloads
     """
-    return await get_qdrantchunk_content(doc_id, CV_COLLECTION_NAME())
+    return await get_qdrantchunk_content(doc_id, CV_COLLECTION_NAME)
 
 async def get_full_cv_text(doc_id: str) -> Optional[str]:
     """
@@ -110,7 +390,128 @@ async def get_full_cv_text(doc_id: str) -> Optional[str]:
     Returns:
         The reconstructed full text of the CV document or None if not found
     """
-    return await get_full_document_text_from_db(doc_id, CV_COLLECTION_NAME())
+    return await get_full_document_text_from_db(doc_id, CV_COLLECTION_NAME)
+
+async def get_full_cv_texts(doc_ids: List[str]) -> Dict[str, str]:
+    """
+    Retrieves the full text of several CV documents with a single document-collection lookup.
+    CVs without a document record fall back to reconstruction from their chunks.
+    
+    Args:
+        doc_ids: The original_doc_ids of the CV documents
+        
+    Returns:
+        Dictionary mapping CV ID to its full text; CVs whose text could not be found are omitted
+    """
+    unique_doc_ids = list(dict.fromkeys(doc_ids))
+    document_records = await get_document_records(unique_doc_ids, CV_DOCUMENTS_COLLECTION_NAME)
+
+    full_texts = {}
+    missing_doc_ids = []
+    for doc_id in unique_doc_ids:
+        full_text = get_document_raw_text(document_records.get(doc_id))
+        if full_text:
+            full_texts[doc_id] = full_text
+        else:
+            missing_doc_ids.append(doc_id)
+
+    if missing_doc_ids:
+        fallback_texts = await asyncio.gather(*(get_full_cv_text(doc_id) for doc_id in missing_doc_ids))
+        full_texts.update({doc_id: text for doc_id, text in zip(missing_doc_ids, fallback_texts) if text})
+    return full_texts
+
+# Chunk payload fields that are not CV metadata
+_CHUNK_ONLY_FIELDS = frozenset({"chunk_index", "enriched_text", "og_text", OG_TEXT_COMPRESSED_FIELD, "text_encoding", "total_chunks_for_doc"})
+# Document record fields that are not CV metadata
+_DOCUMENT_ONLY_FIELDS = frozenset({RAW_TEXT_COMPRESSED_FIELD, "text_encoding", "total_chunks_for_doc"})
+
+async def _get_legacy_cv_metadata(cv_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Internal: Reads the metadata of a CV stored before the document collection existed,
+    from one of its chunks (such CVs keep metadata on every chunk), without the chunk text.
+    
+    Args:
+        cv_id: The original_doc_id of the CV
+        
+    Returns:
+        CV metadata dictionary, or None if the CV has no chunks
+    """
+    from qdrant_client.models import Filter, FieldCondition, MatchValue, PayloadSelectorExclude
+    
+    scroll_response, _ = await qdrant_client.scroll(
+        collection_name=CV_COLLECTION_NAME,
+        scroll_filter=Filter(
+            must=[FieldCondition(key="original_doc_id", match=MatchValue(value=cv_id))]
+        ),
+        limit=1,
+        with_payload=PayloadSelectorExclude(exclude=["enriched_text", "og_text", OG_TEXT_COMPRESSED_FIELD]),
+        with_vectors=False
+    )
+    if not scroll_response or not scroll_response[0].payload:
+        return None
+    return {k: v for k, v in scroll_response[0].payload.items() if k not in _CHUNK_ONLY_FIELDS}
+
+async def _get_cv_ids_for_jd(jd_id: str) -> List[str]:
+    """
+    Internal: Returns the unique IDs of the CVs associated with a JD.
+    Groups the JD's CV chunks by original_doc_id server-side, so one point per CV is
+    returned; scrolls the chunks (IDs only) and deduplicates locally if grouping is
+    unavailable or the JD has more than MAX_CV_GROUPS_PER_JD CVs.
+    
+    Args:
+        jd_id: The JD document ID to find associated CVs for
+        
+    Returns:
+        CV IDs
+    """
+    from qdrant_client.models import Filter, FieldCondition, MatchValue
+    
+    jd_filter = Filter(
+        must=[
+            FieldCondition(
+                key="associated_jd_id",
+                match=MatchValue(value=jd_id)
+            )
+        ]
+    )
+    try:
+        groups_result = await qdrant_client.query_points_groups(
+            collection_name=CV_COLLECTION_NAME,
+            group_by="original_doc_id",
+            query_filter=jd_filter,
+            limit=MAX_CV_GROUPS_PER_JD,
+            group_size=1,
+            with_payload=False,
+            with_vectors=False
+        )
+        if len(groups_result.groups) < MAX_CV_GROUPS_PER_JD:
+            return [str(group.id) for group in groups_result.groups]
+        logger.info(f"JD '{jd_id}' has at least {MAX_CV_GROUPS_PER_JD} CVs; collecting them by scrolling.")
+    except Exception as e:
+        logger.warning(f"Grouped CV lookup failed for JD '{jd_id}', scrolling instead: {type(e).__name__} - {e}")
+
+    # Unique CV IDs associated with this JD, in scroll order; only the ID field is fetched
+    cv_ids: Dict[str, None] = {}
+    next_page_offset = None
+    
+    while True:
+        scroll_response, next_page_offset = await qdrant_client.scroll(
+            collection_name=CV_COLLECTION_NAME,
+            scroll_filter=jd_filter,
+            limit=SCROLL_PAGE_SIZE,
+            offset=next_page_offset,
+            with_payload=["original_doc_id"],
+            with_vectors=False
+        )
+        
+        if scroll_response:
+            for hit in scroll_response:
+                if hit.payload and "original_doc_id" in hit.payload:
+                    cv_ids.setdefault(hit.payload["original_doc_id"], None)
+        
+        if next_page_offset is None:
+            break
+    return list(cv_ids)
 
 async def get_cvs_for_jd(jd_id: str) -> List[Dict[str, Any]]:
     """
@@ -122,53 +523,30 @@ async def get_cvs_for_jd(jd_id: str) -> List[Dict[str, Any]]:
     Returns:
         List of CV metadata dictionaries
     """
-    from qdrant_client.models import Filter, FieldCondition, MatchValue
-    from config import qdrant_client
-    
     if not jd_id:
         logger.error("Error: No JD ID provided to get_cvs_for_jd.")
         return []
 
     try:
-        # Get unique CV IDs associated with this JD
-        cv_ids = set()
-        next_page_offset = None
-        limit_per_scroll = 100
-        
-        while True:
-            scroll_response, next_page_offset = await qdrant_client.scroll(
-                collection_name=CV_COLLECTION_NAME(),
-                scroll_filter=Filter(
-                    must=[
-                        FieldCondition(
-                            key="associated_jd_id",
-                            match=MatchValue(value=jd_id)
-                        )
-                    ]
-                ),
-                limit=limit_per_scroll,
-                offset=next_page_offset,
-                with_payload=True,
-                with_vectors=False
-            )
-            
-            if scroll_response:
-                for hit in scroll_response:
-                    if hit.payload and "original_doc_id" in hit.payload:
-                        cv_ids.add(hit.payload["original_doc_id"])
-            
-            if next_page_offset is None:
-                break
+        cv_ids = await _get_cv_ids_for_jd(jd_id)
                 
-        # For each CV ID, get the first chunk to extract metadata
+        # Metadata lives on the document records; fetch them all in one request
+        document_records = await get_document_records(cv_ids, CV_DOCUMENTS_COLLECTION_NAME)
+
+        # CVs stored before the document collection existed keep metadata on their chunks instead
+        legacy_cv_ids = [cv_id for cv_id in cv_ids if cv_id not in document_records]
+        legacy_metadata = dict(zip(
+            legacy_cv_ids,
+            await asyncio.gather(*(_get_legacy_cv_metadata(cv_id) for cv_id in legacy_cv_ids))
+        ))
+
         cv_metadata_list = []
         for cv_id in cv_ids:
-            chunks = await get_cv_chunks(cv_id)
-            if chunks:
-                # Extract metadata from the first chunk
-                metadata = {k: v for k, v in chunks[0].items() 
-                           if k not in ["chunk_index", "enriched_text", "og_text", "total_chunks_for_doc"]}
-                cv_metadata_list.append(metadata)
+            record = document_records.get(cv_id)
+            if record:
+                cv_metadata_list.append({k: v for k, v in record.items() if k not in _DOCUMENT_ONLY_FIELDS})
+            elif legacy_metadata.get(cv_id):
+                cv_metadata_list.append(legacy_metadata[cv_id])
                 
         return cv_metadata_list
         
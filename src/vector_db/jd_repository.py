@@ -6,89 +6,254 @@ This module provides:
 2. JD-specific search and retrieval operations
 """
 
+import asyncio
 import uuid
-from typing import Dict, Any, Optional, List, Union
+from typing import Dict, Any, Optional, List, Tuple, Union
+import numpy as np
 
 from src.vector_db.vectordb_client import (
     JD_COLLECTION_NAME,
-    get_embedding,
+    OG_TEXT_COMPRESSED_FIELD,
+    TEXT_ENCODING_ZSTD,
+    compress_text,
+    delete_document_points,
+    get_embeddings_batch,
     get_qdrantchunk_content,
     get_full_document_text_from_db,
     search_similar_chunks
 )
 from src.llm.chunker import chunk_document_with_llm
+from src.utils.ids import generate_chunk_point_ids
 from src.utils.logging import get_logger
-from qdrant_client.models import PointStruct
+from src.utils.cache import invalidate_document
+from qdrant_client.models import FieldCondition, Filter, MatchValue, PointStruct
 
 from config import qdrant_client
 
 logger = get_logger(__name__)
 
-async def _process_chunks_for_vector_db(
+# Points per upsert request when storing a document's chunks, and upsert requests in flight at once;
+# smaller requests keep Qdrant's write latency flat and two in flight hide the network round trip
+CHUNK_UPSERT_BATCH_SIZE = 32
+UPSERT_CONCURRENCY = 2
+# Embedded chunk batches buffered ahead of the upserts in _process_chunks_for_vector_db
+EMBEDDED_BATCH_QUEUE_SIZE = 2
+
+def _build_chunk_point(
+    chunk_item: Dict[str, Union[str, int]],
+    chunk_index: int,
+    total_chunks: int,
+    chunk_id: str,
+    embedding: np.ndarray,
+    target_collection_name: str,
+    doc_metadata: Dict[str, Any],
+    store_og_text: bool
+) -> PointStruct:
+    """
+    Internal: Builds the Qdrant point for one embedded chunk of a document.
+    
+    Args:
+        chunk_item: Chunk dictionary with enriched_content
+        chunk_index: Position of the chunk in the document
+        total_chunks: Number of chunks in the document
+        chunk_id: Point ID for the chunk
+        embedding: Embedding of the chunk's enriched text
+        target_collection_name: Collection name the point is meant for
+        doc_metadata: Metadata to attach to the chunk
+        store_og_text: Whether to store the chunk's original text in its payload
+        
+    Returns:
+        Point ready to upsert
+    """
+    payload = {
+        **doc_metadata,
+        "chunk_index": chunk_index,
+        "enriched_text": chunk_item.get("enriched_content", ""), # Storing enriched_text as "text" for embedding/primary search
+        "total_chunks_for_doc": total_chunks,
+    }
+    if store_og_text:
+        payload[OG_TEXT_COMPRESSED_FIELD] = compress_text(chunk_item.get("og_content", "")) # Original text, zstd-compressed
+        payload["text_encoding"] = TEXT_ENCODING_ZSTD
+    # Add weight to payload only for JD chunks
+    if target_collection_name == JD_COLLECTION_NAME:
+        payload["weight"] = chunk_item.get("weight", 1) # Default to 1 if missing
+    return PointStruct(id=chunk_id, vector=embedding.tolist(), payload=payload)
+
+def _prepare_chunks(
     chunks: Optional[List[Dict[str, Union[str, int]]]],
-    target_collection_name: str, 
+    target_collection_name: str,
     doc_metadata: Dict[str, Any]
 ) -> bool:
     """
-    Internal: Embeds enriched text from chunks and upserts to Qdrant.
-    Payload stores both original and enriched text.
+    Internal: Checks that every chunk has enriched text and makes sure doc_metadata has an original_doc_id.
     
     Args:
         chunks: List of chunk dictionaries with enriched_content
-        target_collection_name: Collection name to add chunks to
-        doc_metadata: Metadata to attach to each chunk
+        target_collection_name: Collection name the chunks are meant for
+        doc_metadata: Metadata to attach to each chunk; updated in place
         
     Returns:
-        Boolean indicating success or failure
+        True if the chunks can be stored
     """
     if not chunks or not all(isinstance(chunk, dict) and chunk.get("enriched_content") for chunk in chunks):
         logger.warning(f"No valid chunk objects (with enriched_content) provided for processing for collection '{target_collection_name}'. Doc ID: {doc_metadata.get('original_doc_id')}")
         return False
-    
-    points = []
-    original_doc_id = doc_metadata.get("original_doc_id", str(uuid.uuid4()))
     if "original_doc_id" not in doc_metadata:
-        doc_metadata["original_doc_id"] = original_doc_id
-
-    for i, chunk_item in enumerate(chunks):
-        og_text = chunk_item.get("og_content", "")
-        enriched_text = chunk_item.get("enriched_content", "")
+        doc_metadata["original_doc_id"] = str(uuid.uuid4())
+    return True
 
-        if not enriched_text.strip(): 
-            logger.warning(f"Skipping empty enriched_text for chunk {i} for doc ID {original_doc_id} in {target_collection_name}.")
+def _build_embedded_chunk_points(
+    chunks: List[Dict[str, Union[str, int]]],
+    first_chunk_index: int,
+    total_chunks: int,
+    chunk_ids: List[str],
+    embeddings: List[Optional[np.ndarray]],
+    target_collection_name: str,
+    doc_metadata: Dict[str, Any],
+    store_og_text: bool
+) -> List[PointStruct]:
+    """
+    Internal: Builds points for a run of consecutive chunks of a document, skipping chunks
+    without enriched text or whose embedding failed (with one aggregate warning).
+    
+    Args:
+        chunks: Consecutive chunks of the document
+        first_chunk_index: Position of the first of these chunks in the document
+        total_chunks: Number of chunks in the document
+        chunk_ids: Point IDs aligned with chunks
+        embeddings: Embeddings aligned with chunks; None where generation failed
+        target_collection_name: Collection name the points are meant for
+        doc_metadata: Metadata to attach to each chunk
+        store_og_text: Whether to store each chunk's original text in its payload
+        
+    Returns:
+        List of points ready to upsert
+    """
+    original_doc_id = doc_metadata["original_doc_id"]
+    points = []
+    unembedded_chunk_count = 0
+    for offset, (chunk_item, chunk_id, embedding) in enumerate(zip(chunks, chunk_ids, embeddings)):
+        chunk_index = first_chunk_index + offset
+        if not chunk_item.get("enriched_content", "").strip():
+            logger.warning(f"Skipping empty enriched_text for chunk {chunk_index} for doc ID {original_doc_id} in {target_collection_name}.")
+            continue
+        if embedding is None:
+            unembedded_chunk_count += 1
             continue
+        points.append(_build_chunk_point(chunk_item, chunk_index, total_chunks, chunk_id, embedding,
+                                         target_collection_name, doc_metadata, store_og_text))
 
-        chunk_id = str(uuid.uuid4())
-        embedding = await get_embedding(enriched_text)
-        
-        payload = {
-            **doc_metadata,
-            "chunk_index": i,
-            "enriched_text": enriched_text, # Storing enriched_text as "text" for embedding/primary search
-            "og_text": og_text,    # Storing original text as "og_text"
-            "total_chunks_for_doc": len(chunks),
-        }
-        # Add weight to payload only for JD chunks
-        if target_collection_name == JD_COLLECTION_NAME():
-            payload["weight"] = chunk_item.get("weight", 1) # Default to 1 if missing
+    if unembedded_chunk_count:
+        logger.warning(f"Skipped {unembedded_chunk_count} of {len(chunks)} chunk(s) for Doc ID {original_doc_id} in {target_collection_name}: embedding generation failed.")
+    return points
+
+async def _build_chunk_points(
+    chunks: Optional[List[Dict[str, Union[str, int]]]],
+    target_collection_name: str, 
+    doc_metadata: Dict[str, Any],
+    store_og_text: bool = True,
+    embeddings: Optional[List[Optional[np.ndarray]]] = None
+) -> List[PointStruct]:
+    """
+    Internal: Embeds enriched text from chunks and builds the Qdrant points for them.
+    Payload stores the enriched text and, unless disabled, the original (zstd-compressed) text.
+    
+    Args:
+        chunks: List of chunk dictionaries with enriched_content
+        target_collection_name: Collection name the points are meant for
+        doc_metadata: Metadata to attach to each chunk
+        store_og_text: Whether to store each chunk's original text in its payload
+        embeddings: Precomputed embeddings aligned with chunks; computed in one batch if None
         
-        points.append(PointStruct(id=chunk_id, vector=embedding, payload=payload))
+    Returns:
+        List of points ready to upsert; chunks whose embedding failed are left out.
+        Empty if no valid chunks were provided
+    """
+    if not _prepare_chunks(chunks, target_collection_name, doc_metadata):
+        return []
+    original_doc_id = doc_metadata["original_doc_id"]
+
+    # Point IDs derived from the document ID and chunk index, so re-storing a document overwrites its chunks
+    chunk_ids = generate_chunk_point_ids(original_doc_id, len(chunks))
+    if embeddings is None:
+        embeddings = await get_embeddings_batch([chunk_item["enriched_content"] for chunk_item in chunks])
+    points = _build_embedded_chunk_points(chunks, 0, len(chunks), chunk_ids, embeddings,
+                                          target_collection_name, doc_metadata, store_og_text)
 
     if not points:
         logger.warning(f"No valid points generated after processing chunks for Doc ID {original_doc_id}. Nothing to upsert.")
-        return False
+    return points
+
+async def _process_chunks_for_vector_db(
+    chunks: Optional[List[Dict[str, Union[str, int]]]],
+    target_collection_name: str, 
+    doc_metadata: Dict[str, Any],
+    store_og_text: bool = True
+) -> bool:
+    """
+    Internal: Embeds enriched text from chunks and upserts to Qdrant.
+    Chunks are handled in batches of CHUNK_UPSERT_BATCH_SIZE through a two-stage pipeline,
+    so the next batch is embedded while the previous one is being upserted.
     
+    Args:
+        chunks: List of chunk dictionaries with enriched_content
+        target_collection_name: Collection name to add chunks to
+        doc_metadata: Metadata to attach to each chunk
+        store_og_text: Whether to store each chunk's original text in its payload
+        
+    Returns:
+        Boolean indicating success or failure
+    """
+    if not _prepare_chunks(chunks, target_collection_name, doc_metadata):
+        return False
+
+    original_doc_id = doc_metadata["original_doc_id"]
+    # Point IDs derived from the document ID and chunk index, so a retry overwrites the batches already stored
+    chunk_ids = generate_chunk_point_ids(original_doc_id, len(chunks))
+    # Embedded batches waiting to be upserted; bounded so embedding runs at most two batches ahead
+    embedded_batches: "asyncio.Queue[Optional[Tuple[int, List[Optional[np.ndarray]]]]]" = asyncio.Queue(maxsize=EMBEDDED_BATCH_QUEUE_SIZE)
+
+    async def embed_batches() -> None:
+        for batch_start in range(0, len(chunks), CHUNK_UPSERT_BATCH_SIZE):
+            batch_chunks = chunks[batch_start:batch_start + CHUNK_UPSERT_BATCH_SIZE]
+            embeddings = await get_embeddings_batch([chunk_item["enriched_content"] for chunk_item in batch_chunks])
+            await embedded_batches.put((batch_start, embeddings))
+        await embedded_batches.put(None)
+
+    async def upsert_batches() -> int:
+        upserted_count = 0
+        while (embedded_batch := await embedded_batches.get()) is not None:
+            batch_start, embeddings = embedded_batch
+            batch_end = batch_start + len(embeddings)
+            points = _build_embedded_chunk_points(
+                chunks[batch_start:batch_end], batch_start, len(chunks), chunk_ids[batch_start:batch_end],
+                embeddings, target_collection_name, doc_metadata, store_og_text
+            )
+            if points:
+                await qdrant_client.upsert(
+                    collection_name=target_collection_name,
+                    points=points
+                )
+                upserted_count += len(points)
+        return upserted_count
+
+    tasks = [asyncio.create_task(embed_batches()), asyncio.create_task(upsert_batches())]
     try:
-        await qdrant_client.upsert(
-            collection_name=target_collection_name,
-            points=points
-        )
-        logger.info(f"Successfully added {len(points)} points for Doc ID {original_doc_id} to '{target_collection_name}'.")
-        return True
+        _, upserted_count = await asyncio.gather(*tasks)
     except Exception as e:
+        for task in tasks:
+            task.cancel()
         logger.error(f"Error upserting points to '{target_collection_name}' for Doc ID {original_doc_id}: {e}")
+        # Earlier batches may already be stored; remove them so the document is stored all-or-nothing
+        await delete_document_points([original_doc_id], target_collection_name)
         return False
 
+    if not upserted_count:
+        logger.warning(f"No valid points generated after processing chunks for Doc ID {original_doc_id}. Nothing to upsert.")
+        return False
+    logger.info(f"Successfully added {upserted_count} points for Doc ID {original_doc_id} to '{target_collection_name}'.")
+    return True
+
 async def add_jd_to_db(
     jd_specific_metadata: Optional[Dict[str, Any]] = None,
     jd_base64_content: Optional[str] = None, 
@@ -139,13 +304,39 @@ async def add_jd_to_db(
     if "source" not in doc_metadata: # Add a generic source if not provided
         doc_metadata["source"] = "base64_upload_jd_multimodal_chunking"
 
-    success = await _process_chunks_for_vector_db(jd_chunks, JD_COLLECTION_NAME(), doc_metadata)
+    success = await _process_chunks_for_vector_db(jd_chunks, JD_COLLECTION_NAME, doc_metadata)
     if success:
+        invalidate_document(original_doc_id)
         logger.info(f"JD ({jd_filename}) successfully added to vector DB. Doc ID: {original_doc_id}")
     else:
         logger.error(f"Failed to add JD ({jd_filename}) to vector DB after chunking.")
     return original_doc_id if success else None
 
+async def update_jd_structured_data(jd_id: str, structured_data: Dict[str, Any]) -> bool:
+    """
+    Attaches LLM-parsed structured data to every chunk of a stored JD.
+    Lets callers write the JD and parse it concurrently.
+    
+    Args:
+        jd_id: The original_doc_id of the stored JD
+        structured_data: Parsed JD data
+        
+    Returns:
+        True if the chunks were updated, False otherwise
+    """
+    try:
+        await qdrant_client.set_payload(
+            collection_name=JD_COLLECTION_NAME,
+            payload={"structured_data": structured_data},
+            points=Filter(must=[FieldCondition(key="original_doc_id", match=MatchValue(value=jd_id))]),
+            wait=True
+        )
+    except Exception as e:
+        logger.error(f"Error updating structured data for JD (ID: {jd_id}): {e}")
+        return False
+    invalidate_document(jd_id)
+    return True
+
 async def search_jd_chunks(query_text: str, top_k: int = 5, filter_by_doc_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
     """
     Search for JD chunks similar to query text, optionally filtered by specific document IDs.
@@ -158,7 +349,7 @@ async def search_jd_chunks(query_text: str, top_k: int = 5, filter_by_doc_ids: O
     Returns:
         List of dictionaries containing search results with scores
     """
-    return await search_similar_chunks(query_text, JD_COLLECTION_NAME(), top_k, filter_by_doc_ids)
+    return await search_similar_chunks(query_text, JD_COLLECTION_NAME, top_k, filter_by_doc_ids)
 
 async def get_jd_chunks(doc_id: str) -> List[Dict[str, Any]]:
     """
@@ -170,7 +361,7 @@ async def get_jd_chunks(doc_id: str) -> List[Dict[str, Any]]:
     Returns:
         List of dictionaries containing chunk payloads
     """
-    return await get_qdrantchunk_content(doc_id, JD_COLLECTION_NAME())
+    return await get_qdrantchunk_content(doc_id, JD_COLLECTION_NAME)
 
 async def get_full_jd_text(doc_id: str) -> Optional[str]:
     """
@@ -182,4 +373,16 @@ async def get_full_jd_text(doc_id: str) -> Optional[str]:
     Returns:
         The reconstructed full text of the JD document or None if not found
     """
-    return await get_full_document_text_from_db(doc_id, JD_COLLECTION_NAME()) 
\ No newline at end of file
+    return await get_full_document_text_from_db(doc_id, JD_COLLECTION_NAME) 
+
+async def delete_jd_from_db(doc_id: str) -> bool:
+    """
+    Deletes every stored chunk of a JD document.
+    
+    Args:
+        doc_id: The original_doc_id of the JD document
+        
+    Returns:
+        True if the delete succeeded, False otherwise
+    """
+    return await delete_document_points([doc_id], JD_COLLECTION_NAME)
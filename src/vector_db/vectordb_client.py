@@ -8,31 +8,151 @@ This module provides:
 """
 
 import asyncio
+import base64
+import hashlib
+import io
 import os
 from typing import List, Dict, Any, Optional
 import aiohttp
+import numpy as np
+import zstandard as zstd
 
-from qdrant_client.models import Distance, VectorParams, PayloadSchemaType
+from qdrant_client.models import Distance, HnswConfigDiff, OptimizersConfigDiff, VectorParams, PayloadSchemaType
 
-from config import qdrant_client, get_embedding_config
+from config import qdrant_client, get_embedding_config, get_qdrant_collection_config
+from src.utils.cache import AsyncTTLCache
 from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
 # --- Collection Names ---
-def JD_COLLECTION_NAME():
-    return "jd_collection"
+JD_COLLECTION_NAME = "jd_collection"
+CV_COLLECTION_NAME = "cv_collection"
+CV_DOCUMENTS_COLLECTION_NAME = "cv_documents"
 
-def CV_COLLECTION_NAME():
-    return "cv_collection"
+# --- Payload Text Compression ---
+# Original chunk text is stored zstd-compressed (base64-encoded) in the payload to keep
+# Qdrant responses small. Points written before compression was introduced carry a plain
+# "og_text" field and no "text_encoding" marker; both layouts are readable.
+OG_TEXT_COMPRESSED_FIELD = "og_text_zstd_b64"
+RAW_TEXT_COMPRESSED_FIELD = "raw_text_zstd_b64"
+TEXT_ENCODING_ZSTD = "zstd"
+
+_zstd_compressor = zstd.ZstdCompressor(level=3)
+_zstd_decompressor = zstd.ZstdDecompressor()
+
+def compress_text(text: str) -> str:
+    """
+    Compress text with zstd and return it base64-encoded for storage in a JSON payload.
+    
+    Args:
+        text: Text to compress
+        
+    Returns:
+        Base64 string of the zstd-compressed UTF-8 bytes
+    """
+    return base64.b64encode(_zstd_compressor.compress(text.encode("utf-8"))).decode("ascii")
+
+def decompress_text(encoded_text: str) -> str:
+    """
+    Reverse compress_text: base64-decode and zstd-decompress a payload field.
+    
+    Args:
+        encoded_text: Base64 string produced by compress_text
+        
+    Returns:
+        The original text
+    """
+    return _zstd_decompressor.decompress(base64.b64decode(encoded_text)).decode("utf-8")
+
+def get_document_raw_text(document_payload: Optional[Dict[str, Any]]) -> Optional[str]:
+    """
+    Returns the full text stored on a document record, or None if it has none.
+    
+    Args:
+        document_payload: Payload dictionary of a stored document record
+        
+    Returns:
+        The decompressed full document text, or None
+    """
+    if not document_payload or document_payload.get("text_encoding") != TEXT_ENCODING_ZSTD:
+        return None
+    encoded_text = document_payload.get(RAW_TEXT_COMPRESSED_FIELD)
+    if not isinstance(encoded_text, str):
+        return None
+    try:
+        return decompress_text(encoded_text)
+    except Exception as e:
+        logger.warning(f"Could not decompress document text for doc_id '{document_payload.get('original_doc_id')}': {type(e).__name__} - {e}")
+        return None
+
+def get_chunk_og_text(chunk_payload: Dict[str, Any]) -> str:
+    """
+    Returns the original text of a chunk payload, handling both compressed and legacy records.
+    
+    Args:
+        chunk_payload: Payload dictionary of a stored chunk
+        
+    Returns:
+        The original chunk text, or an empty string if unavailable
+    """
+    if chunk_payload.get("text_encoding") == TEXT_ENCODING_ZSTD:
+        encoded_text = chunk_payload.get(OG_TEXT_COMPRESSED_FIELD)
+        if not isinstance(encoded_text, str):
+            return ""
+        try:
+            return decompress_text(encoded_text)
+        except Exception as e:
+            logger.warning(f"Could not decompress chunk text for doc_id '{chunk_payload.get('original_doc_id')}': {type(e).__name__} - {e}")
+            return ""
+    og_text = chunk_payload.get("og_text", "")
+    return og_text if isinstance(og_text, str) else ""
 
 # Get embedding configuration
 embedding_config = get_embedding_config()
+# HNSW, optimizer and payload storage settings for new collections
+collection_config = get_qdrant_collection_config()
 
-# Vector parameters for collections
-_vector_params = VectorParams(size=embedding_config["dimensions"], distance=Distance.COSINE)
+# Points fetched per scroll request. Scroll offsets are point IDs, so each page resumes
+# from the previous one without re-sorting; larger pages mean fewer round-trips.
+SCROLL_PAGE_SIZE = int(os.getenv("QDRANT_SCROLL_PAGE_SIZE", "1000"))
 
 # --- Initialize Collections ---
+async def _create_payload_indexes(collection_name: str, existing_payload_schema: Optional[Dict[str, Any]] = None):
+    """
+    Create the payload indexes used for filtering a chunk collection, concurrently.
+    Indexes already listed in the collection's payload schema are skipped.
+    
+    Args:
+        collection_name: Name of the collection to index
+        existing_payload_schema: payload_schema from the collection info, if the collection already existed
+    """
+    payload_indexes = [
+        ("original_doc_id", PayloadSchemaType.KEYWORD), # UUIDs stored as strings are best indexed as keywords
+        ("chunk_index", PayloadSchemaType.INTEGER), # Lets document text be scrolled in chunk order
+    ]
+    if collection_name == JD_COLLECTION_NAME:
+        payload_indexes.append(("weight", PayloadSchemaType.INTEGER))
+    elif collection_name == CV_COLLECTION_NAME:
+        # CV chunks are scrolled by associated_jd_id (get_cvs_for_jd) and filtered by document_type
+        payload_indexes.append(("associated_jd_id", PayloadSchemaType.KEYWORD))
+        payload_indexes.append(("document_type", PayloadSchemaType.KEYWORD))
+    missing_indexes = [
+        (field_name, field_schema) for field_name, field_schema in payload_indexes
+        if field_name not in (existing_payload_schema or {})
+    ]
+    if not missing_indexes:
+        return
+    await asyncio.gather(*(
+        qdrant_client.create_payload_index(
+            collection_name=collection_name,
+            field_name=field_name,
+            field_schema=field_schema
+        )
+        for field_name, field_schema in missing_indexes
+    ))
+    logger.info(f"Payload indexes for {[field_name for field_name, _ in missing_indexes]} created in '{collection_name}'.")
+
 async def _initialize_collection(collection_name: str, vectors_config: VectorParams):
     """
     Initialize a collection in Qdrant if it doesn't exist.
@@ -43,132 +163,369 @@ async def _initialize_collection(collection_name: str, vectors_config: VectorPar
         vectors_config: Vector parameters for the collection
     """
     try:
-        await qdrant_client.get_collection(collection_name=collection_name)
-        logger.info(f"Collection '{collection_name}' found. Ensuring payload index for 'original_doc_id' exists.")
-        # Optionally, check and create index if it doesn't exist even if collection exists.
-        # For simplicity here, we assume if we created it, we made the index.
-        # A more robust check would list indexes and create if missing.
+        collection_info = await qdrant_client.get_collection(collection_name=collection_name)
+        logger.info(f"Collection '{collection_name}' found.")
         try:
-            await qdrant_client.create_payload_index(
-                collection_name=collection_name,
-                field_name="original_doc_id",
-                field_schema=PayloadSchemaType.KEYWORD # UUIDs stored as strings are best indexed as keywords
-            )
-            logger.info(f"Payload index for 'original_doc_id' ensured/created in '{collection_name}'.")
-            # If it's the JD collection, also try to create an index for weight
-            if collection_name == JD_COLLECTION_NAME():
-                await qdrant_client.create_payload_index(
-                    collection_name=collection_name,
-                    field_name="weight",
-                    field_schema=PayloadSchemaType.INTEGER
-                )
-                logger.info(f"Payload index for 'weight' ensured/created in JD collection '{collection_name}'.")
+            await _create_payload_indexes(collection_name, collection_info.payload_schema or {})
         except Exception as index_e:
             # This might happen if index already exists with a different config, or other issues.
-            logger.warning(f"Note: Could not create/verify payload index for 'original_doc_id' or 'weight' in '{collection_name}' (may already exist or other issue): {type(index_e).__name__} - {index_e}")
+            logger.warning(f"Note: Could not create/verify payload indexes in '{collection_name}' (may already exist or other issue): {type(index_e).__name__} - {index_e}")
+        # A bulk ingest interrupted before finalize_bulk_ingest leaves indexing paused; resume it
+        if collection_info.config.optimizer_config.indexing_threshold == 0 and collection_config["indexing_threshold"] != 0:
+            try:
+                await _set_indexing_threshold(collection_name, collection_config["indexing_threshold"])
+                logger.warning(f"Indexing was left paused on '{collection_name}' by an interrupted bulk ingest; restored.")
+            except Exception as restore_e:
+                logger.error(f"Could not restore indexing on '{collection_name}': {type(restore_e).__name__} - {restore_e}")
 
     except Exception as e:
         logger.error(f"Collection '{collection_name}' not found or error: {type(e).__name__}. Attempting to create.")
         try:
             await qdrant_client.create_collection(
                 collection_name=collection_name,
-                vectors_config=vectors_config
+                vectors_config=vectors_config,
+                hnsw_config=HnswConfigDiff(
+                    m=collection_config["hnsw_m"],
+                    ef_construct=collection_config["hnsw_ef_construct"],
+                    on_disk=False
+                ),
+                optimizers_config=OptimizersConfigDiff(
+                    default_segment_number=collection_config["default_segment_number"],
+                    indexing_threshold=collection_config["indexing_threshold"],
+                    flush_interval_sec=collection_config["flush_interval_sec"]
+                ),
+                on_disk_payload=collection_config["on_disk_payload"]
             )
             logger.info(f"Collection '{collection_name}' created successfully.")
-            # Create payload index for original_doc_id after collection creation
             try:
-                await qdrant_client.create_payload_index(
-                    collection_name=collection_name,
-                    field_name="original_doc_id",
-                    field_schema=PayloadSchemaType.KEYWORD
-                )
-                logger.info(f"Payload index for 'original_doc_id' created in '{collection_name}'.")
-                # If it's the JD collection, also create an index for weight
-                if collection_name == JD_COLLECTION_NAME():
-                    await qdrant_client.create_payload_index(
-                        collection_name=collection_name,
-                        field_name="weight",
-                        field_schema=PayloadSchemaType.INTEGER
-                    )
-                    logger.info(f"Payload index for 'weight' created in JD collection '{collection_name}'.")
+                await _create_payload_indexes(collection_name)
             except Exception as index_creation_e:
-                logger.warning(f"Error creating payload index for 'original_doc_id' or 'weight' in new collection '{collection_name}': {type(index_creation_e).__name__} - {index_creation_e}")
+                logger.warning(f"Error creating payload indexes in new collection '{collection_name}': {type(index_creation_e).__name__} - {index_creation_e}")
         except Exception as creation_e:
             logger.error(f"Error creating collection '{collection_name}': {type(creation_e).__name__} - {creation_e}. It might already exist now.")
 
+async def _initialize_document_collection(collection_name: str):
+    """
+    Initialize a payload-only document collection in Qdrant if it doesn't exist.
+    Document collections hold one point per document, keyed by original_doc_id,
+    with no vector index.
+    
+    Args:
+        collection_name: Name of the collection to initialize
+    """
+    try:
+        await qdrant_client.get_collection(collection_name=collection_name)
+        logger.info(f"Document collection '{collection_name}' found.")
+    except Exception as e:
+        logger.error(f"Document collection '{collection_name}' not found or error: {type(e).__name__}. Attempting to create.")
+        try:
+            await qdrant_client.create_collection(
+                collection_name=collection_name,
+                vectors_config={},
+                on_disk_payload=collection_config["on_disk_payload"]
+            )
+            logger.info(f"Document collection '{collection_name}' created successfully.")
+        except Exception as creation_e:
+            logger.error(f"Error creating document collection '{collection_name}': {type(creation_e).__name__} - {creation_e}. It might already exist now.")
+
 async def initialize_qdrant_collections():
     """
     Initializes all necessary Qdrant collections asynchronously.
-    Creates JD and CV collections with appropriate vector parameters.
+    Creates JD and CV collections with appropriate vector parameters,
+    plus the payload-only CV document collection.
     """
     logger.info("Attempting to initialize Qdrant collections asynchronously...")
     vector_params = VectorParams(size=embedding_config["dimensions"], distance=Distance.COSINE)
-    await _initialize_collection(JD_COLLECTION_NAME(), vector_params)
-    await _initialize_collection(CV_COLLECTION_NAME(), vector_params)
+    # The collections are independent; initialize them concurrently
+    await asyncio.gather(
+        _initialize_collection(JD_COLLECTION_NAME, vector_params),
+        _initialize_collection(CV_COLLECTION_NAME, vector_params),
+        _initialize_document_collection(CV_DOCUMENTS_COLLECTION_NAME)
+    )
     logger.info("Asynchronous Qdrant collection initialization process completed.")
 
+# --- Bulk Ingest ---
+# Per collection: number of bulk ingests in progress. Segment indexing is paused while it is
+# above zero. Counters are only touched between awaits, so no lock is needed and no caller
+# waits on another's network call.
+_bulk_ingest_depth: Dict[str, int] = {}
+
+async def _set_indexing_threshold(collection_name: str, indexing_threshold: int) -> None:
+    """
+    Set the optimizer indexing threshold of a collection; 0 stops new segments from being HNSW-indexed.
+    
+    Args:
+        collection_name: Collection to update
+        indexing_threshold: Indexing threshold in KB of vectors per segment
+    """
+    await qdrant_client.update_collection(
+        collection_name=collection_name,
+        optimizers_config=OptimizersConfigDiff(indexing_threshold=indexing_threshold)
+    )
+
+async def begin_bulk_ingest(collection_name: str) -> None:
+    """
+    Pause segment indexing on a collection for a large ingest.
+    Points inserted meanwhile are stored but not HNSW-indexed; searches still work
+    but fall back to slower unindexed scans until finalize_bulk_ingest is called.
+    Calls nest: indexing resumes when the last concurrent bulk ingest finishes.
+    
+    Args:
+        collection_name: Collection about to receive the bulk ingest
+    """
+    _bulk_ingest_depth[collection_name] = _bulk_ingest_depth.get(collection_name, 0) + 1
+    if _bulk_ingest_depth[collection_name] > 1:
+        return
+    try:
+        await _set_indexing_threshold(collection_name, 0)
+        logger.info(f"Bulk ingest started: indexing paused on '{collection_name}'.")
+    except Exception as e:
+        logger.error(f"Could not pause indexing on '{collection_name}', ingesting with indexing on: {e}")
+
+async def finalize_bulk_ingest(collection_name: str) -> None:
+    """
+    Restore the configured indexing threshold on a collection after begin_bulk_ingest,
+    so Qdrant indexes everything inserted during the bulk ingest in one pass.
+    
+    Args:
+        collection_name: Collection that received the bulk ingest
+    """
+    _bulk_ingest_depth[collection_name] = max(_bulk_ingest_depth.get(collection_name, 0) - 1, 0)
+    if _bulk_ingest_depth[collection_name] > 0:
+        return
+    indexing_threshold = collection_config["indexing_threshold"]
+    try:
+        await _set_indexing_threshold(collection_name, indexing_threshold)
+        logger.info(f"Bulk ingest finished: indexing restored on '{collection_name}' (indexing_threshold={indexing_threshold}).")
+    except Exception as e:
+        # initialize_qdrant_collections restores it on the next startup
+        logger.error(
+            f"Failed to restore indexing on '{collection_name}'. Searches stay unindexed until "
+            f"indexing_threshold={indexing_threshold} is set again: {e}"
+        )
+
 # --- Embedding Generation ---
-async def get_embedding(text: str) -> List[float]:
+# Texts sent per embedding API request by get_embeddings_batch
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+# Approximate input tokens per embedding API request (estimated as characters / 4)
+EMBEDDING_BATCH_TOKEN_BUDGET = int(os.getenv("EMBEDDING_BATCH_TOKEN_BUDGET", "7500"))
+# Embeddings of recently seen texts, keyed by content hash, so re-ingested or duplicate
+# chunks are not sent to the API again. The vectors are deterministic for a given model.
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+_embedding_cache = AsyncTTLCache("embeddings", maxsize=EMBEDDING_CACHE_SIZE, ttl_seconds=7 * 24 * 3600)
+
+def _embedding_cache_key(text: str) -> str:
+    """Returns the embedding cache key of a stripped text, scoped to the embedding endpoint."""
+    return hashlib.blake2b(f"{embedding_config['api_url']}\n{text}".encode("utf-8"), digest_size=16).hexdigest()
+
+# Upper bound on concurrent embedding API requests across the whole process, so concurrent
+# ingests queue here instead of colliding at the provider's rate limit
+EMBEDDING_MAX_INFLIGHT = int(os.getenv("EMBEDDING_MAX_INFLIGHT", "8"))
+_embedding_semaphore = asyncio.Semaphore(EMBEDDING_MAX_INFLIGHT)
+
+# One HTTP session for all embedding calls so connections to DeepInfra are reused
+_embedding_session: Optional[aiohttp.ClientSession] = None
+
+def _get_embedding_session() -> aiohttp.ClientSession:
+    """Returns the shared embedding HTTP session, creating it on first use."""
+    global _embedding_session
+    if _embedding_session is None or _embedding_session.closed:
+        _embedding_session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=embedding_config["timeout"]),
+            # Keep-alive pool sized for concurrent embedding batches; DNS results reused for 5 minutes
+            connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300),
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {embedding_config['api_key']}"
+            }
+        )
+    return _embedding_session
+
+async def close_vector_db_clients():
     """
-    Get embedding vector for the given text using DeepInfra BGE API.
+    Closes the shared embedding HTTP session and the Qdrant client.
+    Call once on application shutdown.
+    """
+    global _embedding_session
+    if _embedding_session is not None and not _embedding_session.closed:
+        await _embedding_session.close()
+    _embedding_session = None
+    await qdrant_client.close()
+
+class EmbeddingError(Exception):
+    """No embedding could be generated for a text (empty input or a failed API request)."""
+
+class _EmbeddingPayloadTooLarge(Exception):
+    """The embedding API rejected a request as too large (HTTP 413 or an input-length error)."""
+
+def _pack_embedding_batches(indexes: List[int], texts: List[str]) -> List[List[int]]:
+    """
+    Group text indexes, in order, into request batches of at most EMBEDDING_BATCH_SIZE texts
+    and about EMBEDDING_BATCH_TOKEN_BUDGET tokens. A text over the budget gets a batch of its own.
     
     Args:
-        text: Text to generate embedding for
+        indexes: Indexes into texts to embed
+        texts: All texts
         
     Returns:
-        List of floating point values representing the embedding vector
+        Batches of indexes
+    """
+    batches: List[List[int]] = []
+    batch: List[int] = []
+    batch_tokens = 0
+    for i in indexes:
+        text_tokens = len(texts[i]) // 4 + 1
+        if batch and (len(batch) >= EMBEDDING_BATCH_SIZE or batch_tokens + text_tokens > EMBEDDING_BATCH_TOKEN_BUDGET):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(i)
+        batch_tokens += text_tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+async def _request_embeddings_splitting(texts: List[str]) -> List[List[float]]:
+    """
+    Internal: Embeds texts with _request_embeddings, splitting the request in half
+    (recursively) if the API rejects it as too large.
     """
     try:
-        text = text.strip()
-        if not text:
-            logger.warning("Empty text provided for embedding generation")
-            return [0.0] * _vector_params.size
+        return await _request_embeddings(texts)
+    except _EmbeddingPayloadTooLarge:
+        if len(texts) == 1:
+            raise
+        middle = len(texts) // 2
+        logger.warning(f"Embedding request with {len(texts)} texts was too large; retrying as two requests")
+        first_half, second_half = await asyncio.gather(
+            _request_embeddings_splitting(texts[:middle]),
+            _request_embeddings_splitting(texts[middle:])
+        )
+        return first_half + second_half
+
+async def _request_embeddings(texts: List[str]) -> List[List[float]]:
+    """
+    Internal: Embeds non-empty texts with one DeepInfra BGE API request.
+    
+    Args:
+        texts: Stripped, non-empty texts
         
-        # Check if API key is configured
-        if not embedding_config["api_key"]:
-            raise Exception("EMBEDDING_MODEL_API key not configured")
+    Returns:
+        Embedding vectors aligned with texts
+        
+    Raises:
+        Exception: If the API is not configured or returns an unusable response
+    """
+    # Check if API key is configured
+    if not embedding_config["api_key"]:
+        raise Exception("EMBEDDING_MODEL_API key not configured")
+    
+    # Prepare API request
+    payload = {
+        "inputs": texts
+    }
+    
+    # Make API call, holding a slot of the shared embedding concurrency limit
+    async with _embedding_semaphore, _get_embedding_session().post(
+        embedding_config["api_url"],
+        json=payload
+    ) as response:
         
-        # Prepare API request
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {embedding_config['api_key']}"
-        }
+        if response.status != 200:
+            error_text = await response.text()
+            if response.status == 413 or "too long" in error_text.lower():
+                raise _EmbeddingPayloadTooLarge(f"DeepInfra API error {response.status}: {error_text}")
+            raise Exception(f"DeepInfra API error {response.status}: {error_text}")
         
-        payload = {
-            "inputs": [text]
-        }
+        result = await response.json()
         
-        timeout = aiohttp.ClientTimeout(total=embedding_config["timeout"])
+        embeddings = result.get("embeddings")
+        if not embeddings or len(embeddings) != len(texts):
+            raise Exception("Invalid response format from DeepInfra API")
         
-        # Make API call
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.post(
-                embedding_config["api_url"],
-                headers=headers,
-                json=payload
-            ) as response:
-                
-                if response.status != 200:
-                    error_text = await response.text()
-                    raise Exception(f"DeepInfra API error {response.status}: {error_text}")
-                
-                result = await response.json()
-                
-                if "embeddings" not in result or not result["embeddings"]:
-                    raise Exception("Invalid response format from DeepInfra API")
-                
-                embedding_vector = result["embeddings"][0]
-                
-                if len(embedding_vector) != embedding_config["dimensions"]:
-                    raise Exception(f"Unexpected embedding dimensions: got {len(embedding_vector)}, expected {embedding_config['dimensions']}")
-                
-                logger.debug(f"Successfully generated embedding for text of length {len(text)}")
-                return embedding_vector
+        for embedding_vector in embeddings:
+            if len(embedding_vector) != embedding_config["dimensions"]:
+                raise Exception(f"Unexpected embedding dimensions: got {len(embedding_vector)}, expected {embedding_config['dimensions']}")
         
-    except Exception as e:
-        logger.error(f"Error generating embedding via DeepInfra API: {e}")
-        # Return zero vector as fallback
-        return [0.0] * _vector_params.size
+        logger.debug(f"Successfully generated {len(embeddings)} embedding(s) for {sum(map(len, texts))} characters of text")
+        return embeddings
+
+async def get_embeddings_batch(texts: List[str]) -> List[Optional[np.ndarray]]:
+    """
+    Get embedding vectors for several texts with DeepInfra BGE API requests of at most
+    EMBEDDING_BATCH_SIZE texts and about EMBEDDING_BATCH_TOKEN_BUDGET tokens each.
+    Texts embedded recently are served from the content-hash cache, duplicates are sent
+    once, and requests for the remaining batches run concurrently.
+    
+    Args:
+        texts: Texts to generate embeddings for
+        
+    Returns:
+        float32 embedding vectors aligned with texts; None for empty texts and texts in a
+        failed request, so callers can skip them instead of storing a useless vector.
+        Convert with .tolist() where a Qdrant model needs a list.
+    """
+    embeddings: List[Optional[np.ndarray]] = [None] * len(texts)
+    stripped_texts = [text.strip() for text in texts]
+    # Cache misses: key -> indexes of every text with that content
+    missed_indexes_by_key: Dict[str, List[int]] = {}
+    empty_count = 0
+    for i, text in enumerate(stripped_texts):
+        if not text:
+            empty_count += 1
+            continue
+        key = _embedding_cache_key(text)
+        cached_vector = _embedding_cache.get(key)
+        if cached_vector is not None:
+            embeddings[i] = cached_vector
+        else:
+            missed_indexes_by_key.setdefault(key, []).append(i)
+    if empty_count:
+        logger.warning(f"Empty text provided for embedding generation ({empty_count} of {len(texts)})")
+    
+    missed_keys = list(missed_indexes_by_key)
+    hit_count = len(texts) - empty_count - sum(map(len, missed_indexes_by_key.values()))
+    if hit_count:
+        logger.debug(f"Embedding cache hit for {hit_count} of {len(texts)} text(s)")
+    if not missed_keys:
+        return embeddings
+    
+    indexes_to_embed = [missed_indexes_by_key[key][0] for key in missed_keys]
+    keys_by_index = dict(zip(indexes_to_embed, missed_keys))
+    batches = _pack_embedding_batches(indexes_to_embed, stripped_texts)
+    results = await asyncio.gather(
+        *(_request_embeddings_splitting([stripped_texts[i] for i in batch]) for batch in batches),
+        return_exceptions=True
+    )
+    for batch, result in zip(batches, results):
+        if isinstance(result, Exception):
+            logger.error(f"Error generating embeddings via DeepInfra API: {result}")
+            continue
+        for i, embedding_vector in zip(batch, result):
+            # float32 arrays take a quarter of the memory of lists of Python floats in the cache
+            embedding_vector = np.asarray(embedding_vector, dtype=np.float32)
+            key = keys_by_index[i]
+            _embedding_cache.set(key, embedding_vector)
+            for duplicate_index in missed_indexes_by_key[key]:
+                embeddings[duplicate_index] = embedding_vector
+    return embeddings
+
+async def get_embedding(text: str) -> np.ndarray:
+    """
+    Get embedding vector for the given text using DeepInfra BGE API.
+    
+    Args:
+        text: Text to generate embedding for
+        
+    Returns:
+        float32 array holding the embedding vector
+        
+    Raises:
+        EmbeddingError: If the text is empty or the API request failed
+    """
+    embedding = (await get_embeddings_batch([text]))[0]
+    if embedding is None:
+        raise EmbeddingError("Could not generate an embedding for the text (empty text or API failure)")
+    return embedding
 
 # --- Common Search Functions ---
 async def search_similar_chunks(
@@ -194,9 +551,11 @@ async def search_similar_chunks(
     if not query_text.strip():
         return []
         
-    query_embedding = await get_embedding(query_text)
-    if not any(query_embedding):
-        logger.warning("Warning: Query embedding is zero vector for search_similar_chunks.")
+    try:
+        query_embedding = await get_embedding(query_text)
+    except EmbeddingError as e:
+        logger.error(f"Cannot search '{collection_to_search}': {e}")
+        return []
 
     search_filter = None
     if filter_by_doc_ids:
@@ -218,7 +577,7 @@ async def search_similar_chunks(
     try:
         search_result = await qdrant_client.search(
             collection_name=collection_to_search,
-            query_vector=query_embedding,
+            query_vector=query_embedding.tolist(),
             query_filter=search_filter, 
             limit=top_k,
             with_payload=True
@@ -234,6 +593,67 @@ async def search_similar_chunks(
         logger.error(f"Error searching collection '{collection_to_search}': {type(e).__name__} - {e}")
         return []
 
+async def search_similar_chunks_batch(
+    query_texts: List[str],
+    collection_to_search: str,
+    top_k: int = 5,
+    filter_by_doc_ids: Optional[List[str]] = None
+) -> List[List[Dict[str, Any]]]:
+    """
+    Search for chunks similar to each of several query texts with one embedding pass
+    and one batched Qdrant search request.
+    
+    Args:
+        query_texts: Texts to search for
+        collection_to_search: Collection name to search in
+        top_k: Maximum number of results to return per query
+        filter_by_doc_ids: Optional list of document IDs to filter every query by
+        
+    Returns:
+        Search results with scores per query text, aligned with query_texts;
+        empty for blank queries or if the search fails
+    """
+    from qdrant_client.models import Filter, FieldCondition, MatchAny, SearchRequest
+    
+    results: List[List[Dict[str, Any]]] = [[] for _ in query_texts]
+    query_indexes = [i for i, query_text in enumerate(query_texts) if query_text.strip()]
+    if not query_indexes:
+        return results
+
+    query_embeddings = await get_embeddings_batch([query_texts[i] for i in query_indexes])
+    # Queries whose embedding failed are not searched and keep an empty result
+    embedded_queries = [(i, query_embedding) for i, query_embedding in zip(query_indexes, query_embeddings) if query_embedding is not None]
+    if len(embedded_queries) < len(query_indexes):
+        logger.error(f"Could not embed {len(query_indexes) - len(embedded_queries)} of {len(query_indexes)} queries for '{collection_to_search}'; skipping them.")
+    if not embedded_queries:
+        return results
+    search_filter = Filter(
+        must=[FieldCondition(key="original_doc_id", match=MatchAny(any=filter_by_doc_ids))]
+    ) if filter_by_doc_ids else None
+    logger.info(f"Batch searching {len(embedded_queries)} queries in '{collection_to_search}'"
+                f"{f' filtered by original_doc_ids: {filter_by_doc_ids}' if search_filter else ' without doc_id filter'}.")
+
+    try:
+        batch_result = await qdrant_client.search_batch(
+            collection_name=collection_to_search,
+            requests=[
+                SearchRequest(vector=query_embedding.tolist(), filter=search_filter, limit=top_k, with_payload=True)
+                for _, query_embedding in embedded_queries
+            ]
+        )
+    except Exception as e:
+        logger.error(f"Error batch searching collection '{collection_to_search}': {type(e).__name__} - {e}")
+        return results
+
+    for (i, _), search_result in zip(embedded_queries, batch_result):
+        results_with_score = []
+        for hit in search_result:
+            payload_copy = hit.payload.copy() if hit.payload else {}
+            payload_copy['_score'] = hit.score
+            results_with_score.append(payload_copy)
+        results[i] = results_with_score
+    return results
+
 async def get_qdrantchunk_content(doc_id: str, collection_name: str) -> List[Dict[str, Any]]:
     """
     Retrieves all chunk payloads for a given original_doc_id from the specified collection.
@@ -257,8 +677,7 @@ async def get_qdrantchunk_content(doc_id: str, collection_name: str) -> List[Dic
     logger.info(f"Attempting to retrieve all chunks for doc_id: '{doc_id}' from collection: '{collection_name}'")
     
     retrieved_chunks = []
-    next_page_offset = None  # Initialize offset for scrolling
-    limit_per_scroll = 100 # How many points to fetch per scroll request
+    next_page_offset = None  # Point ID to resume scrolling from
 
     try:
         while True:
@@ -272,7 +691,7 @@ async def get_qdrantchunk_content(doc_id: str, collection_name: str) -> List[Dic
                         )
                     ]
                 ),
-                limit=limit_per_scroll,
+                limit=SCROLL_PAGE_SIZE,
                 offset=next_page_offset,
                 with_payload=True,
                 with_vectors=False
@@ -295,28 +714,82 @@ async def get_qdrantchunk_content(doc_id: str, collection_name: str) -> List[Dic
         logger.error(f"Error scrolling collection '{collection_name}' for doc_id '{doc_id}': {type(e).__name__} - {e}")
         return []
 
-async def get_full_document_text_from_db(doc_id: str, collection_name: str) -> Optional[str]:
+async def delete_document_points(doc_ids: List[str], collection_name: str) -> bool:
     """
-    Retrieves and reconstructs the full text of a document from its chunks
-    stored in the Qdrant database.
-
+    Deletes every point of the given documents (matched by original_doc_id) from a collection.
+    
     Args:
-        doc_id: The original_doc_id of the document.
-        collection_name: The Qdrant collection where the document's chunks are stored.
+        doc_ids: Document IDs whose points should be deleted
+        collection_name: Collection name to delete from
+        
+    Returns:
+        True if the delete request succeeded (or there was nothing to delete), False otherwise
+    """
+    from qdrant_client.models import Filter, FieldCondition, FilterSelector, MatchAny
+    
+    if not doc_ids:
+        return True
+
+    try:
+        await qdrant_client.delete(
+            collection_name=collection_name,
+            points_selector=FilterSelector(
+                filter=Filter(must=[FieldCondition(key="original_doc_id", match=MatchAny(any=doc_ids))])
+            )
+        )
+        return True
+    except Exception as e:
+        logger.error(f"Error deleting points for {len(doc_ids)} document(s) from '{collection_name}': {type(e).__name__} - {e}")
+        return False
 
+async def get_document_records(doc_ids: List[str], collection_name: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Retrieves document records (one point per document) by ID in a single request.
+    
+    Args:
+        doc_ids: Document IDs to retrieve
+        collection_name: Document collection name to retrieve from
+        
     Returns:
-        The reconstructed full text of the document as a single string,
-        or None if chunks are not found or an error occurs.
+        Dictionary mapping document ID to its payload; missing IDs are omitted
     """
-    if not doc_id or not collection_name:
-        logger.error("Error: doc_id and collection_name must be provided to get_full_document_text_from_db.")
-        return None
+    if not doc_ids:
+        return {}
 
-    chunks = await get_qdrantchunk_content(doc_id, collection_name)
-    if not chunks:
-        logger.error(f"No chunks found for doc_id '{doc_id}' in collection '{collection_name}'. Cannot reconstruct text.")
-        return None
+    try:
+        points = await qdrant_client.retrieve(
+            collection_name=collection_name,
+            ids=doc_ids,
+            with_payload=True,
+            with_vectors=False
+        )
+        return {str(point.id): point.payload or {} for point in points}
+    except Exception as e:
+        logger.error(f"Error retrieving document records from '{collection_name}': {type(e).__name__} - {e}")
+        return {}
+
+# Chunk payload fields read by _reconstruct_text_from_chunks (plus the document ID to group by)
+_TEXT_RECONSTRUCTION_FIELDS = ["original_doc_id", "chunk_index", "og_text", OG_TEXT_COMPRESSED_FIELD, "text_encoding"]
+
+def _append_chunk_text(buffer: io.StringIO, og_text: str) -> None:
+    """Internal: Appends a chunk's original text to a document text buffer, skipping blank text."""
+    if not og_text.strip():
+        return
+    if buffer.tell():
+        buffer.write("\n\n")
+    buffer.write(og_text)
 
+def _reconstruct_text_from_chunks(doc_id: str, chunks: List[Dict[str, Any]]) -> Optional[str]:
+    """
+    Internal: Joins the original text of a document's chunk payloads in chunk order.
+    
+    Args:
+        doc_id: The original_doc_id of the document (for logging)
+        chunks: Chunk payloads of the document
+        
+    Returns:
+        The reconstructed full text, or None if no chunk has original text
+    """
     # Sort chunks by their original index to reconstruct the document correctly
     sorted_chunks = []
     try:
@@ -331,11 +804,155 @@ async def get_full_document_text_from_db(doc_id: str, collection_name: str) -> O
         logger.warning(f"Error sorting chunks for doc_id '{doc_id}': {e}. Attempting to use unsorted chunks.")
         sorted_chunks = chunks
 
-    # Reconstruct using "og_text" for original document content
-    full_text_parts = [chunk.get("og_text", "") for chunk in sorted_chunks if isinstance(chunk.get("og_text"), str) and chunk.get("og_text","").strip()]
+    # Reconstruct using the original chunk text (compressed or legacy "og_text"),
+    # decompressing one chunk at a time straight into the buffer
+    buffer = io.StringIO()
+    for chunk in sorted_chunks:
+        _append_chunk_text(buffer, get_chunk_og_text(chunk))
     
-    if not full_text_parts:
+    if not buffer.tell():
         logger.warning(f"No valid original text (og_text) found in chunks for doc_id '{doc_id}' after sorting and filtering.")
         return None
         
-    return "\n\n".join(full_text_parts) 
\ No newline at end of file
+    return buffer.getvalue()
+
+async def _get_document_text_in_chunk_order(doc_id: str, collection_name: str) -> Optional[str]:
+    """
+    Internal: Reconstructs a document's text by scrolling its chunks sorted by chunk_index
+    server-side and appending each page's text as it arrives, without a client-side sort.
+    Pages after the first start from the next chunk_index, since ordered scrolls return no offset.
+    
+    Args:
+        doc_id: The original_doc_id of the document
+        collection_name: The Qdrant collection where the document's chunks are stored
+        
+    Returns:
+        The reconstructed full text, or None if no chunk has original text
+        
+    Raises:
+        Exception: If the ordered scroll fails (e.g. chunk_index is not indexed)
+    """
+    from qdrant_client.models import Direction, Filter, FieldCondition, MatchValue, OrderBy
+    
+    buffer = io.StringIO()
+    start_from: Optional[int] = None
+    while True:
+        scroll_response, _ = await qdrant_client.scroll(
+            collection_name=collection_name,
+            scroll_filter=Filter(
+                must=[FieldCondition(key="original_doc_id", match=MatchValue(value=doc_id))]
+            ),
+            limit=SCROLL_PAGE_SIZE,
+            order_by=OrderBy(key="chunk_index", direction=Direction.ASC, start_from=start_from),
+            with_payload=_TEXT_RECONSTRUCTION_FIELDS,
+            with_vectors=False
+        )
+        for hit in scroll_response:
+            _append_chunk_text(buffer, get_chunk_og_text(hit.payload or {}))
+        if len(scroll_response) < SCROLL_PAGE_SIZE:
+            break
+        start_from = scroll_response[-1].payload["chunk_index"] + 1
+
+    if not buffer.tell():
+        logger.warning(f"No valid original text (og_text) found in chunks for doc_id '{doc_id}'.")
+        return None
+    return buffer.getvalue()
+
+async def get_full_document_text_from_db(doc_id: str, collection_name: str) -> Optional[str]:
+    """
+    Retrieves and reconstructs the full text of a document from its chunks
+    stored in the Qdrant database.
+
+    Args:
+        doc_id: The original_doc_id of the document.
+        collection_name: The Qdrant collection where the document's chunks are stored.
+
+    Returns:
+        The reconstructed full text of the document as a single string,
+        or None if chunks are not found or an error occurs.
+    """
+    if not doc_id or not collection_name:
+        logger.error("Error: doc_id and collection_name must be provided to get_full_document_text_from_db.")
+        return None
+
+    # CV text lives on a single document record; older CVs only have it spread across chunks
+    if collection_name == CV_COLLECTION_NAME:
+        document_records = await get_document_records([doc_id], CV_DOCUMENTS_COLLECTION_NAME)
+        full_text = get_document_raw_text(document_records.get(doc_id))
+        if full_text:
+            return full_text
+        logger.info(f"No document record with text for doc_id '{doc_id}'. Reconstructing from chunks.")
+
+    try:
+        return await _get_document_text_in_chunk_order(doc_id, collection_name)
+    except Exception as e:
+        logger.warning(f"Ordered scroll failed for doc_id '{doc_id}' in '{collection_name}' ({type(e).__name__} - {e}). Sorting chunks locally instead.")
+
+    chunks = await get_qdrantchunk_content(doc_id, collection_name)
+    if not chunks:
+        logger.error(f"No chunks found for doc_id '{doc_id}' in collection '{collection_name}'. Cannot reconstruct text.")
+        return None
+
+    return _reconstruct_text_from_chunks(doc_id, chunks) 
+
+async def get_full_document_texts_from_db(doc_ids: List[str], collection_name: str) -> Dict[str, str]:
+    """
+    Retrieves the full text of several documents, fetching all their chunks with a
+    single filtered scroll instead of one per document.
+    
+    Args:
+        doc_ids: The original_doc_ids of the documents
+        collection_name: The Qdrant collection where the documents' chunks are stored
+        
+    Returns:
+        Dictionary mapping document ID to its full text; documents whose text could not be found are omitted
+    """
+    from qdrant_client.models import Filter, FieldCondition, MatchAny
+    
+    unique_doc_ids = list(dict.fromkeys(doc_id for doc_id in doc_ids if doc_id))
+    if not unique_doc_ids or not collection_name:
+        return {}
+
+    full_texts: Dict[str, str] = {}
+    # CV text lives on a single document record; older CVs only have it spread across chunks
+    if collection_name == CV_COLLECTION_NAME:
+        document_records = await get_document_records(unique_doc_ids, CV_DOCUMENTS_COLLECTION_NAME)
+        for doc_id in unique_doc_ids:
+            full_text = get_document_raw_text(document_records.get(doc_id))
+            if full_text:
+                full_texts[doc_id] = full_text
+    remaining_doc_ids = [doc_id for doc_id in unique_doc_ids if doc_id not in full_texts]
+    if not remaining_doc_ids:
+        return full_texts
+
+    chunks_by_doc_id: Dict[str, List[Dict[str, Any]]] = {doc_id: [] for doc_id in remaining_doc_ids}
+    next_page_offset = None
+    try:
+        while True:
+            scroll_response, next_page_offset = await qdrant_client.scroll(
+                collection_name=collection_name,
+                scroll_filter=Filter(
+                    must=[FieldCondition(key="original_doc_id", match=MatchAny(any=remaining_doc_ids))]
+                ),
+                limit=SCROLL_PAGE_SIZE,
+                offset=next_page_offset,
+                with_payload=_TEXT_RECONSTRUCTION_FIELDS,
+                with_vectors=False
+            )
+            for hit in scroll_response or []:
+                payload = hit.payload or {}
+                chunks_by_doc_id.setdefault(payload.get("original_doc_id"), []).append(payload)
+            if next_page_offset is None:
+                break
+    except Exception as e:
+        logger.error(f"Error retrieving chunks for {len(remaining_doc_ids)} documents from '{collection_name}': {type(e).__name__} - {e}")
+        return full_texts
+
+    for doc_id in remaining_doc_ids:
+        if not chunks_by_doc_id[doc_id]:
+            logger.error(f"No chunks found for doc_id '{doc_id}' in collection '{collection_name}'. Cannot reconstruct text.")
+            continue
+        full_text = _reconstruct_text_from_chunks(doc_id, chunks_by_doc_id[doc_id])
+        if full_text:
+            full_texts[doc_id] = full_text
+    return full_texts
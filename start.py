@@ -2,9 +2,14 @@
 """
 Startup script for Render deployment
 """
+import importlib.util
 import uvicorn
 from routes import app
 
+# libuv event loop and C HTTP parser when installed (uvloop is not available on Windows)
+LOOP = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+HTTP = "httptools" if importlib.util.find_spec("httptools") else "h11"
+
 if __name__ == "__main__":
     # Render will set the PORT environment variable
     import os
@@ -14,5 +19,7 @@ if __name__ == "__main__":
         app,
         host="0.0.0.0",
         port=port,
+        loop=LOOP,
+        http=HTTP,
         log_level="info"
     ) 
\ No newline at end of file
@@ -0,0 +1,99 @@
+import asyncio
+
+from src.utils.cache import AsyncTTLCache, invalidate_document
+
+
+def test_get_returns_stored_value_until_expiry():
+    cache = AsyncTTLCache("test", ttl_seconds=-1)
+    cache.set("key", "value")
+    assert cache.get("key") is None
+
+    cache = AsyncTTLCache("test", ttl_seconds=60)
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
+    assert cache.get("missing") is None
+
+
+def test_set_evicts_least_recently_used_entry():
+    cache = AsyncTTLCache("test", maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_concurrent_get_or_compute_shares_one_computation():
+    cache = AsyncTTLCache("test")
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_compute("key", compute) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["result"] * 5
+    assert calls == 1
+    assert cache.get("key") == "result"
+
+
+def test_get_or_compute_skips_values_rejected_by_should_cache():
+    cache = AsyncTTLCache("test")
+
+    async def compute():
+        return []
+
+    assert asyncio.run(cache.get_or_compute("key", compute, should_cache=bool)) == []
+    assert cache.get("key") is None
+
+
+def test_get_or_compute_propagates_errors_without_caching():
+    cache = AsyncTTLCache("test")
+
+    async def compute():
+        raise ValueError("boom")
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_compute("key", compute) for _ in range(2)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert cache.get("key") is None
+
+
+def test_invalidate_document_drops_dependent_entries_in_every_cache():
+    first = AsyncTTLCache("first")
+    second = AsyncTTLCache("second")
+    first.set("jd1-cv1", 1, doc_ids=["jd1", "cv1"])
+    first.set("jd1-cv2", 2, doc_ids=["jd1", "cv2"])
+    second.set("cv1", 3, doc_ids=["cv1"])
+
+    invalidate_document("cv1")
+
+    assert first.get("jd1-cv1") is None
+    assert first.get("jd1-cv2") == 2
+    assert second.get("cv1") is None
+
+
+def test_invalidation_during_computation_prevents_caching_stale_result():
+    cache = AsyncTTLCache("test")
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        return "stale"
+
+    async def run():
+        task = asyncio.create_task(cache.get_or_compute("key", compute, doc_ids=["doc"]))
+        await asyncio.sleep(0)
+        # Dropping the in-flight marker means the finished computation must not be stored
+        cache.clear()
+        return await task
+
+    assert asyncio.run(run()) == "stale"
+    assert cache.get("key") is None
@@ -0,0 +1,66 @@
+import io
+import zipfile
+
+import pytest
+
+pytest.importorskip("magic")
+pytest.importorskip("fastapi")
+
+from src.utils.file_handler import extract_docx_text
+
+_DOCUMENT_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+    ' xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006">'
+    "<w:body>{body}</w:body></w:document>"
+)
+
+
+def _make_docx(body: str) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("word/document.xml", _DOCUMENT_XML.format(body=body))
+    return buffer.getvalue()
+
+
+def test_extracts_paragraphs_and_skips_empty_ones():
+    docx = _make_docx(
+        "<w:p><w:r><w:t>Senior </w:t></w:r><w:r><w:t>Engineer</w:t></w:r></w:p>"
+        "<w:p></w:p>"
+        "<w:p><w:r><w:t>Python</w:t></w:r></w:p>"
+    )
+    assert extract_docx_text(docx) == "Senior Engineer\nPython"
+
+
+def test_extracts_table_cell_text():
+    docx = _make_docx(
+        "<w:tbl><w:tr>"
+        "<w:tc><w:p><w:r><w:t>Skill</w:t></w:r></w:p></w:tc>"
+        "<w:tc><w:p><w:r><w:t>Years</w:t></w:r></w:p></w:tc>"
+        "</w:tr></w:tbl>"
+    )
+    assert extract_docx_text(docx) == "Skill\nYears"
+
+
+def test_keeps_tabs_and_breaks_inside_runs_only():
+    docx = _make_docx(
+        "<w:p><w:pPr><w:tabs><w:tab w:val=\"left\" w:pos=\"720\"/></w:tabs></w:pPr>"
+        "<w:r><w:t>Name</w:t><w:tab/><w:t>Jane</w:t><w:br/><w:t>Doe</w:t></w:r></w:p>"
+    )
+    assert extract_docx_text(docx) == "Name\tJane\nDoe"
+
+
+def test_skips_markup_compatibility_fallback_content():
+    docx = _make_docx(
+        "<w:p><w:r><w:t>Visible</w:t></w:r></w:p>"
+        "<mc:AlternateContent>"
+        "<mc:Choice><w:p><w:r><w:t>Choice</w:t></w:r></w:p></mc:Choice>"
+        "<mc:Fallback><w:p><w:r><w:t>Fallback</w:t></w:r></w:p></mc:Fallback>"
+        "</mc:AlternateContent>"
+    )
+    assert extract_docx_text(docx) == "Visible\nChoice"
+
+
+def test_rejects_non_docx_bytes():
+    with pytest.raises(zipfile.BadZipFile):
+        extract_docx_text(b"not a zip file")
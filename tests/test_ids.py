@@ -0,0 +1,29 @@
+import uuid
+
+from src.utils.ids import generate_chunk_point_ids, generate_uuid7_batch
+
+
+def test_chunk_point_ids_are_deterministic_per_document():
+    assert generate_chunk_point_ids("doc-1", 3) == generate_chunk_point_ids("doc-1", 3)
+
+
+def test_chunk_point_ids_are_distinct_across_chunks_and_documents():
+    first = generate_chunk_point_ids("doc-1", 3)
+    second = generate_chunk_point_ids("doc-2", 3)
+    assert len(set(first) | set(second)) == 6
+
+
+def test_chunk_point_ids_extend_consistently():
+    assert generate_chunk_point_ids("doc-1", 5)[:3] == generate_chunk_point_ids("doc-1", 3)
+    assert generate_chunk_point_ids("doc-1", 0) == []
+
+
+def test_chunk_point_ids_are_version_5_uuids():
+    assert all(uuid.UUID(point_id).version == 5 for point_id in generate_chunk_point_ids("doc-1", 2))
+
+
+def test_uuid7_batch_is_time_ordered_and_unique():
+    ids = generate_uuid7_batch(100)
+    assert ids == sorted(ids)
+    assert len(set(ids)) == 100
+    assert all(uuid.UUID(value).version == 7 for value in ids)
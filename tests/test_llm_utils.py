@@ -0,0 +1,14 @@
+from src.llm.utils import strip_code_fence
+
+
+def test_strip_code_fence_removes_json_fence():
+    assert strip_code_fence('```json\n{"a": 1}\n```') == '{"a": 1}'
+
+
+def test_strip_code_fence_removes_plain_fence_and_surrounding_whitespace():
+    assert strip_code_fence('  \n```\n{"a": 1}\n```\n ') == '{"a": 1}'
+
+
+def test_strip_code_fence_leaves_unfenced_text_unchanged():
+    assert strip_code_fence('{"a": 1}') == '{"a": 1}'
+    assert strip_code_fence("") == ""